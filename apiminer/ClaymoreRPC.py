@@ -11,9 +11,249 @@ This is compatable with both Claymore and Ethminer
 #     unicode_literals,
 # )
 # from builtins import *  # noqa 401,403
+import asyncio
 import socket
 import json
 
+from .deadhosts import DISABLED, HostDown
+from .framing import FrameReader
+from .timeouts import DEFAULT_TIMEOUT, split_timeout
+from .snapshot import MinerSnapshot
+
+
+def _format_getstat1(raw_response, ip, port):
+    """Applies a nice formatting to a raw getstat1 result list
+
+    Parameters
+    ----------
+    raw_response : list of str
+        The ``result`` member of a miner_getstat1 response
+    ip : bytes
+        IP address of the api host, reported in the ``miner`` block
+    port : int
+        Port of the api host, reported in the ``miner`` block
+
+    Returns
+    -------
+    dict
+        Formatted API response. See :meth:`ClaymoreRPC.format_getstat1`
+    """
+    (
+        version,
+        minutes,
+        eth,
+        eth_cards,
+        dcr,
+        dcr_cards,
+        tempsfans,
+        pool,
+        counters,
+    ) = raw_response[:9]
+    minutes = int(minutes)
+    eth_total, eth_accepted, eth_rejected = map(int, eth.split(";"))
+    dcr_total, dcr_accepted, dcr_rejected = map(int, dcr.split(";"))
+    eth_invalid, eth_switches, dcr_invalid, dcr_switches = map(
+        int, counters.split(";")
+    )
+    tempsfans = list(map(int, tempsfans.split(";")))
+
+    gpus = {}
+    for gpu, (eth_rate, dcr_rate, temp, fan) in enumerate(
+        zip(
+            eth_cards.split(";"),
+            dcr_cards.split(";"),
+            tempsfans[0::2],
+            tempsfans[1::2],
+        )
+    ):
+        gpus["GPU {}".format(gpu)] = {
+            "eth_hashrate": int(eth_rate) * 1000 if eth_rate != "off" else 0,
+            "dcr_hashrate": (
+                float(dcr_rate) * 1000 if dcr_rate != "off" else 0
+            ),
+            "temp": temp,
+            "fan": fan,
+        }
+
+    return {
+        "miner": {
+            "version": version,
+            "runtime": "{:02d}:{:02d}".format(minutes // 60, minutes % 60),
+            "ip": ip,
+            "port": port,
+        },
+        "eth_pool": {
+            "total_hashrate": eth_total * 1000,
+            "accepted": eth_accepted,
+            "rejected": eth_rejected,
+            "pool": pool,
+            "invalid": eth_invalid,
+            "pool_switches": eth_switches,
+        },
+        "dcr_pool": {
+            "total_hashrate": dcr_total * 1000,
+            "accepted": dcr_accepted,
+            "rejected": dcr_rejected,
+            "invalid": dcr_invalid,
+            "pool_switches": dcr_switches,
+        },
+        "GPUs": gpus,
+    }
+
+
+def _unify_getstat1(response, return_dual_mining=False):
+    """Converts a formatted getstat1 response to the unified format
+
+    Parameters
+    ----------
+    response : dict
+        Output of :func:`_format_getstat1`. The GPU dicts are modified in
+        place.
+    return_dual_mining : bool
+        Report the dual mining (dcr) hashrate per GPU instead of ethash.
+
+    Returns
+    -------
+    dict
+        Unified API dictionary
+    """
+    for (key, value) in response["GPUs"].items():
+        if return_dual_mining:
+            value.pop("eth_hashrate")
+            value["hashrate"] = value.pop("dcr_hashrate")
+        else:
+            value.pop("dcr_hashrate")
+            value["hashrate"] = value.pop("eth_hashrate")
+
+    unified_response = {
+        "coin": "ethash",
+        "total hashrate": response["eth_pool"]["total_hashrate"],
+        "shares": {
+            "accepted": response["eth_pool"]["accepted"],
+            "rejected": response["eth_pool"]["rejected"],
+            "invalid": response["eth_pool"]["invalid"],
+        },
+        "uptime": response["miner"]["runtime"],
+        "version": response["miner"]["version"],
+        "GPUs": response["GPUs"],
+    }
+
+    return unified_response
+
+
+def parse_getstat1(raw_response, return_dual_mining=False, normalize=False):
+    """Parses a raw getstat1 result list into a :class:`MinerSnapshot`
+
+    Works on responses that were already fetched, e.g. captured traffic, in a
+    single pass over the fields. Holds the same values as
+    :meth:`ClaymoreRPC.unified_data`.
+
+    Parameters
+    ----------
+    raw_response : list of str
+        The ``result`` member of a miner_getstat1 response
+    return_dual_mining : bool
+        Report the dual mining (dcr) hashrate per GPU instead of ethash.
+    normalize : bool
+        See :mod:`apiminer.snapshot`
+
+    Returns
+    -------
+    :class:`MinerSnapshot`
+    """
+    minutes = int(raw_response[1])
+    total, accepted, rejected = map(int, raw_response[2].split(";"))
+    if return_dual_mining or normalize:
+        number = float
+    else:
+        number = int
+    hashrates = [
+        number(val) * 1000 if val != "off" else number(0)
+        for val in raw_response[5 if return_dual_mining else 3].split(";")
+    ]
+    tempsfans = list(map(int, raw_response[6].split(";")))
+
+    if normalize:
+        total = float(total * 1000)
+        uptime = minutes * 60
+    else:
+        total = total * 1000
+        uptime = "{:02d}:{:02d}".format(minutes // 60, minutes % 60)
+
+    return MinerSnapshot(
+        "ethash",
+        total,
+        accepted,
+        rejected,
+        int(raw_response[8].split(";", 1)[0]),
+        uptime,
+        raw_response[0],
+        hashrates,
+        tempsfans[0::2],
+        tempsfans[1::2],
+        normalize,
+    )
+
+
+def parse_getstat1_batch(
+    raw_responses, return_dual_mining=False, normalize=False, arrays=False
+):
+    """Parses many raw getstat1 result lists at once
+
+    Parameters
+    ----------
+    raw_responses : iterable of list of str
+        ``result`` members of miner_getstat1 responses
+    return_dual_mining : bool
+        See :func:`parse_getstat1`
+    normalize : bool
+        See :func:`parse_getstat1`. Implied by ``arrays``.
+    arrays : bool
+        Return NumPy arrays instead of snapshots. Requires NumPy.
+
+    Returns
+    -------
+    list or dict
+        A :class:`MinerSnapshot` per response or, with ``arrays``, a dict of
+        arrays with one row per response: "total_hashrate", "accepted",
+        "rejected", "invalid" and "uptime" of shape (n,), and "hashrate",
+        "temp" and "fan" of shape (n, gpus), padded with NaN to the largest
+        GPU count.
+    """
+    snapshots = [
+        parse_getstat1(raw, return_dual_mining, normalize or arrays)
+        for raw in raw_responses
+    ]
+    if not arrays:
+        return snapshots
+
+    import numpy
+
+    gpus = max([len(snapshot) for snapshot in snapshots] or [0])
+    result = {
+        name: numpy.array(
+            [getattr(snapshot, name) for snapshot in snapshots], dtype=float
+        )
+        for name in (
+            "total_hashrate",
+            "accepted",
+            "rejected",
+            "invalid",
+            "uptime",
+        )
+    }
+    for name, attribute in (
+        ("hashrate", "hashrates"),
+        ("temp", "temps"),
+        ("fan", "fans"),
+    ):
+        values = numpy.full((len(snapshots), gpus), numpy.nan)
+        for row, snapshot in enumerate(snapshots):
+            column = getattr(snapshot, attribute)
+            values[row, : len(column)] = column
+        result[name] = values
+    return result
+
 
 class ClaymoreRPC(object):
     """Class that interacts with a ClaymoreRPC protocol listener
@@ -24,6 +264,16 @@ class ClaymoreRPC(object):
         IP address of the api host
     port : int
         The port on which the api is listening
+    keep_alive : bool
+        Reuse the connection between requests instead of connecting for each
+        one. A connection the miner closed while idle is reopened
+        transparently. Call :meth:`ClaymoreRPC.close` when done.
+    timeout : float, tuple or None
+        Seconds to wait for the connection and for each response, or a
+        ``(connect, read)`` tuple. None waits forever.
+    dead_hosts : apiminer.deadhosts.DeadHosts or None
+        Registry of hosts that recently failed. Connecting to one of them
+        raises :exc:`apiminer.deadhosts.HostDown` right away.
 
     Attributes
     ----------
@@ -32,17 +282,42 @@ class ClaymoreRPC(object):
         :meth:`ClaymoreRPC.update`
     """
 
-    def __init__(self, ip, port):
+    def __init__(
+        self,
+        ip,
+        port,
+        keep_alive=False,
+        timeout=DEFAULT_TIMEOUT,
+        dead_hosts=None,
+    ):
         self.ip = str(ip).encode("utf-8")
 
         self.port = int(port)
 
+        #: bool: Keep the socket open between requests
+        self.keep_alive = keep_alive
+
+        #: float, tuple or None: Connect and read timeouts
+        self.timeout = timeout
+
+        #: :obj:`DeadHosts`: Registry of hosts that recently failed
+        self.dead_hosts = DISABLED if dead_hosts is None else dead_hosts
+
         #: bool: Set by :meth:`ClaymoreRPC._connect`
         self._connected = False
 
+        #: int: Requests sent since the socket was opened
+        self._requests = 0
+
+        #: bytes: Last query sent, resent if a kept alive socket went stale
+        self._last_query = None
+
         #: :obj:`socket.socket` Object. This communicates with the API Host
         self.socket = None
 
+        #: :obj:`FrameReader`: Buffers responses spanning several segments
+        self.frames = FrameReader()
+
         #: bool: DEPRECATED. Update every time the response attribute is read.
         self.auto_update = False
 
@@ -78,17 +353,46 @@ class ClaymoreRPC(object):
 
         self.authorized = None
 
+    @property
+    def host(self):
+        """tuple: ``(ip, port)`` key of the host in :attr:`dead_hosts`"""
+        return (self.ip.decode("utf-8"), self.port)
+
     def _connect(self):
         """Connects to our API Host"""
+        self.dead_hosts.check(self.host)
+        connect_timeout, read_timeout = split_timeout(self.timeout)
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.connect((self.ip, self.port))
+        self.socket.settimeout(connect_timeout)
+        try:
+            self.socket.connect((self.ip, self.port))
+        except OSError as error:
+            self.socket.close()
+            self.dead_hosts.failure(self.host, error)
+            raise
+        self.socket.settimeout(read_timeout)
         self._connected = True
+        self._requests = 0
+        self.frames.clear()
 
     def _disconnect(self):
         """Disconnects from our API Host"""
-        self.socket.close()
+        if self.socket is not None:
+            self.socket.close()
         self._connected = False
 
+    def _reconnect(self):
+        """Replaces a stale kept alive socket and resends the last query"""
+        self._disconnect()
+        self._connect()
+        self._requests = 1
+        self.socket.sendall(self._last_query)
+
+    def close(self):
+        """Closes a kept alive connection"""
+        if self._connected:
+            self._disconnect()
+
     def write(self, method="miner_getstats1", password=None):
         """Send message to the miner. Connects if not connected
 
@@ -107,9 +411,23 @@ class ClaymoreRPC(object):
         if password is not None:
             query["params"] = {"psw": password}
 
+        self._last_query = (json.dumps(query) + "\n").encode("utf-8")
+
         if not self._connected:
             self._connect()
-        self.socket.sendall((json.dumps(query) + "\n").encode("utf-8"))
+        self._requests += 1
+        try:
+            self.socket.sendall(self._last_query)
+        except (BrokenPipeError, ConnectionResetError):
+            if self._requests == 1:
+                raise
+            self._reconnect()
+
+    def _recv(self):
+        try:
+            return self.frames.read_socket(self.socket)
+        except ConnectionResetError:
+            return None
 
     def read(self):
         """Read data from API
@@ -120,18 +438,32 @@ class ClaymoreRPC(object):
             deserialized JSON response.
         """
         try:
-            received = self.socket.recv(4096)
-        except ConnectionResetError:
-            received = None
+            received = self._recv()
+
+            if received is None and self.keep_alive and self._requests > 1:
+                # The miner dropped the connection while it sat idle
+                self._reconnect()
+                received = self._recv()
+        except HostDown:
+            raise
+        except OSError as error:
+            # Timed out, or the connection broke in the middle of a response
             self._disconnect()
-            pass
+            self.dead_hosts.failure(self.host, error)
+            raise
+        except BaseException:
+            # Undecodable or oversized response: the rest of it is still
+            # on the socket
+            self._disconnect()
+            raise
 
-        # Close the socket when we're not using it.
-        # Let me know if this isn't a good idea
-        self._disconnect()
+        # Close the socket when we're not using it, unless asked to keep it
+        if received is None or not self.keep_alive:
+            self._disconnect()
 
-        if received:
-            return json.loads(received.decode("utf-8"))
+        if received is not None:
+            self.dead_hosts.success(self.host)
+            return received
         else:
             print("invalid JSON RPC response")
             return {"results": "INVALID"}
@@ -165,36 +497,23 @@ class ClaymoreRPC(object):
         raw_response = self.read()["result"]
         return raw_response
 
-    def unified_data(self, return_dual_mining=False):
+    def unified_data(self, return_dual_mining=False, normalize=False):
         """Returns a generic formatted response.
 
-        Uses get_stat1 under the hood
+        Uses get_stat1 under the hood. With ``normalize``, the units are the
+        same for every driver, see :mod:`apiminer.snapshot`.
         """
+        if normalize:
+            return self.snapshot(return_dual_mining, normalize).to_dict()
 
-        response = self.format_getstat1()
-
-        for (key, value) in response["GPUs"].items():
-            if return_dual_mining:
-                value.pop("eth_hashrate")
-                value["hashrate"] = value.pop("dcr_hashrate")
-            else:
-                value.pop("dcr_hashrate")
-                value["hashrate"] = value.pop("eth_hashrate")
-
-        unified_response = {
-            "coin": "ethash",
-            "total hashrate": response["eth_pool"]["total_hashrate"],
-            "shares": {
-                "accepted": response["eth_pool"]["accepted"],
-                "rejected": response["eth_pool"]["rejected"],
-                "invalid": response["eth_pool"]["invalid"],
-            },
-            "uptime": response["miner"]["runtime"],
-            "version": response["miner"]["version"],
-            "GPUs": response["GPUs"],
-        }
+        return _unify_getstat1(self.format_getstat1(), return_dual_mining)
 
-        return unified_response
+    def snapshot(self, return_dual_mining=False, normalize=False):
+        """Returns the unified data as a compact :class:`MinerSnapshot`
+
+        Uses get_stat1 under the hood
+        """
+        return parse_getstat1(self.getstat1(), return_dual_mining, normalize)
 
     def restart_miner(self):
         """Deprecated. Renamed to restart.
@@ -252,72 +571,7 @@ class ClaymoreRPC(object):
             Formatted API response. Check code for keys.
         """
 
-        raw_response = self.getstat1()
-        response = {
-            "miner": dict(),
-            "eth_pool": dict(),
-            "dcr_pool": dict(),
-            "GPUs": dict(),
-        }
-
-        response["miner"]["version"] = raw_response[0]
-        hours = int(raw_response[1]) // 60
-        minutes = int(raw_response[1]) % 60
-        response["miner"]["runtime"] = "{:02d}:{:02d}".format(hours, minutes)
-
-        [
-            response["eth_pool"]["total_hashrate"],
-            response["eth_pool"]["accepted"],
-            response["eth_pool"]["rejected"],
-        ] = [int(val) for val in raw_response[2].split(";")]
-        if response["eth_pool"]["total_hashrate"] > 0:
-            response["eth_pool"]["total_hashrate"] *= 1000
-
-        [
-            response["dcr_pool"]["total_hashrate"],
-            response["dcr_pool"]["accepted"],
-            response["dcr_pool"]["rejected"],
-        ] = [int(val) for val in raw_response[4].split(";")]
-        if response["dcr_pool"]["total_hashrate"] > 0:
-            response["dcr_pool"]["total_hashrate"] *= 1000
-
-        response["eth_pool"]["pool"] = raw_response[7]
-
-        [
-            response["eth_pool"]["invalid"],
-            response["eth_pool"]["pool_switches"],
-            response["dcr_pool"]["invalid"],
-            response["dcr_pool"]["pool_switches"],
-        ] = [int(val) for val in raw_response[8].split(";")]
-
-        percard_eth_hashrate = [
-            (int(val) * 1000) if val != "off" else 0
-            for val in raw_response[3].split(";")
-        ]
-
-        percard_dcr_hashrate = [
-            (float(val) * 1000) if val != "off" else 0
-            for val in raw_response[5].split(";")
-        ]
-
-        tempsfans = raw_response[6].split(";")
-        tempsfans = [
-            [int(value), int(tempsfans[index + 1])]
-            for index, value in enumerate(tempsfans)
-            if not index % 2
-        ]
-
-        for gpu in range(len(percard_eth_hashrate)):
-            response["GPUs"]["GPU {}".format(gpu)] = {
-                "eth_hashrate": percard_eth_hashrate[gpu],
-                "dcr_hashrate": percard_dcr_hashrate[gpu],
-                "temp": tempsfans[gpu][0],
-                "fan": tempsfans[gpu][1],
-            }
-        response["miner"]["ip"] = self.ip
-        response["miner"]["port"] = self.port
-
-        return response
+        return _format_getstat1(self.getstat1(), self.ip, self.port)
 
     def _format_response(self):
         """DEPRECATED WARNING. This will be removed in the next release"""
@@ -350,6 +604,12 @@ class EthminerRPC(ClaymoreRPC):
         IP address of the api host
     port : int
         The port on which the api is listening
+    keep_alive : bool
+        Reuse the connection between requests. See :class:`ClaymoreRPC`
+    timeout : float, tuple or None
+        See :class:`ClaymoreRPC`
+    dead_hosts : apiminer.deadhosts.DeadHosts or None
+        See :class:`ClaymoreRPC`
 
     Attributes
     ----------
@@ -358,8 +618,15 @@ class EthminerRPC(ClaymoreRPC):
         :meth:`ClaymoreRPC.update`
     """
 
-    def __init__(self, ip, port):
-        super().__init__(ip, port)
+    def __init__(
+        self,
+        ip,
+        port,
+        keep_alive=False,
+        timeout=DEFAULT_TIMEOUT,
+        dead_hosts=None,
+    ):
+        super().__init__(ip, port, keep_alive, timeout, dead_hosts)
 
     def getstatdetail(self):
         """Returns dict of detailed statistical data
@@ -397,3 +664,304 @@ class EthminerRPC(ClaymoreRPC):
         """
         self.write("miner_getstathr")
         return self.read()
+
+
+class AsyncClaymoreRPC(object):
+    """asyncio implementation of :class:`ClaymoreRPC`
+
+    Exposes the same query methods as :class:`ClaymoreRPC`, as coroutines,
+    so many miners can be polled concurrently from a single event loop.
+
+    Parameters
+    ----------
+    ip : str
+        IP address of the api host
+    port : int
+        The port on which the api is listening
+    keep_alive : bool
+        Reuse the connection between requests. See :class:`ClaymoreRPC`
+    timeout : float, tuple or None
+        See :class:`ClaymoreRPC`
+    dead_hosts : apiminer.deadhosts.DeadHosts or None
+        See :class:`ClaymoreRPC`
+    """
+
+    def __init__(
+        self,
+        ip,
+        port,
+        keep_alive=False,
+        timeout=DEFAULT_TIMEOUT,
+        dead_hosts=None,
+    ):
+        self.ip = str(ip).encode("utf-8")
+
+        self.port = int(port)
+
+        #: bool: Keep the connection open between requests
+        self.keep_alive = keep_alive
+
+        #: float, tuple or None: Connect and read timeouts
+        self.timeout = timeout
+
+        #: :obj:`DeadHosts`: Registry of hosts that recently failed
+        self.dead_hosts = DISABLED if dead_hosts is None else dead_hosts
+
+        #: bool: Set by :meth:`AsyncClaymoreRPC._connect`
+        self._connected = False
+
+        #: int: Requests sent since the connection was opened
+        self._requests = 0
+
+        #: bytes: Last query sent, resent if a kept alive connection went stale
+        self._last_query = None
+
+        #: :obj:`asyncio.StreamReader` Reads from the API Host
+        self.reader = None
+
+        #: :obj:`asyncio.StreamWriter` Writes to the API Host
+        self.writer = None
+
+        #: :obj:`FrameReader`: Buffers responses spanning several segments
+        self.frames = FrameReader()
+
+        #: :obj:`asyncio.Lock` Keeps write/read pairs from interleaving.
+        #: Created on first use so it binds to the running loop.
+        self._lock = None
+
+        self.authorized = None
+
+    host = ClaymoreRPC.host
+
+    async def _connect(self):
+        """Connects to our API Host"""
+        self.dead_hosts.check(self.host)
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip.decode("utf-8"), self.port),
+                split_timeout(self.timeout)[0],
+            )
+        except (OSError, asyncio.TimeoutError) as error:
+            self.dead_hosts.failure(self.host, error)
+            raise
+        self._connected = True
+        self._requests = 0
+        self.frames.clear()
+
+    def _disconnect(self):
+        """Disconnects from our API Host"""
+        if self.writer is not None:
+            self.writer.close()
+        self._connected = False
+
+    async def _reconnect(self):
+        """Replaces a stale kept alive connection and resends the last query"""
+        self._disconnect()
+        await self._connect()
+        self._requests = 1
+        self.writer.write(self._last_query)
+        await self.writer.drain()
+
+    def close(self):
+        """Closes a kept alive connection"""
+        if self._connected:
+            self._disconnect()
+
+    async def write(self, method="miner_getstats1", password=None):
+        """Send message to the miner. Connects if not connected
+
+        See :meth:`ClaymoreRPC.write`
+        """
+        query = {"id": 0, "jsonrpc": "2.0", "method": method}
+
+        if password is not None:
+            query["params"] = {"psw": password}
+
+        self._last_query = (json.dumps(query) + "\n").encode("utf-8")
+
+        if not self._connected:
+            await self._connect()
+        self._requests += 1
+        try:
+            self.writer.write(self._last_query)
+            await self.writer.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            if self._requests == 1:
+                raise
+            await self._reconnect()
+
+    async def _recv(self):
+        try:
+            return await asyncio.wait_for(
+                self.frames.read_stream(self.reader),
+                split_timeout(self.timeout)[1],
+            )
+        except ConnectionResetError:
+            return None
+
+    async def read(self):
+        """Read data from API
+
+        Returns
+        -------
+        dict
+            deserialized JSON response.
+        """
+        try:
+            received = await self._recv()
+
+            if received is None and self.keep_alive and self._requests > 1:
+                # The miner dropped the connection while it sat idle
+                await self._reconnect()
+                received = await self._recv()
+        except HostDown:
+            raise
+        except (OSError, asyncio.TimeoutError) as error:
+            self._disconnect()
+            self.dead_hosts.failure(self.host, error)
+            raise
+        except BaseException:
+            # Undecodable or oversized response: the rest of it is still
+            # on the socket
+            self._disconnect()
+            raise
+
+        if received is None or not self.keep_alive:
+            self._disconnect()
+
+        if received is not None:
+            self.dead_hosts.success(self.host)
+            return received
+        else:
+            print("invalid JSON RPC response")
+            return {"results": "INVALID"}
+
+    async def request(self, method, password=None):
+        """Write a query and read its response as one operation
+
+        Concurrent callers sharing an instance are serialized so that
+        responses are never read by the wrong caller.
+
+        Returns
+        -------
+        dict
+            deserialized JSON response.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self.write(method, password)
+            return await self.read()
+
+    async def authorize(self, password):
+        """Authenticate connection. See :meth:`ClaymoreRPC.authorize`"""
+        response = await self.request("api_authorize", password=password)
+        if response["result"]:
+            self.authorized = True
+        else:
+            self.authorized = False
+
+    async def getstat1(self):
+        """Implementation of the getstats1 method."""
+        response = await self.request("miner_getstat1")
+        return response["result"]
+
+    async def format_getstat1(self):
+        """Applies a nice formatting to getstat1
+
+        See :meth:`ClaymoreRPC.format_getstat1`
+        """
+        return _format_getstat1(await self.getstat1(), self.ip, self.port)
+
+    async def unified_data(self, return_dual_mining=False, normalize=False):
+        """Returns a generic formatted response.
+
+        See :meth:`ClaymoreRPC.unified_data`
+        """
+        if normalize:
+            snapshot = await self.snapshot(return_dual_mining, normalize)
+            return snapshot.to_dict()
+
+        return _unify_getstat1(
+            await self.format_getstat1(), return_dual_mining
+        )
+
+    async def snapshot(self, return_dual_mining=False, normalize=False):
+        """Returns the unified data as a compact :class:`MinerSnapshot`
+
+        See :meth:`ClaymoreRPC.snapshot`
+        """
+        return parse_getstat1(
+            await self.getstat1(), return_dual_mining, normalize
+        )
+
+    async def restart(self):
+        """Sends the miner (API Host) the restart command.
+
+        See :meth:`ClaymoreRPC.restart`
+        """
+        response = await self.request("miner_restart")
+
+        if response:
+            return True
+        else:
+            return False
+
+    async def reboot(self):
+        """Runs a script named reboot.sh (Linux) or reboot.bat (Windows)
+
+        See :meth:`ClaymoreRPC.reboot`
+        """
+        response = await self.request("miner_reboot")
+
+        if response:
+            return True
+        else:
+            return False
+
+
+class AsyncEthminerRPC(AsyncClaymoreRPC):
+    """asyncio implementation of :class:`EthminerRPC`
+
+    Parameters
+    ----------
+    ip : str
+        IP address of the api host
+    port : int
+        The port on which the api is listening
+    """
+
+    async def getstatdetail(self):
+        """Returns dict of detailed statistical data
+
+        Returns
+        -------
+        dict
+            API response
+        """
+        return await self.request("miner_getstatdetail")
+
+    async def ping(self):
+        """Check if the server is still alive
+
+        Returns
+        -------
+        bool
+            Response received.
+        """
+        response = await self.request("miner_ping")
+        if response:
+            return True
+        else:
+            return False
+
+    async def getstathr(self):
+        """Ethminer's noncompliant, but much better formatted extension to
+        getstat1
+
+        Returns
+        -------
+        dict
+            Response
+        """
+        return await self.request("miner_getstathr")
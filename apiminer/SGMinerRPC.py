@@ -7,64 +7,82 @@
 #     unicode_literals,
 # )
 # from builtins import *
+import asyncio
 import socket
 import json
 import datetime
 
-
-class _SGBase(object):
-    """Class that interacts with SGMiner JSON-RPC compatible API"""
-
-    def __init__(self, ip: str, port: int):
+from .deadhosts import DISABLED
+from .framing import FrameReader
+from .timeouts import DEFAULT_TIMEOUT, split_timeout
+from .snapshot import MinerSnapshot
+
+
+class _SGProtocol(object):
+    """Transport independent parts of the SGMiner JSON-RPC compatible API
+
+    Shared by the blocking (:class:`_SGBase`) and asyncio
+    (:class:`_AsyncSGBase`) implementations.
+
+    Parameters
+    ----------
+    ip : str
+        IP address of the api host
+    port : int
+        The port on which the api is listening
+    timeout : float, tuple or None
+        Seconds to wait for the connection and for each response, or a
+        ``(connect, read)`` tuple. None waits forever.
+    dead_hosts : apiminer.deadhosts.DeadHosts or None
+        Registry of hosts that recently failed. Connecting to one of them
+        raises :exc:`apiminer.deadhosts.HostDown` right away.
+    """
+
+    def __init__(
+        self, ip: str, port: int, timeout=DEFAULT_TIMEOUT, dead_hosts=None
+    ):
         self.ip = str(ip).encode("utf-8")
         self.port = int(port)
 
-        self.socket = None
+        #: float, tuple or None: Connect and read timeouts
+        self.timeout = timeout
+
+        #: :obj:`DeadHosts`: Registry of hosts that recently failed
+        self.dead_hosts = DISABLED if dead_hosts is None else dead_hosts
+
         self._connected = False
         self.VERBOSE = False
         self.coin = "Unknown"
 
-    def _connect(self):
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.settimeout(3)
-        self.socket.connect((self.ip, self.port))
-        self._connected = True
+        #: bool: Send several commands in one request, joined with "+".
+        #: Cleared automatically if the API rejects joined commands.
+        self.joined_commands = True
 
-    def _disconnect(self):
-        self.socket.close()
-        self._connected = False
+        #: :obj:`FrameReader`: Buffers responses spanning several segments
+        self.frames = FrameReader()
 
-    def _write(self, method="summary", parameter=None):
+    @property
+    def host(self):
+        """tuple: ``(ip, port)`` key of the host in :attr:`dead_hosts`"""
+        return (self.ip.decode("utf-8"), self.port)
+
+    @staticmethod
+    def _query(method="summary", parameter=None):
         query = {"command": method}
         if parameter:
             query["parameter"] = parameter
+        return (json.dumps(query) + "\n").encode("utf-8")
 
-        if not self._connected:
-            self._connect()
-
-        self.socket.sendall((json.dumps(query) + "\n").encode("utf-8"))
-
-    def _read(self):
-        """Read API response"""
-
-        try:
-            received = self.socket.recv(4096)
-        except ConnectionResetError:
-            received = None
-            self._disconnect()
-            pass
-
-        self._disconnect()
-
-        if received:
-            message = json.loads(received.decode("utf-8"))
+    def _check_response(self, message):
+        """Check the status flag of a deserialized API response"""
+        if message is not None:
             status = self._decode_status(message)
             status_code = status["STATUS"]
-            if (status_code is "E") or (status_code is "F"):
+            if (status_code == "E") or (status_code == "F"):
                 raise ValueError(
                     status["Msg"] + ". Message Dump:\n" + str(message)
                 )
-            elif status_code is "S":
+            elif status_code == "S":
                 if self.VERBOSE:
                     print(status)
                 return message
@@ -76,6 +94,66 @@ class _SGBase(object):
             print("invalid JSON RPC response")
             return {"results": "INVALID"}
 
+    def _split_joined(self, message, commands):
+        """Check and split the response to a joined command
+
+        Returns
+        -------
+        dict or None
+            Each command mapped to its own checked response. None if the API
+            rejected the joined command as a whole.
+        """
+        if message is None:
+            raise ValueError("invalid JSON RPC response")
+        if "STATUS" in message:
+            return None
+        return {
+            command: self._check_response(message[command][0])
+            for command in commands
+        }
+
+    def _snapshot(self, message, devs, version, normalize=False):
+        """Builds a :class:`MinerSnapshot` from summary, devs and version"""
+        number = float if normalize else int
+        count = max([dev["GPU"] + 1 for dev in devs] or [0])
+        hashrates = [None] * count
+        temps = [None] * count
+        fans = [None] * count
+        for dev in devs:
+            hashrates[dev["GPU"]] = number(dev["KHS av"] * 1000)
+            temps[dev["GPU"]] = int(dev["Temperature"])
+            fans[dev["GPU"]] = int(dev["Fan Percent"])
+
+        total = message["KHS av"] * 1000
+        return MinerSnapshot(
+            self.coin,
+            float(total) if normalize else total,
+            message["Accepted"],
+            message["Rejected"],
+            message["Discarded"] + message["Stale"],
+            message["Elapsed"] if normalize else self._uptime(message),
+            version["Miner"],
+            hashrates,
+            temps,
+            fans,
+            normalize,
+        )
+
+    def _snapshot_joined(self, messages, normalize=False):
+        return self._snapshot(
+            messages["summary"]["SUMMARY"][0],
+            messages["devs"]["DEVS"],
+            messages["version"]["VERSION"][0],
+            normalize,
+        )
+
+    def _unify_joined(self, messages):
+        return self._unify(
+            messages["summary"]["SUMMARY"][0],
+            messages["devs"]["DEVS"],
+            messages["version"]["VERSION"][0],
+        )
+
     def _decode_status(self, message):
         status = message["STATUS"][0]
         status["When"] = datetime.datetime.fromtimestamp(
@@ -83,6 +161,133 @@ class _SGBase(object):
         ).strftime("%c")
         return status
 
+    @staticmethod
+    def _uptime(message):
+        uptime_hours = message["Elapsed"] // 3600
+        uptime_minutes = (message["Elapsed"] // 60) % 60
+        return "{:02d}:{:02d}".format(uptime_hours, uptime_minutes)
+
+    def _unify(self, message, devs, version):
+        """Builds the unified response from summary, devs and version"""
+
+        unified_response = {
+            "coin": self.coin,
+            "total hashrate": message["KHS av"] * 1000,
+            "shares": {
+                "accepted": message["Accepted"],
+                "rejected": message["Rejected"],
+                "invalid": message["Discarded"] + message["Stale"],
+            },
+            "uptime": self._uptime(message),
+            "version": version["Miner"],
+            "GPUs": {},
+        }
+
+        for dev in devs:
+            unified_response["GPUs"]["GPU {}".format(dev["GPU"])] = {
+                "hashrate": int(dev["KHS av"] * 1000),
+                "temp": int(dev["Temperature"]),
+                "fan": int(dev["Fan Percent"]),
+            }
+
+        return unified_response
+
+
+class _SGBase(_SGProtocol):
+    """Class that interacts with SGMiner JSON-RPC compatible API"""
+
+    def __init__(
+        self, ip: str, port: int, timeout=DEFAULT_TIMEOUT, dead_hosts=None
+    ):
+        super().__init__(ip, port, timeout, dead_hosts)
+
+        self.socket = None
+
+    def _connect(self):
+        self.dead_hosts.check(self.host)
+        connect_timeout, read_timeout = split_timeout(self.timeout)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.settimeout(connect_timeout)
+        try:
+            self.socket.connect((self.ip, self.port))
+        except OSError as error:
+            self.socket.close()
+            self.dead_hosts.failure(self.host, error)
+            raise
+        self.socket.settimeout(read_timeout)
+        self._connected = True
+        self.frames.clear()
+
+    def _disconnect(self):
+        if self.socket is not None:
+            self.socket.close()
+        self._connected = False
+
+    def _write(self, method="summary", parameter=None):
+        if not self._connected:
+            self._connect()
+
+        self.socket.sendall(self._query(method, parameter))
+
+    def _receive(self):
+        """Read and deserialize an API response"""
+
+        try:
+            received = self.frames.read_socket(self.socket)
+        except ConnectionResetError:
+            received = None
+            self._disconnect()
+            pass
+        except OSError as error:
+            self._disconnect()
+            self.dead_hosts.failure(self.host, error)
+            raise
+        except BaseException:
+            # Undecodable or oversized response: the rest of it is still
+            # on the socket
+            self._disconnect()
+            raise
+
+        self._disconnect()
+
+        if received is not None:
+            self.dead_hosts.success(self.host)
+        return received
+
+    def _read(self):
+        """Read API response"""
+        return self._check_response(self._receive())
+
+    def query(self, *commands):
+        """Run several commands in a single request
+
+        The commands are joined with "+", which the sgminer API answers in
+        one response. APIs that reject joined commands are queried one
+        command at a time instead.
+
+        Parameters
+        ----------
+        *commands : str
+            Commands that take no parameter, e.g. "summary", "devs"
+
+        Returns
+        -------
+        dict
+            Each command mapped to its full (status checked) response
+        """
+        if self.joined_commands and len(commands) > 1:
+            self._write("+".join(commands))
+            messages = self._split_joined(self._receive(), commands)
+            if messages is not None:
+                return messages
+            self.joined_commands = False
+
+        messages = {}
+        for command in commands:
+            self._write(command)
+            messages[command] = self._read()
+        return messages
+
     def version(self):
         self._write("version")
         message = self._read()
@@ -113,42 +318,29 @@ class _SGBase(object):
         message = self._read()
         return message["GPUS"][0]["Count"]
 
-    def unified_data(self, return_dual_mining=False):
-        """@TODO: Fix GPUs"""
-        message = self.summary()
-        devs = self.devs()
+    def unified_data(self, return_dual_mining=False, normalize=False):
+        """Returns a generic formatted response.
 
-        uptime_hours = message["Elapsed"] // 3600
-        uptime_minutes = (message["Elapsed"] // 60) % 60
+        Uses a single summary+devs+version request under the hood. With
+        ``normalize``, the units are the same for every driver, see
+        :mod:`apiminer.snapshot`.
+        """
+        if normalize:
+            return self.snapshot(normalize=True).to_dict()
+        return self._unify_joined(self.query("summary", "devs", "version"))
 
-        unified_response = {
-            "coin": self.coin,
-            "total hashrate": message["KHS av"] * 1000,
-            "shares": {
-                "accepted": message["Accepted"],
-                "rejected": message["Rejected"],
-                "invalid": message["Discarded"] + message["Stale"],
-            },
-            "uptime": "{:02d}:{:02d}".format(uptime_hours, uptime_minutes),
-            "version": self.version()["Miner"],
-            "GPUs": self.devs(),
-        }
-
-        unified_response["GPUs"] = {}
-
-        for dev in devs:
-            unified_response["GPUs"]["GPU {}".format(dev["GPU"])] = {
-                "hashrate": int(dev["KHS av"] * 1000),
-                "temp": int(dev["Temperature"]),
-                "fan": int(dev["Fan Percent"]),
-            }
-
-        return unified_response
+    def snapshot(self, return_dual_mining=False, normalize=False):
+        """Returns the unified data as a compact :class:`MinerSnapshot`"""
+        return self._snapshot_joined(
+            self.query("summary", "devs", "version"), normalize
+        )
 
 
 class SGMiner(_SGBase):
-    def __init__(self, ip: str, port: int):
-        super().__init__(ip, port)
+    def __init__(
+        self, ip: str, port: int, timeout=DEFAULT_TIMEOUT, dead_hosts=None
+    ):
+        super().__init__(ip, port, timeout, dead_hosts)
 
     def pgacount(self) -> int:
         self._write("pgacount")
@@ -162,3 +354,155 @@ class SGMiner(_SGBase):
 
 
 TeamRedMiner = _SGBase
+
+
+class _AsyncSGBase(_SGProtocol):
+    """asyncio implementation of :class:`_SGBase`
+
+    Exposes the same query methods as :class:`_SGBase`, as coroutines.
+    """
+
+    def __init__(
+        self, ip: str, port: int, timeout=DEFAULT_TIMEOUT, dead_hosts=None
+    ):
+        super().__init__(ip, port, timeout, dead_hosts)
+
+        self.reader = None
+        self.writer = None
+
+        #: :obj:`asyncio.Lock` Keeps write/read pairs from interleaving.
+        #: Created on first use so it binds to the running loop.
+        self._lock = None
+
+    async def _connect(self):
+        self.dead_hosts.check(self.host)
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip.decode("utf-8"), self.port),
+                split_timeout(self.timeout)[0],
+            )
+        except (OSError, asyncio.TimeoutError) as error:
+            self.dead_hosts.failure(self.host, error)
+            raise
+        self._connected = True
+        self.frames.clear()
+
+    def _disconnect(self):
+        if self.writer is not None:
+            self.writer.close()
+        self._connected = False
+
+    async def _write(self, method="summary", parameter=None):
+        if not self._connected:
+            await self._connect()
+
+        self.writer.write(self._query(method, parameter))
+        await self.writer.drain()
+
+    async def _receive(self):
+        """Read and deserialize an API response"""
+
+        try:
+            received = await asyncio.wait_for(
+                self.frames.read_stream(self.reader),
+                split_timeout(self.timeout)[1],
+            )
+        except ConnectionResetError:
+            received = None
+        except (OSError, asyncio.TimeoutError) as error:
+            self._disconnect()
+            self.dead_hosts.failure(self.host, error)
+            raise
+        except BaseException:
+            # Undecodable or oversized response: the rest of it is still
+            # on the socket
+            self._disconnect()
+            raise
+
+        self._disconnect()
+
+        if received is not None:
+            self.dead_hosts.success(self.host)
+        return received
+
+    async def _read(self):
+        """Read API response"""
+        return self._check_response(await self._receive())
+
+    async def _request(self, method="summary", parameter=None):
+        """Write a command and read its response as one operation"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._write(method, parameter)
+            return await self._read()
+
+    async def query(self, *commands):
+        """Run several commands in a single request
+
+        See :meth:`_SGBase.query`
+        """
+        if self.joined_commands and len(commands) > 1:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                await self._write("+".join(commands))
+                messages = self._split_joined(await self._receive(), commands)
+            if messages is not None:
+                return messages
+            self.joined_commands = False
+
+        messages = {}
+        for command in commands:
+            messages[command] = await self._request(command)
+        return messages
+
+    async def version(self):
+        message = await self._request("version")
+        return message["VERSION"][0]
+
+    async def config(self):
+        message = await self._request("config")
+        return message["CONFIG"][0]
+
+    async def summary(self):
+        message = await self._request("summary")
+        return message["SUMMARY"][0]
+
+    async def devs(self):
+        message = await self._request("devs")
+        return message["DEVS"]
+
+    async def gpu(self, number: int):
+        message = await self._request("gpu", parameter=number)
+        return message["GPU"]
+
+    async def gpucount(self) -> int:
+        message = await self._request("gpucount")
+        return message["GPUS"][0]["Count"]
+
+    async def unified_data(self, return_dual_mining=False, normalize=False):
+        if normalize:
+            snapshot = await self.snapshot(normalize=True)
+            return snapshot.to_dict()
+        return self._unify_joined(
+            await self.query("summary", "devs", "version")
+        )
+
+    async def snapshot(self, return_dual_mining=False, normalize=False):
+        return self._snapshot_joined(
+            await self.query("summary", "devs", "version"), normalize
+        )
+
+
+class AsyncSGMiner(_AsyncSGBase):
+    async def pgacount(self) -> int:
+        message = await self._request("pgacount")
+        return message["PGAS"][0]["Count"]
+
+    async def pga(self, number: int):
+        message = await self._request("pga", parameter=number)
+        return message["PGA"]
+
+
+AsyncTeamRedMiner = _AsyncSGBase
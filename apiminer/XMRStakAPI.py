@@ -2,20 +2,46 @@
 # -*- encoding: utf-8 -*-
 """Reads data from the XMRStak JSON API"""
 
-import requests
+from .session import make_session
+from .timeouts import DEFAULT_TIMEOUT
+from .snapshot import MinerSnapshot
 
 
 class XMRStakAPI(object):
-    def __init__(self, ip, port):
+    """Reads data from the XMRStak JSON API
+
+    Parameters
+    ----------
+    ip : str
+        IP address of the api host
+    port : int
+        The port on which the api is listening
+    session : requests.Session or None
+        Session used for the requests. Share one session between drivers to
+        share its connection pool. A private keep-alive session is created if
+        None.
+    timeout : float or tuple
+        Connect and read timeout in seconds, as accepted by requests
+    """
+
+    def __init__(self, ip, port, session=None, timeout=DEFAULT_TIMEOUT):
         self.ip = ip
 
         self.port = port
 
+        #: :obj:`requests.Session` Keeps connections to the API host alive
+        self.session = session if session is not None else make_session()
+
+        self.timeout = timeout
+
         self.version = ""
 
         #: int: Uptime in minutes
         self.runtime = 0
 
+        #: int: Uptime in seconds
+        self.uptime = 0
+
         #: float: Current Total Hashrate. 10 second rolling average.
         self.total_hashrate = 0
 
@@ -36,13 +62,16 @@ class XMRStakAPI(object):
         self.update()
 
     def update(self):
-        response = requests.get(
-            "http://" + self.ip + ":" + str(self.port) + "/api.json"
+        response = self.session.get(
+            "http://" + self.ip + ":" + str(self.port) + "/api.json",
+            timeout=self.timeout,
         ).json()
 
         self.version = response["version"]
 
-        self.runtime = int(response["connection"]["uptime"]) // 60
+        self.uptime = int(response["connection"]["uptime"])
+
+        self.runtime = self.uptime // 60
 
         self.total_hashrate = float(response["hashrate"]["total"][0])
 
@@ -88,7 +117,7 @@ class XMRStakAPI(object):
             }
         return ourdict
 
-    def unified_data(self, return_dual_mining=None):
+    def unified_data(self, return_dual_mining=None, normalize=False):
         """Returns a generic formatted response.
 
         Yes, XMRStak API does have a completely different implementation
@@ -99,8 +128,12 @@ class XMRStakAPI(object):
         Returns
         -------
         dict
-            Unified API dictionary
+            Unified API dictionary. With ``normalize``, the units are the same
+            for every driver, see :mod:`apiminer.snapshot`.
         """
+        if normalize:
+            return self.snapshot(normalize=True).to_dict()
+
         response = self.getdict(update=True)
 
         unified_response = {
@@ -115,3 +148,25 @@ class XMRStakAPI(object):
             "version": response["miner"]["version"],
             "GPUs": response["GPUs"],
         }
+
+        return unified_response
+
+    def snapshot(self, return_dual_mining=None, normalize=False):
+        """Returns the unified data as a compact :class:`MinerSnapshot`
+
+        XMRStak reports no temperatures or fan speeds, those are None. When
+        normalized, invalid shares, which XMRStak does not report separately
+        from rejected shares, are None.
+        """
+        self.update()
+        return MinerSnapshot(
+            "XMR-Stak",
+            self.total_hashrate,
+            self.accepted_shares,
+            self.rejected_shares,
+            None if normalize else self.invalid_shares,
+            self.uptime if normalize else self.runtime,
+            self.version,
+            list(self.percard_hashrate),
+            normalized=normalize,
+        )
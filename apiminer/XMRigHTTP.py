@@ -1,6 +1,10 @@
 import requests
 import typing
 
+from .session import make_session
+from .timeouts import DEFAULT_TIMEOUT
+from .snapshot import MinerSnapshot
+
 
 class XMRig:
     """Interacts with the XMRig HTTP JSON API
@@ -16,10 +20,21 @@ class XMRig:
         assigned.
     token : str
         Access token for methods which require authorization
+    session : requests.Session or None
+        Session used for the requests. Share one session between drivers to
+        share its connection pool. A private keep-alive session is created if
+        None.
+    timeout : float or tuple
+        Connect and read timeout in seconds, as accepted by requests
     """
 
     def __init__(
-        self, ip: str, port: typing.Optional[int] = None, token: str = ""
+        self,
+        ip: str,
+        port: typing.Optional[int] = None,
+        token: str = "",
+        session: typing.Optional[requests.Session] = None,
+        timeout=DEFAULT_TIMEOUT,
     ) -> None:
         if port is None:
             if ":" in ip:
@@ -36,6 +51,9 @@ class XMRig:
         self.token = token
         self._config = None
 
+        self.session = session if session is not None else make_session()
+        self.timeout = timeout
+
     @property
     def base_url(self):
         base = "http://" + self.ip + ":" + str(self.port)
@@ -49,8 +67,10 @@ class XMRig:
         return header
 
     def summary(self):
-        response = requests.get(
-            self.base_url + "/1/summary", headers=self.headers
+        response = self.session.get(
+            self.base_url + "/1/summary",
+            headers=self.headers,
+            timeout=self.timeout,
         )
         if response.status_code != 200:
             raise requests.RequestException(
@@ -59,8 +79,10 @@ class XMRig:
         return response.json()
 
     def threads(self):
-        response = requests.get(
-            self.base_url + "/1/threads", headers=self.headers
+        response = self.session.get(
+            self.base_url + "/1/threads",
+            headers=self.headers,
+            timeout=self.timeout,
         )
         if response.status_code != 200:
             raise requests.RequestException(
@@ -72,8 +94,10 @@ class XMRig:
     def config(self):
         if self.token is None:
             raise ValueError("config property requires token authorization")
-        response = requests.get(
-            self.base_url + "/1/config", headers=self.headers
+        response = self.session.get(
+            self.base_url + "/1/config",
+            headers=self.headers,
+            timeout=self.timeout,
         )
         if response.status_code != 200:
             raise requests.RequestException(
@@ -89,10 +113,11 @@ class XMRig:
             raise ValueError("config property requires token authorization")
         else:
             self._config.update(kwargs)
-        response = requests.put(
+        response = self.session.put(
             self.base_url + "/1/config",
             headers=self.headers,
             json=self._config,
+            timeout=self.timeout,
         )
 
         if response.status_code != 200:
@@ -100,7 +125,15 @@ class XMRig:
                 "Error. Status Code {}".format(response.status_code)
             )
 
-    def unified_data(self, *args, **kwargs):
+    def unified_data(self, *args, normalize=False, **kwargs):
+        """Returns a generic formatted response.
+
+        With ``normalize``, the units are the same for every driver, see
+        :mod:`apiminer.snapshot`.
+        """
+        if normalize:
+            return self.snapshot(normalize=True).to_dict()
+
         response = self.summary()
         unified_response = {
             "coin": response["algo"],
@@ -119,3 +152,37 @@ class XMRig:
             unified_response["GPUs"]["GPU {}".format(index)] = thread[0]
 
         return unified_response
+
+    def snapshot(self, *args, normalize=False, **kwargs):
+        """Returns the unified data as a compact :class:`MinerSnapshot`
+
+        XMRig reports no temperatures or fan speeds, those are None. When
+        normalized, rejected shares are the total minus the good shares and
+        invalid shares, which XMRig does not report, are None.
+        """
+        response = self.summary()
+        results = response["results"]
+        hashrates = [thread[0] for thread in response["hashrate"]["threads"]]
+        if normalize:
+            return MinerSnapshot(
+                response["algo"],
+                float(response["hashrate"]["total"][0] or 0),
+                results["shares_good"],
+                results["shares_total"] - results["shares_good"],
+                None,
+                response["uptime"],
+                response["version"],
+                [float(hashrate or 0) for hashrate in hashrates],
+                normalized=True,
+            )
+        return MinerSnapshot(
+            response["algo"],
+            response["hashrate"]["total"][0],
+            results["shares_good"],
+            results["shares_total"],
+            -1,
+            response["uptime"] // 60,
+            response["version"],
+            hashrates,
+            bare_gpus=True,
+        )
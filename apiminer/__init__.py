@@ -1,4 +1,13 @@
-from .ClaymoreRPC import ClaymoreRPC, EthminerRPC
+from .ClaymoreRPC import (
+    ClaymoreRPC,
+    EthminerRPC,
+    AsyncClaymoreRPC,
+    AsyncEthminerRPC,
+    parse_getstat1,
+    parse_getstat1_batch,
+)
 from .XMRStakAPI import XMRStakAPI
-from .SGMinerRPC import SGMiner, TeamRedMiner
+from .SGMinerRPC import SGMiner, TeamRedMiner, AsyncSGMiner, AsyncTeamRedMiner
 from .XMRigHTTP import XMRig
+from .fleet import Fleet
+from .snapshot import MinerSnapshot, GpuSample
@@ -1,10 +1,276 @@
 #!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Print formatted data from your miners' APIs
+
+Polls every miner of an inventory file (see
+:func:`apiminer.fleet.load_inventory`) concurrently and prints a table or
+JSON Lines. With ``--watch``, the same connections, HTTP sessions and caches
+are reused for every sweep instead of starting cold, and ``--delta`` prints
+only what changed since the previous sweep (see :mod:`apiminer.delta`).
+
+Example: ``python -m apiminer inventory.txt --watch 30 --format jsonl``
+"""
 
 import argparse
+import json
+import sys
+import time
+
+from .cache import TTLCache, DEFAULT_TTLS
+from .deadhosts import DeadHosts
+from .delta import DeltaEncoder, DEFAULT_KEYFRAME_INTERVAL
+from .fleet import Fleet, load_inventory
+from .timeouts import DEFAULT_TIMEOUT
+from .sharded import ShardedFleet
+
+
+def _human(value):
+    """Format a hashrate with an SI prefix"""
+    if value is None:
+        return "-"
+    for prefix in ("", "k", "M", "G", "T"):
+        if abs(value) < 1000:
+            break
+        value /= 1000.0
+    return "{:.2f}{}".format(value, prefix)
+
+
+def _maximum(values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+#: str: Row layout of the table output
+ROW = "{:<21} {:<12} {:<9} {:>10} {:>17} {:>9} {:>4} {:>4}  {}"
+
+
+def print_table(inventory, results, stream=None):
+    """Print one table row per miner"""
+    stream = sys.stdout if stream is None else stream
+    print(
+        ROW.format(
+            "host",
+            "driver",
+            "coin",
+            "hashrate",
+            "acc/rej/inv",
+            "uptime",
+            "gpus",
+            "temp",
+            "error",
+        ),
+        file=stream,
+    )
+    for driver, ip, port in inventory:
+        host = "{}:{}".format(ip, port)
+        result = results[(ip, port)]
+        if isinstance(result, BaseException):
+            print(
+                ROW.format(host, driver, "", "", "", "", "", "", repr(result)),
+                file=stream,
+            )
+            continue
+        print(
+            ROW.format(
+                host,
+                driver,
+                str(result.coin)[:9],
+                _human(result.total_hashrate),
+                "{}/{}/{}".format(
+                    result.accepted,
+                    result.rejected,
+                    "-" if result.invalid is None else result.invalid,
+                ),
+                result.uptime,
+                len(result),
+                _maximum(result.temps) or "-",
+                "",
+            ),
+            file=stream,
+        )
+    stream.flush()
+
+
+def print_jsonl(inventory, results, timestamp, stream=None, encoder=None):
+    """Print one JSON document per miner and line
+
+    With a :class:`apiminer.delta.DeltaEncoder`, the lines hold its records
+    instead of the full data, and miners that did not change are skipped.
+    """
+    stream = sys.stdout if stream is None else stream
+    for driver, ip, port in inventory:
+        result = results[(ip, port)]
+        line = {"time": timestamp, "driver": driver, "ip": ip, "port": port}
+        if isinstance(result, BaseException):
+            line["error"] = repr(result)
+            if encoder is not None:
+                encoder.reset((ip, port))
+        elif encoder is None:
+            line["data"] = result.to_dict()
+        else:
+            record = encoder.encode((ip, port), result)
+            if record is None:
+                continue
+            line.update(record)
+        print(json.dumps(line), file=stream)
+    stream.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m apiminer",
+        description="Print formatted data from your miners' APIs",
+    )
+    parser.add_argument(
+        "inventory",
+        type=argparse.FileType("r"),
+        help="File with one 'driver ip port' line per miner, - for stdin",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=("table", "jsonl"),
+        default="table",
+        help="Output format (default: table)",
+    )
+    parser.add_argument(
+        "-n",
+        "--normalize",
+        action="store_true",
+        help="Report the same units for every driver: H/s and seconds",
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        type=float,
+        metavar="INTERVAL",
+        help="Poll again every INTERVAL seconds, keeping connections open",
+    )
+    parser.add_argument(
+        "-c",
+        "--count",
+        type=int,
+        help="Stop watching after this many sweeps",
+    )
+    parser.add_argument(
+        "-d",
+        "--delta",
+        action="store_true",
+        help="With --format jsonl, print only the fields that changed",
+    )
+    parser.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=DEFAULT_KEYFRAME_INTERVAL,
+        metavar="SWEEPS",
+        help="With --delta, print full data every SWEEPS sweeps "
+        "(default: {})".format(DEFAULT_KEYFRAME_INTERVAL),
+    )
+    parser.add_argument(
+        "--cache",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Reuse results younger than SECONDS instead of polling",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=256,
+        help="Miners polled at the same time (default: 256)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="Seconds allowed per miner (default: 5)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Split the inventory across this many polling processes "
+        "(default: 1)",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        metavar="SECONDS",
+        help="Seconds allowed to connect to a miner (default: {})".format(
+            DEFAULT_TIMEOUT
+        ),
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.delta and args.format != "jsonl":
+        parser.error("--delta requires --format jsonl")
+    with args.inventory:
+        try:
+            inventory = load_inventory(args.inventory)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 2
+
+    options = {
+        "concurrency": args.concurrency,
+        "timeout": args.timeout,
+        "keep_alive": args.watch is not None,
+        "cache_ttls": dict(DEFAULT_TTLS, snapshot=args.cache),
+        "driver_timeout": (args.connect_timeout, args.timeout),
+    }
+    # Skip rigs that are down instead of waiting for them every sweep
+    dead_hosts = args.watch is not None
+    if args.processes > 1:
+        fleet = ShardedFleet(
+            inventory,
+            args.processes,
+            cache=args.cache > 0,
+            dead_hosts=dead_hosts,
+            **options
+        )
+    else:
+        fleet = Fleet(
+            inventory,
+            cache=TTLCache() if args.cache > 0 else None,
+            dead_hosts=DeadHosts() if dead_hosts else None,
+            **options
+        )
+
+    encoder = None
+    if args.delta:
+        encoder = DeltaEncoder(args.keyframe_interval)
 
-parser = argparse.ArgumentParser(
-    description="Print formatted data from your miner's API"
-)
+    sweeps = 0
+    failed = 0
+    try:
+        while True:
+            started = time.time()
+            results = fleet.poll("snapshot", normalize=args.normalize)
+            failed = sum(
+                isinstance(result, BaseException)
+                for result in results.values()
+            )
+            if args.format == "jsonl":
+                print_jsonl(inventory, results, started, encoder=encoder)
+            else:
+                print_table(inventory, results)
+            sweeps += 1
+            if args.watch is None or sweeps == args.count:
+                break
+            if args.format == "table":
+                print()
+            time.sleep(max(0, started + args.watch - time.time()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.close()
+    return 1 if failed else 0
 
 
-print("Not Implemented yet")
+if __name__ == "__main__":
+    sys.exit(main())
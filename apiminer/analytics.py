@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Vectorized fleet analytics
+
+Finds GPUs hashing below their peers, GPUs running hot and miners whose
+share acceptance is degrading. Every computation works on NumPy arrays for
+the whole fleet at once: :func:`fleet_frame` flattens a poll into per-GPU
+arrays, and :class:`apiminer.history.History` windows can be used directly.
+
+Requires NumPy, installed with the ``analytics`` extra.
+"""
+
+import collections
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    raise ImportError(
+        "apiminer.analytics requires numpy. "
+        "Install it with: pip install apiminer[analytics]"
+    )
+
+from .snapshot import MinerSnapshot
+
+#: One poll of a fleet, flattened into arrays. Missing values are NaN.
+#:
+#: + keys: list of miner keys, in row order
+#: + coins: (miners,) coin or algorithm of each miner
+#: + miner: (gpus,) row of the miner each GPU belongs to
+#: + gpu: (gpus,) GPU number within its miner
+#: + hashrate, temp, fan: (gpus,) per-GPU values
+#: + shares: (miners, 3) accepted, rejected and invalid counters
+FleetFrame = collections.namedtuple(
+    "FleetFrame",
+    ["keys", "coins", "miner", "gpu", "hashrate", "temp", "fan", "shares"],
+)
+
+
+def fleet_frame(snapshots):
+    """Flatten a fleet poll into per-GPU arrays
+
+    Parameters
+    ----------
+    snapshots : dict
+        Miner keys mapped to a normalized
+        :class:`apiminer.snapshot.MinerSnapshot`, e.g. from
+        ``fleet.poll("snapshot", normalize=True)``. Exceptions are skipped.
+        Raw :meth:`unified_data` dictionaries are refused, as the drivers
+        disagree on units and share counters until normalized.
+
+    Returns
+    -------
+    FleetFrame
+
+    Raises
+    ------
+    TypeError
+        A value is neither a snapshot nor an exception
+    ValueError
+        A snapshot is not normalized
+    """
+    keys = []
+    coins = []
+    counts = []
+    hashrate = []
+    temp = []
+    fan = []
+    shares = []
+    for key, snapshot in snapshots.items():
+        if isinstance(snapshot, BaseException):
+            continue
+        if not isinstance(snapshot, MinerSnapshot):
+            raise TypeError(
+                "Expected a MinerSnapshot for {!r}, got {}. Poll with "
+                "method='snapshot', normalize=True".format(
+                    key, type(snapshot).__name__
+                )
+            )
+        if not snapshot.normalized:
+            raise ValueError(
+                "The snapshot of {!r} is not normalized. Poll with "
+                "normalize=True".format(key)
+            )
+        keys.append(key)
+        coins.append(snapshot.coin)
+        counts.append(len(snapshot))
+        hashrate.extend(snapshot.hashrates)
+        temp.extend(snapshot.temps)
+        fan.extend(snapshot.fans)
+        shares.append([snapshot.accepted, snapshot.rejected, snapshot.invalid])
+
+    counts = numpy.array(counts, dtype=int)
+    miner = numpy.repeat(numpy.arange(len(keys)), counts)
+    starts = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    return FleetFrame(
+        keys,
+        numpy.array(coins, dtype=object),
+        miner,
+        numpy.arange(len(miner)) - starts,
+        numpy.array(hashrate, dtype=float),
+        numpy.array(temp, dtype=float),
+        numpy.array(fan, dtype=float),
+        numpy.array(shares, dtype=float).reshape(len(keys), 3),
+    )
+
+
+def group_median(values, groups):
+    """Median of each element's group, ignoring NaN
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        (n,) values
+    groups : numpy.ndarray
+        (n,) group label of each value, e.g. the coin
+
+    Returns
+    -------
+    numpy.ndarray
+        (n,) median of the group each value belongs to
+    """
+    labels, inverse = numpy.unique(groups, return_inverse=True)
+    medians = numpy.full(len(labels), numpy.nan)
+    for label in range(len(labels)):
+        members = values[inverse == label]
+        if not numpy.isnan(members).all():
+            medians[label] = numpy.nanmedian(members)
+    return medians[inverse]
+
+
+def group_robust_zscores(values, groups):
+    """Robust z-score of each value within its group, ignoring NaN
+
+    Scores are the distance to the group median in units of the median
+    absolute deviation (MAD), scaled to match the standard deviation of
+    normal data. Unlike the mean and the standard deviation, the median and
+    the MAD are barely moved by the outlier being scored, so a single hot
+    card stands out even in a group of four.
+
+    Groups where more than half the values are equal fall back to the mean
+    absolute deviation. Groups with no spread at all get a score of 0.
+    """
+    labels, inverse = numpy.unique(groups, return_inverse=True)
+    scores = numpy.full(len(values), numpy.nan)
+    for label in range(len(labels)):
+        members = inverse == label
+        group = values[members]
+        valid = ~numpy.isnan(group)
+        if not valid.any():
+            continue
+        deviations = group - numpy.median(group[valid])
+        spread = numpy.abs(deviations[valid])
+        scale = 1.4826 * numpy.median(spread)
+        if scale == 0:
+            scale = 1.2533 * spread.mean()
+        if scale == 0:
+            scores[members] = numpy.where(valid, 0.0, numpy.nan)
+        else:
+            scores[members] = deviations / scale
+    return scores
+
+
+def underperformers(frame, ratio=0.8):
+    """GPUs hashing below ``ratio`` times the median of the same coin
+
+    Returns
+    -------
+    numpy.ndarray
+        (gpus,) boolean mask into the per-GPU arrays of ``frame``
+    """
+    coins = frame.coins[frame.miner]
+    medians = group_median(frame.hashrate, coins)
+    with numpy.errstate(invalid="ignore"):
+        return frame.hashrate < ratio * medians
+
+
+def thermal_outliers(frame, z=2.5, limit=None, groups=None):
+    """GPUs running hot compared to the rest of the fleet
+
+    Parameters
+    ----------
+    frame : FleetFrame
+    z : float
+        Flag GPUs whose temperature exceeds this robust z-score, see
+        :func:`group_robust_zscores`
+    limit : float or None
+        Also flag GPUs at or above this temperature
+    groups : numpy.ndarray or None
+        (gpus,) label of each GPU, e.g. its model, so GPUs are only compared
+        with others of their kind. Defaults to the whole fleet.
+
+    Returns
+    -------
+    numpy.ndarray
+        (gpus,) boolean mask into the per-GPU arrays of ``frame``
+    """
+    if groups is None:
+        groups = numpy.zeros(len(frame.temp))
+    scores = group_robust_zscores(frame.temp, groups)
+    with numpy.errstate(invalid="ignore"):
+        hot = scores > z
+        if limit is not None:
+            hot |= frame.temp >= limit
+    return hot
+
+
+def acceptance_ratios(shares, axis=-1):
+    """Fraction of the shares that were accepted
+
+    Parameters
+    ----------
+    shares : numpy.ndarray
+        Accepted, rejected and invalid counters of normalized snapshots,
+        e.g. the (miners, 3) shares of a :class:`FleetFrame`. Unknown (NaN)
+        invalid counts are treated as 0.
+    axis : int
+        Axis holding the three counters. Use 1 for the (miners, 3, samples)
+        shares of a History window.
+
+    Returns
+    -------
+    numpy.ndarray
+        Accepted / (accepted + rejected + invalid), NaN without shares
+    """
+    shares = numpy.asarray(shares, dtype=float)
+    accepted = numpy.take(shares, 0, axis=axis)
+    total = numpy.nansum(shares, axis=axis)
+    total[numpy.isnan(accepted)] = numpy.nan
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return numpy.where(total > 0, accepted / total, numpy.nan)
+
+
+def rolling_mean(values, length):
+    """Rolling mean along the last axis, ignoring NaN
+
+    Returns
+    -------
+    numpy.ndarray
+        Same shape as values. Element ``i`` is the mean of the ``length``
+        values ending at ``i`` (fewer at the start).
+    """
+    values = numpy.asarray(values, dtype=float)
+    valid = ~numpy.isnan(values)
+    sums = numpy.cumsum(numpy.where(valid, values, 0.0), axis=-1)
+    counts = numpy.cumsum(valid, axis=-1)
+    sums[..., length:] = sums[..., length:] - sums[..., :-length]
+    counts[..., length:] = counts[..., length:] - counts[..., :-length]
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def share_ratio_trend(shares, length):
+    """Change of the rejected and invalid share ratio over time
+
+    Compares the ratio of bad shares found in the last ``length`` samples to
+    the ratio in the ``length`` samples before them.
+
+    Parameters
+    ----------
+    shares : numpy.ndarray
+        (miners, 3, samples) share counters of a History window of
+        normalized snapshots
+    length : int
+        Samples per period. The window needs ``2 * length + 1`` samples.
+
+    Returns
+    -------
+    numpy.ndarray
+        (miners,) recent bad share ratio minus the earlier one. Positive
+        values are miners whose rejected/invalid ratio is rising.
+
+    Raises
+    ------
+    ValueError
+        The window holds fewer than ``2 * length + 1`` samples
+    """
+    shares = numpy.asarray(shares, dtype=float)
+    if length < 1 or shares.shape[-1] < 2 * length + 1:
+        raise ValueError(
+            "share_ratio_trend with length={} needs a window of at least {} "
+            "samples, got {}".format(length, 2 * length + 1, shares.shape[-1])
+        )
+    counters = numpy.nan_to_num(shares[..., -(2 * length + 1) :])
+
+    def bad_ratio(start, stop):
+        found = counters[..., stop] - counters[..., start]
+        total = found.sum(axis=-1)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            return numpy.where(
+                total > 0, (found[:, 1] + found[:, 2]) / total, numpy.nan
+            )
+
+    return bad_ratio(length, 2 * length) - bad_ratio(0, length)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Time-to-live cache for miner responses
+
+Miner APIs are small, single threaded servers. When several consumers read
+the same rig within seconds of each other, :class:`CachedMiner` answers the
+repeated reads from memory instead of querying the miner again.
+"""
+
+import asyncio
+import collections
+import functools
+import threading
+import time
+
+#: dict: Default time-to-live, in seconds, of the read-only driver methods.
+#: Methods not listed here (restart, reboot, authorize...) are never cached.
+DEFAULT_TTLS = {
+    "unified_data": 10,
+    "snapshot": 10,
+    "getstat1": 10,
+    "format_getstat1": 10,
+    "getstatdetail": 10,
+    "getstathr": 10,
+    "summary": 10,
+    "devs": 10,
+    "threads": 10,
+    "gpu": 10,
+    "pga": 10,
+    "query": 10,
+    "getdict": 10,
+    "version": 60,
+    "config": 60,
+    "gpucount": 60,
+    "pgacount": 60,
+}
+
+
+class TTLCache(object):
+    """Size bounded mapping whose entries expire
+
+    Entries are evicted when they expire or, once ``maxsize`` entries are
+    stored, least recently used first. Safe to share between threads.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries
+    clock : callable
+        Returns the current time in seconds
+    """
+
+    def __init__(self, maxsize=4096, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        #: int: Lookups answered from the cache
+        self.hits = 0
+
+        #: int: Lookups that found no live entry
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Look up a live entry
+
+        Returns
+        -------
+        tuple
+            (True, value) if found, (False, None) otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, ttl):
+        """Store value for ttl seconds"""
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry if key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class CachedMiner(object):
+    """Wraps a driver and caches the results of its read-only methods
+
+    Works with the blocking and the asyncio drivers. Every other attribute is
+    passed through to the wrapped driver. Cached results are shared between
+    callers and should not be modified.
+
+    Parameters
+    ----------
+    miner : object
+        Any apiminer driver instance
+    cache : TTLCache or None
+        Cache to store results in. Share one cache between wrappers so that
+        every consumer in the process benefits. A private cache is created if
+        None.
+    ttls : dict or None
+        Method names mapped to their time-to-live in seconds. Defaults to
+        :data:`DEFAULT_TTLS`.
+    """
+
+    def __init__(self, miner, cache=None, ttls=None):
+        self.miner = miner
+        self.cache = cache if cache is not None else TTLCache()
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+
+        ip = miner.ip
+        if isinstance(ip, bytes):
+            ip = ip.decode("utf-8")
+        self._host = (ip, int(miner.port))
+
+    def _key(self, name, args, kwargs):
+        return self._host + (name, args, tuple(sorted(kwargs.items())))
+
+    def __getattr__(self, name):
+        attribute = getattr(self.miner, name)
+        ttl = self.ttls.get(name)
+        if not ttl or not callable(attribute):
+            return attribute
+
+        if asyncio.iscoroutinefunction(attribute):
+
+            @functools.wraps(attribute)
+            async def cached(*args, **kwargs):
+                key = self._key(name, args, kwargs)
+                hit, value = self.cache.get(key)
+                if not hit:
+                    value = await attribute(*args, **kwargs)
+                    self.cache.set(key, value, ttl)
+                return value
+
+        else:
+
+            @functools.wraps(attribute)
+            def cached(*args, **kwargs):
+                key = self._key(name, args, kwargs)
+                hit, value = self.cache.get(key)
+                if not hit:
+                    value = attribute(*args, **kwargs)
+                    self.cache.set(key, value, ttl)
+                return value
+
+        return cached
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Negative caching of unreachable miners
+
+A powered off rig costs a full connect timeout every time it is polled.
+:class:`DeadHosts` remembers the hosts that just failed and makes the
+drivers fail fast with :exc:`HostDown` instead, circuit breaker style:
+
++ closed: the host is healthy, requests go through
++ open: the host failed ``threshold`` times in a row. Requests fail with
+  :exc:`HostDown` until its retry delay has passed. The delay doubles with
+  every further failure, up to ``max_delay``.
++ half-open: the delay has passed. One request is let through as a probe
+  while the others keep failing fast. Success closes the circuit, failure
+  opens it again.
+
+Share one registry between all the drivers of a process, e.g.
+:data:`default_registry`, and pass it as their ``dead_hosts`` argument.
+"""
+
+import contextlib
+import threading
+import time
+
+
+class HostDown(ConnectionError):
+    """Raised instead of contacting a host that recently failed"""
+
+
+class _Circuit(object):
+    __slots__ = ("failures", "retry_at", "probing", "error")
+
+    def __init__(self):
+        self.failures = 0
+        self.retry_at = 0.0
+        #: float or None: Start of the half-open probe in flight
+        self.probing = None
+        self.error = None
+
+
+class DeadHosts(object):
+    """Registry of hosts that recently failed, shared between drivers
+
+    Thread safe. The asyncio drivers can share it with blocking ones.
+
+    Parameters
+    ----------
+    base_delay : float
+        Seconds a host is skipped after failing ``threshold`` times. Also
+        the time after which a probe that never reported back is given up.
+    max_delay : float
+        Longest delay, reached by doubling ``base_delay`` on every failure
+    threshold : int
+        Consecutive failures before a host is skipped
+    clock : callable
+        Returns the current time in seconds
+    """
+
+    def __init__(
+        self,
+        base_delay=5.0,
+        max_delay=300.0,
+        threshold=1,
+        clock=time.monotonic,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.threshold = threshold
+        self.clock = clock
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._circuits)
+
+    def __contains__(self, host):
+        return self.is_down(host)
+
+    def is_down(self, host):
+        """Whether requests to the host currently fail fast"""
+        circuit = self._circuits.get(host)
+        return (
+            circuit is not None
+            and circuit.failures >= self.threshold
+            and self.clock() < circuit.retry_at
+        )
+
+    def check(self, host):
+        """Call before contacting a host
+
+        Parameters
+        ----------
+        host : tuple
+            ``(ip, port)`` of the host, ip as a str
+
+        Raises
+        ------
+        HostDown
+            The circuit of the host is open, or half-open with a probe
+            already in flight
+        """
+        circuit = self._circuits.get(host)
+        if circuit is None or circuit.failures < self.threshold:
+            return
+        now = self.clock()
+        with self._lock:
+            if now >= circuit.retry_at and (
+                circuit.probing is None
+                or now - circuit.probing >= self.base_delay
+            ):
+                circuit.probing = now
+                return
+        raise HostDown(
+            "{}:{} is down, last error: {!r}".format(
+                host[0], host[1], circuit.error
+            )
+        )
+
+    def success(self, host):
+        """The host answered. Closes its circuit."""
+        if host in self._circuits:
+            with self._lock:
+                self._circuits.pop(host, None)
+
+    def failure(self, host, error=None):
+        """The host could not be reached or timed out"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = self._circuits[host] = _Circuit()
+            circuit.failures += 1
+            circuit.probing = None
+            circuit.error = error
+            if circuit.failures >= self.threshold:
+                delay = self.base_delay * 2 ** min(
+                    circuit.failures - self.threshold, 32
+                )
+                circuit.retry_at = self.clock() + min(delay, self.max_delay)
+
+    @contextlib.contextmanager
+    def attempt(self, host):
+        """Context manager around one request to a host
+
+        Checks the host, then records a success, or a failure if an
+        :exc:`OSError` (refused, reset, timed out...) is raised.
+        """
+        self.check(host)
+        try:
+            yield
+        except HostDown:
+            raise
+        except OSError as error:
+            self.failure(host, error)
+            raise
+        else:
+            self.success(host)
+
+    def clear(self):
+        """Forget every failure"""
+        with self._lock:
+            self._circuits.clear()
+
+
+class _Disabled(object):
+    """Stands in for a registry when a driver is given none"""
+
+    def check(self, host):
+        pass
+
+    def success(self, host):
+        pass
+
+    def failure(self, host, error=None):
+        pass
+
+    @contextlib.contextmanager
+    def attempt(self, host):
+        yield
+
+
+#: _Disabled: Used by the drivers when no registry is given
+DISABLED = _Disabled()
+
+#: DeadHosts: Registry shared by the drivers that opt into it
+default_registry = DeadHosts()
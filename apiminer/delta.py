@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Change detection between consecutive polls
+
+Most of a miner's :meth:`unified_data` is the same from one poll to the
+next. :class:`DeltaEncoder` compares every new document of a host with the
+previous one and only emits what changed, with a full keyframe every so
+often. :class:`DeltaDecoder` rebuilds the full documents downstream.
+
+Records are dicts:
+
++ ``{"type": "keyframe", "seq": n, "data": document}``
++ ``{"type": "delta", "seq": n, "data": changed, "removed": paths}``
+
+``changed`` holds the keys whose value changed, nested dicts only with
+their changed keys. ``removed`` lists the paths (lists of keys) that are no
+longer in the document, and is left out when empty. ``seq`` counts the
+records of a host, so a lost record is noticed.
+"""
+
+import copy
+import zlib
+
+from .snapshot import MinerSnapshot
+
+#: int: Default number of records per host between two keyframes
+DEFAULT_KEYFRAME_INTERVAL = 60
+
+
+def diff(old, new, path=()):
+    """Compare two documents
+
+    Parameters
+    ----------
+    old, new : dict
+        E.g. two :meth:`unified_data` results of the same miner
+
+    Returns
+    -------
+    tuple
+        ``(changed, removed)``, see the module documentation
+    """
+    changed = {}
+    removed = []
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = value
+            continue
+        previous = old[key]
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested, gone = diff(previous, value, path + (key,))
+            if nested:
+                changed[key] = nested
+            removed.extend(gone)
+        elif value != previous:
+            changed[key] = value
+    for key in old:
+        if key not in new:
+            removed.append(list(path + (key,)))
+    return changed, removed
+
+
+def patch(document, changed, removed=()):
+    """Apply the changes found by :func:`diff` to a document, in place
+
+    Returns
+    -------
+    dict
+        The patched document
+    """
+    for key, value in changed.items():
+        target = document.get(key)
+        if isinstance(value, dict) and isinstance(target, dict):
+            patch(target, value)
+        else:
+            document[key] = copy.deepcopy(value)
+    for path in removed:
+        parent = document
+        for key in path[:-1]:
+            parent = parent[key]
+        del parent[path[-1]]
+    return document
+
+
+class DeltaEncoder(object):
+    """Turns consecutive documents of many hosts into delta records
+
+    Parameters
+    ----------
+    keyframe_interval : int
+        Most records per host between two keyframes. The first record of a
+        host is always a keyframe. The second keyframe of each host comes
+        after a hash-based share of the interval, so hosts first seen on the
+        same poll do not all send their keyframes on the same poll again.
+    """
+
+    def __init__(self, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.keyframe_interval = keyframe_interval
+
+        #: dict: Host mapped to its last document, sequence number and
+        #: records left until its next keyframe
+        self._hosts = {}
+
+    def reset(self, key=None):
+        """Forget a host, or every host, so its next record is a keyframe"""
+        if key is None:
+            self._hosts.clear()
+        else:
+            self._hosts.pop(key, None)
+
+    def encode(self, key, document):
+        """Encode the latest document of a host
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the host, e.g. ``(ip, port)``
+        document : dict or apiminer.snapshot.MinerSnapshot
+            The host's latest :meth:`unified_data` or snapshot
+
+        Returns
+        -------
+        dict or None
+            A record, or None if nothing changed since the previous one
+        """
+        if isinstance(document, MinerSnapshot):
+            document = document.to_dict()
+        state = self._hosts.get(key)
+
+        if state is None:
+            offset = zlib.crc32(repr(key).encode("utf-8"))
+            spread = (self.keyframe_interval + 1) // 2
+            countdown = self.keyframe_interval - offset % spread
+            record = {"type": "keyframe", "seq": 0, "data": document}
+        elif state[2] <= 1:
+            countdown = self.keyframe_interval
+            record = {
+                "type": "keyframe",
+                "seq": state[1] + 1,
+                "data": document,
+            }
+        else:
+            countdown = state[2] - 1
+            changed, removed = diff(state[0], document)
+            if not changed and not removed:
+                self._hosts[key] = (document, state[1], countdown)
+                return None
+            record = {"type": "delta", "seq": state[1] + 1, "data": changed}
+            if removed:
+                record["removed"] = removed
+
+        self._hosts[key] = (document, record["seq"], countdown)
+        return record
+
+
+class DeltaDecoder(object):
+    """Rebuilds full documents from the records of a :class:`DeltaEncoder`"""
+
+    def __init__(self):
+        #: dict: Host mapped to its current document and sequence number
+        self._hosts = {}
+
+    def decode(self, key, record):
+        """Apply a record of a host
+
+        Returns
+        -------
+        dict
+            The host's full document. Do not modify it; the next records
+            are applied to it.
+
+        Raises
+        ------
+        ValueError
+            A delta arrived without the keyframe or the records before it.
+            Decoding resumes at the host's next keyframe.
+        """
+        if record["type"] == "keyframe":
+            document = copy.deepcopy(record["data"])
+        else:
+            state = self._hosts.get(key)
+            if state is None or state[1] != record["seq"] - 1:
+                self._hosts.pop(key, None)
+                raise ValueError(
+                    "Delta {} of {!r} does not follow the previous "
+                    "record".format(record["seq"], key)
+                )
+            document = patch(
+                state[0], record["data"], record.get("removed", ())
+            )
+        self._hosts[key] = (document, record["seq"])
+        return document
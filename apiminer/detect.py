@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Protocol detection of miner APIs
+
+An inventory of addresses does not say which driver speaks to each miner.
+:func:`adetect` sends a host one cheap request per protocol until one is
+answered, starting with the protocol its port suggests (see
+:data:`PORT_HINTS`):
+
++ ``miner_getstat1``: ClaymoreRPC. Ethminer also answers
+  ``miner_getstathr``.
++ ``version``: SGMiner, or TeamRedMiner if it says so
++ ``GET /1/summary``: XMRig
++ ``GET /api.json``: XMR-Stak
+
+A :class:`DetectionCache` keeps the answers in a JSON file, so the next
+start only probes the hosts it does not know yet.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .fleet import DRIVERS
+from .framing import FrameReader
+from .timeouts import DEFAULT_TIMEOUT, split_timeout
+
+#: tuple: Protocol families probed, in the default order
+PROBES = ("claymore", "sgminer", "xmrig", "xmrstak")
+
+#: dict: Default API ports and the protocol probed first on them
+PORT_HINTS = {
+    3333: "claymore",
+    3334: "claymore",
+    4028: "sgminer",
+    80: "xmrig",
+    8080: "xmrig",
+    420: "xmrstak",
+}
+
+#: int: Largest response read by a probe, in bytes
+MAX_RESPONSE = 256 << 10
+
+
+class _Mismatch(Exception):
+    """The host does not speak the protocol probed"""
+
+
+async def _exchange(ip, port, request, timeout, read):
+    """Send a request on a new connection and read the answer
+
+    Connection failures are raised as they are. Anything going wrong once
+    connected means the host does not speak the protocol.
+    """
+    connect_timeout, read_timeout = split_timeout(timeout)
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(ip, port), connect_timeout
+    )
+    try:
+        writer.write(request)
+        await writer.drain()
+        return await asyncio.wait_for(read(reader), read_timeout)
+    except (OSError, ValueError, EOFError, asyncio.TimeoutError) as error:
+        raise _Mismatch(error)
+    finally:
+        writer.close()
+
+
+async def _read_json(reader):
+    message = await FrameReader(max_size=MAX_RESPONSE).read_stream(reader)
+    if not isinstance(message, dict):
+        raise ValueError("Not a JSON object")
+    return message
+
+
+async def _read_http(reader):
+    status = (await reader.readline()).decode("latin-1").split()
+    if len(status) < 2 or not status[0].startswith("HTTP/"):
+        raise ValueError("Not an HTTP response")
+    length = None
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    if length is None:
+        body = await reader.read(MAX_RESPONSE)
+    elif length > MAX_RESPONSE:
+        raise ValueError("Response too large")
+    else:
+        body = await reader.readexactly(length)
+    try:
+        message = json.loads(body.decode("utf-8"))
+    except ValueError:
+        message = None
+    return int(status[1]), message
+
+
+def _jsonrpc(method):
+    query = {"id": 0, "jsonrpc": "2.0", "method": method}
+    return (json.dumps(query) + "\n").encode("utf-8")
+
+
+def _get(ip, port, path):
+    return (
+        "GET {} HTTP/1.1\r\nHost: {}:{}\r\nAccept: application/json\r\n"
+        "Connection: close\r\n\r\n".format(path, ip, port)
+    ).encode("latin-1")
+
+
+async def _probe_claymore(ip, port, timeout):
+    message = await _exchange(
+        ip, port, _jsonrpc("miner_getstat1"), timeout, _read_json
+    )
+    if not isinstance(message.get("result"), list):
+        raise _Mismatch(message)
+    try:
+        message = await _exchange(
+            ip, port, _jsonrpc("miner_getstathr"), timeout, _read_json
+        )
+    except _Mismatch:
+        return "claymore"
+    return "ethminer" if message.get("result") else "claymore"
+
+
+async def _probe_sgminer(ip, port, timeout):
+    query = (json.dumps({"command": "version"}) + "\n").encode("utf-8")
+    message = await _exchange(ip, port, query, timeout, _read_json)
+    if not isinstance(message.get("STATUS"), list):
+        raise _Mismatch(message)
+    if "teamredminer" in json.dumps(message).lower():
+        return "teamredminer"
+    return "sgminer"
+
+
+async def _probe_xmrig(ip, port, timeout):
+    status, message = await _exchange(
+        ip, port, _get(ip, port, "/1/summary"), timeout, _read_http
+    )
+    # A restricted API still tells who it is by refusing the request
+    if status in (401, 403):
+        return "xmrig"
+    if status == 200 and isinstance(message, dict) and "algo" in message:
+        return "xmrig"
+    raise _Mismatch(status)
+
+
+async def _probe_xmrstak(ip, port, timeout):
+    status, message = await _exchange(
+        ip, port, _get(ip, port, "/api.json"), timeout, _read_http
+    )
+    if (
+        status == 200
+        and isinstance(message, dict)
+        and "hashrate" in message
+        and "connection" in message
+    ):
+        return "xmrstak"
+    raise _Mismatch(status)
+
+
+_PROBES = {
+    "claymore": _probe_claymore,
+    "sgminer": _probe_sgminer,
+    "xmrig": _probe_xmrig,
+    "xmrstak": _probe_xmrstak,
+}
+
+
+def probe_order(port):
+    """Protocol families in the order they are probed on a port"""
+    hint = PORT_HINTS.get(int(port))
+    if hint is None:
+        return PROBES
+    return (hint,) + tuple(probe for probe in PROBES if probe != hint)
+
+
+async def adetect(ip, port, timeout=DEFAULT_TIMEOUT):
+    """Find out which driver speaks to a host
+
+    Parameters
+    ----------
+    ip : str
+        IP address of the api host
+    port : int
+        The port on which the api is listening
+    timeout : float or tuple
+        Connect and read timeout of each probe, see
+        :func:`apiminer.timeouts.split_timeout`
+
+    Returns
+    -------
+    str or None
+        A key of :data:`apiminer.fleet.DRIVERS`, or None if the host could
+        not be reached or no protocol was recognized
+    """
+    for probe in probe_order(port):
+        try:
+            return await _PROBES[probe](ip, int(port), timeout)
+        except _Mismatch:
+            continue
+        except (OSError, asyncio.TimeoutError):
+            # Nothing listens there. No other protocol will do better.
+            return None
+    return None
+
+
+class DetectionCache(object):
+    """Detected drivers, kept in a JSON file between runs
+
+    Hosts where nothing was recognized are remembered too, for a shorter
+    time. Safe to share between threads.
+
+    Parameters
+    ----------
+    path : str or None
+        JSON file loaded now and written by :meth:`save`. None keeps the
+        cache in memory only.
+    ttl : float
+        Seconds a detected driver is trusted
+    negative_ttl : float
+        Seconds a host where nothing was recognized is not probed again
+    clock : callable
+        Returns the current time in seconds, as a Unix timestamp since the
+        entries outlive the process
+    """
+
+    def __init__(
+        self, path=None, ttl=7 * 86400, negative_ttl=3600, clock=time.time
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        #: dict: ``"ip:port"`` mapped to ``[driver or None, expiry]``
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path is not None:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(ip, port):
+        return "{}:{}".format(ip, int(port))
+
+    def load(self):
+        """Read :attr:`path`. A missing or unreadable file is ignored."""
+        try:
+            with open(self.path, "r") as stream:
+                hosts = json.load(stream)["hosts"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        now = self.clock()
+        with self._lock:
+            for key, (driver, expiry) in hosts.items():
+                if expiry > now and (driver is None or driver in DRIVERS):
+                    self._entries[key] = [driver, expiry]
+
+    def get(self, ip, port):
+        """Look up the driver of a host
+
+        Returns
+        -------
+        tuple
+            (True, driver name or None) if known, (False, None) otherwise
+        """
+        key = self._key(ip, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > self.clock():
+                    return True, entry[0]
+                del self._entries[key]
+                self._dirty = True
+        return False, None
+
+    def set(self, ip, port, driver):
+        """Remember the driver of a host, None if nothing was recognized"""
+        ttl = self.ttl if driver is not None else self.negative_ttl
+        with self._lock:
+            self._entries[self._key(ip, port)] = [driver, self.clock() + ttl]
+            self._dirty = True
+
+    def invalidate(self, ip=None, port=None):
+        """Forget one host, or every host if ip is None"""
+        with self._lock:
+            if ip is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(ip, port), None)
+            self._dirty = True
+
+    def save(self):
+        """Write the cache to :attr:`path` if it changed
+
+        The file is replaced atomically, so a crash never leaves it half
+        written.
+        """
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            document = {"version": 1, "hosts": dict(self._entries)}
+            self._dirty = False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w") as stream:
+                json.dump(document, stream, sort_keys=True)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+async def adetect_many(
+    hosts, concurrency=256, timeout=DEFAULT_TIMEOUT, cache=None
+):
+    """Detect the driver of many hosts concurrently
+
+    Parameters
+    ----------
+    hosts : iterable of tuple
+        ``(ip, port)`` of every host
+    concurrency : int
+        Hosts probed at the same time
+    timeout : float or tuple
+        See :func:`adetect`
+    cache : DetectionCache or None
+        Hosts found in the cache are not probed. The others are stored in
+        it; call :meth:`DetectionCache.save` to keep them.
+
+    Returns
+    -------
+    dict
+        ``(ip, port)`` mapped to a driver name, or None
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    async def detect_one(ip, port):
+        if cache is not None:
+            found, driver = cache.get(ip, port)
+            if found:
+                results[(ip, port)] = driver
+                return
+        async with semaphore:
+            driver = await adetect(ip, port, timeout)
+        results[(ip, port)] = driver
+        if cache is not None:
+            cache.set(ip, port, driver)
+
+    await asyncio.gather(
+        *[detect_one(str(ip), int(port)) for ip, port in hosts]
+    )
+    return results
+
+
+def detect_inventory(
+    hosts, concurrency=256, timeout=DEFAULT_TIMEOUT, cache=None
+):
+    """Build a :class:`apiminer.fleet.Fleet` inventory from bare addresses
+
+    Blocking version of :func:`adetect_many`. Saves the cache when done.
+
+    Returns
+    -------
+    list of tuple
+        ``(driver, ip, port)`` of every host whose driver was detected, in
+        the order given
+    """
+    hosts = [(str(ip), int(port)) for ip, port in hosts]
+    loop = asyncio.new_event_loop()
+    try:
+        drivers = loop.run_until_complete(
+            adetect_many(hosts, concurrency, timeout, cache)
+        )
+    finally:
+        loop.close()
+    if cache is not None:
+        cache.save()
+    return [
+        (drivers[(ip, port)], ip, port)
+        for ip, port in hosts
+        if drivers[(ip, port)] is not None
+    ]
+
+
+def detect(ip, port, timeout=DEFAULT_TIMEOUT, cache=None, **kwargs):
+    """Detect the driver of a host and create it
+
+    Parameters
+    ----------
+    ip : str
+        IP address of the api host
+    port : int
+        The port on which the api is listening
+    timeout : float or tuple
+        See :func:`adetect`. Also passed to the driver.
+    cache : DetectionCache or None
+        Consulted before probing, updated and saved after
+    **kwargs
+        Passed to the driver class
+
+    Returns
+    -------
+    object or None
+        An instance of the detected driver class, or None
+    """
+    found, driver = (False, None) if cache is None else cache.get(ip, port)
+    if not found:
+        loop = asyncio.new_event_loop()
+        try:
+            driver = loop.run_until_complete(adetect(ip, port, timeout))
+        finally:
+            loop.close()
+        if cache is not None:
+            cache.set(ip, port, driver)
+            cache.save()
+    if driver is None:
+        return None
+    return DRIVERS[driver](ip, int(port), timeout=timeout, **kwargs)
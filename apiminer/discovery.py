@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Discovery of the miners of a network
+
+:func:`adiscover` scans whole subnets for open API ports with concurrent
+asyncio connects, optionally rate limited, then identifies the protocol of
+every open port with :func:`apiminer.detect.adetect_many`. The result is an
+inventory for :class:`apiminer.fleet.Fleet`, which :func:`write_inventory`
+saves in the format :func:`apiminer.fleet.load_inventory` reads.
+
+Run ``python -m apiminer.discovery 10.0.0.0/16 -o inventory.txt`` to scan
+from the command line.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import itertools
+import sys
+import time
+
+from .detect import DetectionCache, PORT_HINTS, adetect_many
+from .timeouts import DEFAULT_TIMEOUT
+
+#: tuple: Ports scanned by default, the usual API ports of every driver
+DEFAULT_PORTS = tuple(sorted(PORT_HINTS))
+
+#: float: Seconds allowed for a connect while scanning. Miners on the same
+#: network answer within milliseconds, so absent hosts are given up early.
+SCAN_TIMEOUT = 0.5
+
+
+def iter_targets(networks, ports=DEFAULT_PORTS):
+    """Every ``(ip, port)`` of some networks, one network at a time
+
+    Parameters
+    ----------
+    networks : iterable of str
+        Networks in CIDR notation, e.g. ``"10.0.0.0/16"``, or single
+        addresses
+    ports : iterable of int
+        Ports tried on every address
+
+    Yields
+    ------
+    tuple
+        ``(ip, port)``, ip as a str
+    """
+    ports = [int(port) for port in ports]
+    for network in networks:
+        network = ipaddress.ip_network(str(network), strict=False)
+        if network.num_addresses == 1:
+            addresses = [network.network_address]
+        else:
+            addresses = network.hosts()
+        for address in addresses:
+            for port in ports:
+                yield str(address), port
+
+
+class _RateLimiter(object):
+    """Spaces out events to at most ``rate`` per second"""
+
+    def __init__(self, rate, clock=time.monotonic):
+        self.interval = 1.0 / rate
+        self.clock = clock
+        self._next = clock()
+
+    async def wait(self):
+        now = self.clock()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class _Probe(asyncio.Protocol):
+    """Connects and does nothing else"""
+
+
+async def _is_open(loop, ip, port, timeout):
+    try:
+        transport, _ = await asyncio.wait_for(
+            loop.create_connection(_Probe, ip, port), timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    transport.close()
+    return True
+
+
+async def ascan(
+    targets, concurrency=512, rate=None, timeout=SCAN_TIMEOUT, progress=None
+):
+    """Find the open ports among many targets
+
+    Parameters
+    ----------
+    targets : iterable of tuple
+        ``(ip, port)`` to try, e.g. from :func:`iter_targets`. Consumed
+        lazily, so a /16 is never held in memory.
+    concurrency : int
+        Connects in flight at the same time. Each uses a file descriptor.
+    rate : float or None
+        Most connects started per second, None for no limit
+    timeout : float
+        Seconds allowed for each connect
+    progress : callable or None
+        Called with ``(ip, port)`` of every open port as it is found
+
+    Returns
+    -------
+    list of tuple
+        ``(ip, port)`` of the open ports, sorted by address and port
+    """
+    loop = asyncio.get_event_loop()
+    targets = iter(targets)
+    limiter = None if rate is None else _RateLimiter(rate)
+    found = []
+
+    async def worker():
+        # A fixed pool of workers pulling from the shared iterator keeps
+        # the number of pending tasks at ``concurrency``
+        for ip, port in targets:
+            if limiter is not None:
+                await limiter.wait()
+            if await _is_open(loop, ip, port, timeout):
+                found.append((ip, port))
+                if progress is not None:
+                    progress(ip, port)
+
+    await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    found.sort(key=lambda target: (ipaddress.ip_address(target[0]), target[1]))
+    return found
+
+
+async def adiscover(
+    networks,
+    ports=DEFAULT_PORTS,
+    concurrency=512,
+    rate=None,
+    timeout=SCAN_TIMEOUT,
+    detect_timeout=DEFAULT_TIMEOUT,
+    cache=None,
+    progress=None,
+):
+    """Scan networks and detect the driver of every open port
+
+    Parameters
+    ----------
+    networks : iterable of str
+        See :func:`iter_targets`
+    ports : iterable of int
+        See :func:`iter_targets`
+    concurrency, rate, timeout, progress
+        See :func:`ascan`. ``concurrency`` also bounds the detection.
+    detect_timeout : float or tuple
+        Connect and read timeout of the detection probes
+    cache : apiminer.detect.DetectionCache or None
+        See :func:`apiminer.detect.adetect_many`
+
+    Returns
+    -------
+    list of tuple
+        ``(driver, ip, port)`` of every miner found, as accepted by
+        :class:`apiminer.fleet.Fleet`
+    """
+    found = await ascan(
+        iter_targets(networks, ports), concurrency, rate, timeout, progress
+    )
+    drivers = await adetect_many(found, concurrency, detect_timeout, cache)
+    return [
+        (drivers[(ip, port)], ip, port)
+        for ip, port in found
+        if drivers[(ip, port)] is not None
+    ]
+
+
+def discover(networks, ports=DEFAULT_PORTS, **kwargs):
+    """Blocking version of :func:`adiscover`
+
+    Saves the detection cache when done.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        inventory = loop.run_until_complete(
+            adiscover(networks, ports, **kwargs)
+        )
+    finally:
+        loop.close()
+    if kwargs.get("cache") is not None:
+        kwargs["cache"].save()
+    return inventory
+
+
+def write_inventory(inventory, stream):
+    """Write an inventory, one ``driver ip port`` line per miner
+
+    The lines are aligned, and read back by
+    :func:`apiminer.fleet.load_inventory`.
+    """
+    for driver, ip, port in inventory:
+        stream.write("{:<12} {:<15} {}\n".format(driver, ip, port))
+
+
+def _ports(text):
+    try:
+        return [int(port) for port in text.split(",") if port.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected ports like 3333,4028")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m apiminer.discovery",
+        description="Find the miners of your networks and write an "
+        "inventory",
+    )
+    parser.add_argument(
+        "networks", nargs="+", help="Networks to scan, e.g. 10.0.0.0/16"
+    )
+    parser.add_argument(
+        "-p",
+        "--ports",
+        type=_ports,
+        default=list(DEFAULT_PORTS),
+        help="Comma separated ports (default: {})".format(
+            ",".join(map(str, DEFAULT_PORTS))
+        ),
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("w"),
+        default="-",
+        help="Inventory file to write (default: stdout)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=512,
+        help="Connects in flight (default: 512)",
+    )
+    parser.add_argument(
+        "--rate", type=float, help="Most connects per second (default: none)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=SCAN_TIMEOUT,
+        help="Seconds allowed per connect (default: {})".format(SCAN_TIMEOUT),
+    )
+    parser.add_argument(
+        "--detect-timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds allowed per protocol probe of an open port "
+        "(default: {})".format(DEFAULT_TIMEOUT),
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="FILE",
+        help="Keep detected protocols in FILE for the next scan",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        targets = sum(
+            ipaddress.ip_network(network, strict=False).num_addresses
+            for network in args.networks
+        ) * len(args.ports)
+    except ValueError as error:
+        parser.error(str(error))
+    print(
+        "Scanning up to {} addresses and ports".format(targets),
+        file=sys.stderr,
+    )
+    counter = itertools.count(1)
+
+    def progress(ip, port):
+        print(
+            "{} open: {}:{}".format(next(counter), ip, port), file=sys.stderr
+        )
+
+    inventory = discover(
+        args.networks,
+        args.ports,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        timeout=args.timeout,
+        detect_timeout=args.detect_timeout,
+        cache=DetectionCache(args.cache) if args.cache else None,
+        progress=progress,
+    )
+    write_inventory(inventory, args.output)
+    if args.output is not sys.stdout:
+        args.output.close()
+    print("Found {} miners".format(len(inventory)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
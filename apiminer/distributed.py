@@ -0,0 +1,643 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Poll a farm from several nodes
+
+Farms split across sites are polled by several :class:`PollerNode`
+processes, each near its miners, reporting to one coordinator:
+
++ :class:`Coordinator` divides the inventory between the nodes that sent a
+  heartbeat recently, with a :class:`HashRing`. When a node joins or stops
+  sending heartbeats, only the miners of that node move.
++ :class:`Aggregator` merges the results of every node into one view of
+  the farm. Nodes send :mod:`apiminer.delta` records of normalized
+  snapshots, so a poll of a stable miner costs a few bytes.
++ :class:`CoordinatorServer` serves both over HTTP: ``POST /heartbeat``,
+  ``POST /results``, ``GET /snapshots`` and ``GET /nodes``.
+
+Run ``python -m apiminer.distributed coordinator inventory.txt`` on one
+host and ``python -m apiminer.distributed node NAME http://HOST:9360`` on
+every poller.
+"""
+
+import argparse
+import bisect
+import gzip
+import hashlib
+import http.server
+import json
+import logging
+import sys
+import threading
+import time
+
+import requests
+
+from .delta import DeltaDecoder, DeltaEncoder
+from .fleet import Fleet, load_inventory
+from .httpserver import ThreadingHTTPServer
+from .session import make_session
+from .snapshot import MinerSnapshot
+
+logger = logging.getLogger(__name__)
+
+#: int: Default port of the coordinator
+DEFAULT_PORT = 9360
+
+#: int: Request bodies larger than this are sent gzip compressed
+COMPRESS_ABOVE = 1024
+
+
+def _host(ip, port):
+    return "{}:{}".format(ip, port)
+
+
+def _key(host):
+    ip, port = host.rsplit(":", 1)
+    return ip, int(port)
+
+
+class HashRing(object):
+    """Consistent hashing of hosts onto nodes
+
+    Every node is placed on the ring ``replicas`` times, so the hosts are
+    spread evenly and a node leaving hands its hosts to all the others.
+
+    Parameters
+    ----------
+    nodes : iterable of str
+        Initial node names
+    replicas : int
+        Points of each node on the ring
+    """
+
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._hashes = []
+        self._nodes = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(text):
+        digest = hashlib.md5(text.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def __len__(self):
+        return len(set(self._nodes))
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    @property
+    def nodes(self):
+        """set of str: Nodes on the ring"""
+        return set(self._nodes)
+
+    def add(self, node):
+        """Place a node on the ring"""
+        if node in self._nodes:
+            return
+        for replica in range(self.replicas):
+            point = self._hash("{}#{}".format(node, replica))
+            index = bisect.bisect(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node):
+        """Take a node off the ring"""
+        kept = [
+            (point, owner)
+            for point, owner in zip(self._hashes, self._nodes)
+            if owner != node
+        ]
+        self._hashes = [point for point, _ in kept]
+        self._nodes = [owner for _, owner in kept]
+
+    def node_for(self, host):
+        """The node owning a host, None if the ring is empty
+
+        Parameters
+        ----------
+        host : str
+            E.g. ``"192.168.0.2:3333"``
+        """
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, self._hash(host))
+        return self._nodes[index % len(self._nodes)]
+
+
+class Coordinator(object):
+    """Divides an inventory between the live poller nodes
+
+    Safe to share between threads.
+
+    Parameters
+    ----------
+    inventory : iterable of tuple
+        ``(driver, ip, port)`` entries with driver names, see
+        :func:`apiminer.fleet.load_inventory`
+    heartbeat_timeout : float
+        Seconds after its last heartbeat a node is considered gone and its
+        miners are handed to the others
+    replicas : int
+        See :class:`HashRing`
+    clock : callable
+        Returns the current time in seconds
+    """
+
+    def __init__(
+        self,
+        inventory=(),
+        heartbeat_timeout=30.0,
+        replicas=100,
+        clock=time.monotonic,
+    ):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.clock = clock
+        self.ring = HashRing(replicas=replicas)
+
+        #: dict: Node name mapped to the time of its last heartbeat
+        self.last_seen = {}
+
+        #: int: Incremented whenever the assignment of miners changes
+        self.epoch = 0
+
+        self._inventory = {}
+        self._assignments = None
+        self._lock = threading.Lock()
+        self.set_inventory(inventory)
+
+    def set_inventory(self, inventory):
+        """Replace the inventory. The nodes pick it up on their next
+        heartbeat."""
+        with self._lock:
+            self._inventory = {
+                _host(ip, port): (driver, ip, int(port))
+                for driver, ip, port in inventory
+            }
+            self._changed()
+
+    def _changed(self):
+        self.epoch += 1
+        self._assignments = None
+
+    def expire(self, now=None):
+        """Drop the nodes that missed their heartbeats
+
+        Returns
+        -------
+        list of str
+            The nodes dropped
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            expired = [
+                node
+                for node, seen in self.last_seen.items()
+                if now - seen > self.heartbeat_timeout
+            ]
+            for node in expired:
+                del self.last_seen[node]
+                self.ring.remove(node)
+            if expired:
+                self._changed()
+        return expired
+
+    def heartbeat(self, node, now=None):
+        """Record that a node is alive, adding it to the ring if new
+
+        Returns
+        -------
+        int
+            The current :attr:`epoch`
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            self.last_seen[node] = now
+            if node not in self.ring:
+                self.ring.add(node)
+                self._changed()
+            return self.epoch
+
+    def assignment(self, node):
+        """The ``(driver, ip, port)`` entries a node polls"""
+        with self._lock:
+            if self._assignments is None:
+                assignments = {}
+                for host, entry in sorted(self._inventory.items()):
+                    owner = self.ring.node_for(host)
+                    assignments.setdefault(owner, []).append(entry)
+                self._assignments = assignments
+            return list(self._assignments.get(node, ()))
+
+
+class Aggregator(object):
+    """Merges the results of every poller node
+
+    Safe to share between threads.
+    """
+
+    def __init__(self):
+        #: dict: ``"ip:port"`` mapped to ``{"node", "time", "data"}`` of the
+        #: last result of the miner, ``"error"`` instead of ``"data"`` if its
+        #: last poll failed
+        self.hosts = {}
+
+        #: dict: A :class:`apiminer.delta.DeltaDecoder` per node
+        self._decoders = {}
+        self._lock = threading.Lock()
+
+    def merge(self, node, records, timestamp=None):
+        """Apply the records a node sent
+
+        Parameters
+        ----------
+        node : str
+            Name of the node
+        records : list of dict
+            :mod:`apiminer.delta` records with a ``"host"`` member, or
+            ``{"host", "type": "error", "error"}`` for failed polls
+        timestamp : float or None
+            Time of the poll, defaults to now
+
+        Returns
+        -------
+        list of str
+            Hosts whose delta did not follow the previous record. The node
+            must send a keyframe for them next.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        resync = []
+        with self._lock:
+            decoder = self._decoders.setdefault(node, DeltaDecoder())
+            for record in records:
+                host = record["host"]
+                entry = {"node": node, "time": timestamp}
+                if record["type"] == "error":
+                    entry["error"] = record["error"]
+                else:
+                    try:
+                        entry["data"] = decoder.decode(host, record)
+                    except ValueError:
+                        resync.append(host)
+                        continue
+                self.hosts[host] = entry
+        return resync
+
+    def forget(self, node):
+        """Drop the decoding state of a node that left"""
+        with self._lock:
+            self._decoders.pop(node, None)
+
+    def state(self):
+        """JSON serializable copy of :attr:`hosts`"""
+        with self._lock:
+            return json.loads(json.dumps(self.hosts))
+
+    def snapshots(self):
+        """The last successful result of every miner
+
+        Returns
+        -------
+        dict
+            ``(ip, port)`` mapped to a normalized
+            :class:`apiminer.snapshot.MinerSnapshot`
+        """
+        with self._lock:
+            return {
+                _key(host): MinerSnapshot.from_dict(entry["data"], True)
+                for host, entry in self.hosts.items()
+                if "data" in entry
+            }
+
+
+class CoordinatorServer(object):
+    """Serves a :class:`Coordinator` and an :class:`Aggregator` over HTTP
+
+    Parameters
+    ----------
+    coordinator : Coordinator
+    aggregator : Aggregator or None
+        Created if None
+    address : tuple
+        ``(host, port)`` the HTTP server listens on
+    """
+
+    def __init__(
+        self, coordinator, aggregator=None, address=("", DEFAULT_PORT)
+    ):
+        self.coordinator = coordinator
+        self.aggregator = Aggregator() if aggregator is None else aggregator
+        self.address = address
+        self.server = None
+        self._thread = None
+
+    def _expire(self):
+        for node in self.coordinator.expire():
+            self.aggregator.forget(node)
+
+    def heartbeat(self, request):
+        """Answer a heartbeat: the epoch, and the node's miners if its
+        epoch is out of date"""
+        self._expire()
+        node = request["node"]
+        epoch = self.coordinator.heartbeat(node)
+        reply = {"epoch": epoch}
+        if request.get("epoch") != epoch:
+            reply["inventory"] = self.coordinator.assignment(node)
+        return reply
+
+    def results(self, request):
+        resync = self.aggregator.merge(
+            request["node"], request["records"], request.get("time")
+        )
+        return {"resync": resync}
+
+    def nodes(self):
+        """The live nodes mapped to their number of miners"""
+        self._expire()
+        return {
+            node: len(self.coordinator.assignment(node))
+            for node in sorted(self.coordinator.last_seen)
+        }
+
+    def start(self):
+        """Serve in a background thread
+
+        Returns
+        -------
+        tuple
+            The ``(host, port)`` the server listens on
+        """
+        self.server = ThreadingHTTPServer(self.address, _CoordinatorHandler)
+        self.server.coordinator = self
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="apiminer-coordinator"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        return self.server.server_address
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self._thread.join()
+            self.server = None
+
+
+class _CoordinatorHandler(http.server.BaseHTTPRequestHandler):
+    """Routes the requests of the server's :class:`CoordinatorServer`"""
+
+    def _reply(self, status, message):
+        body = json.dumps(message).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if len(body) > COMPRESS_ABOVE and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        ):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        hub = self.server.coordinator
+        if self.path == "/snapshots":
+            self._reply(200, hub.aggregator.state())
+        elif self.path == "/nodes":
+            self._reply(200, hub.nodes())
+        else:
+            self._reply(404, {"error": "Not Found"})
+
+    def do_POST(self):
+        hub = self.server.coordinator
+        routes = {"/heartbeat": hub.heartbeat, "/results": hub.results}
+        if self.path not in routes:
+            self._reply(404, {"error": "Not Found"})
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            request = json.loads(body.decode("utf-8"))
+            reply = routes[self.path](request)
+        except (ValueError, KeyError, TypeError, OSError) as error:
+            self._reply(400, {"error": repr(error)})
+            return
+        self._reply(200, reply)
+
+    def log_message(self, *args):
+        pass
+
+
+class PollerNode(object):
+    """Polls the miners a coordinator assigns and reports the results
+
+    Parameters
+    ----------
+    name : str
+        Unique name of the node
+    url : str
+        Base URL of the :class:`CoordinatorServer`, e.g.
+        ``"http://10.0.0.1:9360"``
+    interval : float
+        Seconds between the start of two polls. Keep it well below the
+        coordinator's ``heartbeat_timeout``.
+    keyframe_interval : int
+        See :class:`apiminer.delta.DeltaEncoder`
+    session : requests.Session or None
+        Session used to talk to the coordinator
+    **kwargs
+        Passed to :class:`apiminer.fleet.Fleet`
+    """
+
+    def __init__(
+        self,
+        name,
+        url,
+        interval=10.0,
+        keyframe_interval=60,
+        session=None,
+        **kwargs
+    ):
+        self.name = name
+        self.url = url.rstrip("/")
+        self.interval = interval
+        self.session = make_session() if session is None else session
+        self.timeout = kwargs.get("timeout", 5.0)
+        self.fleet = Fleet(**kwargs)
+        self.encoder = DeltaEncoder(keyframe_interval)
+
+        #: int or None: Epoch of the assignment being polled
+        self.epoch = None
+
+        self._stopped = threading.Event()
+
+    def _post(self, path, message):
+        body = json.dumps(message).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if len(body) > COMPRESS_ABOVE:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        response = self.session.post(
+            self.url + path, data=body, headers=headers, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _assign(self, inventory):
+        """Switch the fleet to a new list of miners"""
+        assigned = {(ip, int(port)): driver for driver, ip, port in inventory}
+        for key in list(self.fleet.drivers):
+            if key not in assigned:
+                self.fleet.remove(*key)
+                self.encoder.reset(key)
+        for key, driver in assigned.items():
+            if key not in self.fleet.drivers:
+                self.fleet.add(driver, *key)
+
+    def heartbeat(self):
+        """Tell the coordinator this node is alive, and update its miners"""
+        reply = self._post(
+            "/heartbeat", {"node": self.name, "epoch": self.epoch}
+        )
+        if "inventory" in reply:
+            self._assign(reply["inventory"])
+        self.epoch = reply["epoch"]
+
+    def poll(self):
+        """Send a heartbeat, poll the miners and send the results
+
+        Returns
+        -------
+        int
+            Number of records sent
+        """
+        self.heartbeat()
+        started = time.time()
+        results = self.fleet.poll("snapshot", normalize=True)
+        records = []
+        for key, result in results.items():
+            if isinstance(result, BaseException):
+                self.encoder.reset(key)
+                record = {"type": "error", "error": repr(result)}
+            else:
+                record = self.encoder.encode(key, result)
+                if record is None:
+                    continue
+            record["host"] = _host(*key)
+            records.append(record)
+        reply = self._post(
+            "/results",
+            {"node": self.name, "time": started, "records": records},
+        )
+        for host in reply.get("resync", ()):
+            self.encoder.reset(_key(host))
+        return len(records)
+
+    def run(self):
+        """Poll every :attr:`interval` seconds until :meth:`stop`
+
+        Failures to reach the coordinator are logged as warnings, and the
+        node starts over once the coordinator is back.
+        """
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except (requests.RequestException, ValueError) as error:
+                logger.warning("%s: %r", self.name, error)
+                self.epoch = None
+                self.encoder.reset()
+            self._stopped.wait(
+                max(0, started + self.interval - time.monotonic())
+            )
+
+    def stop(self):
+        self._stopped.set()
+
+    def close(self):
+        self.fleet.close()
+        self.session.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m apiminer.distributed",
+        description="Poll your farm from several nodes",
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    coordinator = commands.add_parser(
+        "coordinator", help="Assign miners to nodes and merge their results"
+    )
+    coordinator.add_argument(
+        "inventory",
+        type=argparse.FileType("r"),
+        help="File with one 'driver ip port' line per miner, - for stdin",
+    )
+    coordinator.add_argument("--host", default="", help="Address to listen on")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator.add_argument(
+        "--heartbeat-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds without heartbeat before a node's miners are "
+        "reassigned (default: 30)",
+    )
+
+    node = commands.add_parser("node", help="Poll the miners assigned")
+    node.add_argument("name", help="Unique name of this node")
+    node.add_argument("url", help="URL of the coordinator")
+    node.add_argument(
+        "--interval",
+        type=float,
+        default=10.0,
+        help="Seconds between polls (default: 10)",
+    )
+    node.add_argument("--concurrency", type=int, default=256)
+    node.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(asctime)s %(message)s")
+
+    if args.command == "coordinator":
+        with args.inventory:
+            inventory = load_inventory(args.inventory)
+        server = CoordinatorServer(
+            Coordinator(inventory, args.heartbeat_timeout),
+            address=(args.host, args.port),
+        )
+        host, port = server.start()
+        print("Coordinating on http://{}:{}".format(host or "0.0.0.0", port))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+    else:
+        poller = PollerNode(
+            args.name,
+            args.url,
+            args.interval,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            keep_alive=True,
+        )
+        try:
+            poller.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            poller.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
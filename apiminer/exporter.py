@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Prometheus exporter serving the state of a fleet
+
+:class:`Exporter` polls a :class:`apiminer.fleet.Fleet` in a background
+thread on its own schedule and serves ``/metrics`` from the latest poll, so
+a slow rig never delays a scrape. The metrics of each miner are rendered
+when its snapshot changes and reused otherwise, and the complete body
+(plain and gzipped) is reused by every scrape until the next poll.
+
+Run ``python -m apiminer.exporter inventory.txt`` to export an inventory
+file (see :func:`apiminer.fleet.load_inventory`).
+"""
+
+import argparse
+import gzip
+import http.server
+import sys
+import threading
+import time
+
+from .deadhosts import DeadHosts
+from .fleet import Fleet, DRIVERS, load_inventory
+from .httpserver import ThreadingHTTPServer
+from .timeouts import DEFAULT_TIMEOUT
+from .sharded import ShardedFleet
+
+#: int: Default port of the exporter
+DEFAULT_PORT = 9350
+
+#: str: Content type of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+#: list of tuple: Name, type and help of the metrics taken from snapshots
+SNAPSHOT_METRICS = [
+    (
+        "apiminer_hashrate_hashes_per_second",
+        "gauge",
+        "Total hashrate of the miner",
+    ),
+    ("apiminer_shares_total", "counter", "Shares found, by status"),
+    ("apiminer_uptime_seconds", "gauge", "Time the miner has been running"),
+    (
+        "apiminer_gpu_hashrate_hashes_per_second",
+        "gauge",
+        "Hashrate of a GPU",
+    ),
+    ("apiminer_gpu_temperature_celsius", "gauge", "Temperature of a GPU"),
+    ("apiminer_gpu_fan_percent", "gauge", "Fan speed of a GPU"),
+]
+
+#: list of tuple: Name, type and help of the metrics about polling
+POLL_METRICS = [
+    ("apiminer_up", "gauge", "Whether the last poll of the miner succeeded"),
+    (
+        "apiminer_poll_duration_seconds",
+        "gauge",
+        "Time the last poll of the miner took",
+    ),
+    (
+        "apiminer_poll_failures_total",
+        "counter",
+        "Polls of the miner that failed",
+    ),
+]
+
+_DRIVER_NAMES = {driver: name for name, driver in DRIVERS.items()}
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(**labels):
+    return ",".join(
+        '{}="{}"'.format(name, _escape(value))
+        for name, value in sorted(labels.items())
+    )
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def render_snapshot(labels, snapshot):
+    """Render the snapshot metrics of one miner
+
+    Parameters
+    ----------
+    labels : str
+        Rendered labels identifying the miner, see :func:`_labels`
+    snapshot : apiminer.snapshot.MinerSnapshot
+        Normalized snapshot of the miner
+
+    Returns
+    -------
+    list of str
+        Samples of each metric of :data:`SNAPSHOT_METRICS`, in order
+    """
+    hashrate, shares, uptime, gpu_hashrate, temp, fan = [], [], [], [], [], []
+    if snapshot.total_hashrate is not None:
+        hashrate.append(
+            "apiminer_hashrate_hashes_per_second{{{}}} {}\n".format(
+                labels, _number(snapshot.total_hashrate)
+            )
+        )
+    for status in ("accepted", "rejected", "invalid"):
+        count = getattr(snapshot, status)
+        if count is not None:
+            shares.append(
+                'apiminer_shares_total{{{},status="{}"}} {}\n'.format(
+                    labels, status, _number(count)
+                )
+            )
+    if isinstance(snapshot.uptime, (int, float)):
+        uptime.append(
+            "apiminer_uptime_seconds{{{}}} {}\n".format(
+                labels, _number(snapshot.uptime)
+            )
+        )
+    for samples, name, values in (
+        (gpu_hashrate, "gpu_hashrate_hashes_per_second", snapshot.hashrates),
+        (temp, "gpu_temperature_celsius", snapshot.temps),
+        (fan, "gpu_fan_percent", snapshot.fans),
+    ):
+        for gpu, value in enumerate(values):
+            if value is not None:
+                samples.append(
+                    'apiminer_{}{{{},gpu="{}"}} {}\n'.format(
+                        name, labels, gpu, _number(value)
+                    )
+                )
+    return [
+        "".join(samples)
+        for samples in (hashrate, shares, uptime, gpu_hashrate, temp, fan)
+    ]
+
+
+class Exporter(object):
+    """Polls a fleet in the background and serves its metrics
+
+    Parameters
+    ----------
+    fleet : apiminer.fleet.Fleet
+        Miners to export. The exporter's poller thread is the only user of
+        the fleet once started.
+    interval : float
+        Seconds between the start of two polls
+    address : tuple
+        ``(host, port)`` the HTTP server listens on
+    """
+
+    def __init__(self, fleet, interval=15.0, address=("", DEFAULT_PORT)):
+        self.fleet = fleet
+        self.interval = interval
+        self.address = address
+
+        #: dict: ``(ip, port)`` mapped to the failed polls of that miner
+        self.failures = {}
+
+        #: dict: ``(ip, port)`` mapped to its last snapshot and the rendered
+        #: samples of that snapshot
+        self._rendered = {}
+
+        #: bytes: Body served by ``/metrics``, replaced after every poll
+        self.body = b""
+
+        #: bytes: :attr:`body`, gzip compressed
+        self.gzipped = gzip.compress(self.body)
+
+        #: float: Time of the last poll
+        self.last_poll = None
+
+        self.server = None
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def _miner_labels(self, key):
+        driver = self.fleet.drivers[key]
+        return _labels(
+            host="{}:{}".format(*key),
+            driver=_DRIVER_NAMES.get(driver, driver.__name__),
+        )
+
+    def poll(self):
+        """Poll the fleet once and render the metrics
+
+        Returns
+        -------
+        bytes
+            The new body of ``/metrics``
+        """
+        started = time.time()
+        results = self.fleet.poll("snapshot", normalize=True)
+
+        snapshot_samples = [[] for _ in SNAPSHOT_METRICS]
+        poll_samples = [[] for _ in POLL_METRICS]
+        rendered = {}
+        for key, result in results.items():
+            labels = self._miner_labels(key)
+            failed = isinstance(result, BaseException)
+            if failed:
+                self.failures[key] = self.failures.get(key, 0) + 1
+            else:
+                previous = self._rendered.get(key)
+                if previous is not None and previous[0] == result:
+                    rendered[key] = previous
+                else:
+                    rendered[key] = (result, render_snapshot(labels, result))
+                for samples, text in zip(snapshot_samples, rendered[key][1]):
+                    samples.append(text)
+            poll_samples[0].append(
+                "apiminer_up{{{}}} {}\n".format(labels, 0 if failed else 1)
+            )
+            poll_samples[1].append(
+                "apiminer_poll_duration_seconds{{{}}} {}\n".format(
+                    labels, _number(self.fleet.latencies.get(key, 0.0))
+                )
+            )
+            poll_samples[2].append(
+                "apiminer_poll_failures_total{{{}}} {}\n".format(
+                    labels, _number(self.failures.get(key, 0))
+                )
+            )
+        self._rendered = rendered
+
+        parts = []
+        for (name, kind, help_text), samples in zip(
+            SNAPSHOT_METRICS + POLL_METRICS, snapshot_samples + poll_samples
+        ):
+            parts.append(
+                "# HELP {0} {1}\n# TYPE {0} {2}\n".format(
+                    name, help_text, kind
+                )
+            )
+            parts.extend(samples)
+        parts.append(
+            "# HELP apiminer_last_poll_timestamp_seconds "
+            "Time the last poll of the fleet started\n"
+            "# TYPE apiminer_last_poll_timestamp_seconds gauge\n"
+            "apiminer_last_poll_timestamp_seconds {}\n".format(
+                _number(started)
+            )
+        )
+        body = "".join(parts).encode("utf-8")
+        gzipped = gzip.compress(body)
+        # Swap both together so a scrape never sees a stale pair
+        self.body, self.gzipped = body, gzipped
+        self.last_poll = started
+        return body
+
+    def _poll_forever(self):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as error:
+                print("Poll failed: {!r}".format(error), file=sys.stderr)
+            self._stopped.wait(
+                max(0, started + self.interval - time.monotonic())
+            )
+
+    def start(self):
+        """Start polling and serving in background threads
+
+        Returns
+        -------
+        tuple
+            The ``(host, port)`` the server listens on
+        """
+        self.server = ThreadingHTTPServer(self.address, _MetricsHandler)
+        self.server.exporter = self
+        self._stopped.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._poll_forever, name="apiminer-exporter-poll"
+            ),
+            threading.Thread(
+                target=self.server.serve_forever,
+                name="apiminer-exporter-http",
+            ),
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+        return self.server.server_address
+
+    def stop(self):
+        """Stop polling and serving, and close the fleet"""
+        self._stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.fleet.close()
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the cached body of the server's :class:`Exporter`"""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.exporter.body
+        gzipped = self.server.exporter.gzipped
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzipped
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m apiminer.exporter",
+        description="Export the state of your miners to Prometheus",
+    )
+    parser.add_argument(
+        "inventory",
+        type=argparse.FileType("r"),
+        help="File with one 'driver ip port' line per miner, - for stdin",
+    )
+    parser.add_argument("--host", default="", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=15.0,
+        help="Seconds between polls (default: 15)",
+    )
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument(
+        "--connect-timeout", type=float, default=DEFAULT_TIMEOUT
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Split the inventory across this many polling processes",
+    )
+    args = parser.parse_args(argv)
+
+    with args.inventory:
+        inventory = load_inventory(args.inventory)
+    options = {
+        "concurrency": args.concurrency,
+        "timeout": args.timeout,
+        "keep_alive": True,
+        "driver_timeout": (args.connect_timeout, args.timeout),
+    }
+    if args.processes > 1:
+        fleet = ShardedFleet(
+            inventory, args.processes, dead_hosts=True, **options
+        )
+    else:
+        fleet = Fleet(inventory, dead_hosts=DeadHosts(), **options)
+    exporter = Exporter(fleet, args.interval, (args.host, args.port))
+    host, port = exporter.start()
+    print("Serving http://{}:{}/metrics".format(host or "0.0.0.0", port))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        exporter.stop()
+
+
+if __name__ == "__main__":
+    main()
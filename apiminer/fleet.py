@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Poll many miners at once
+
+:class:`Fleet` collects :meth:`unified_data` from an inventory of miners
+concurrently. Drivers with an asyncio counterpart are polled natively on the
+event loop, the HTTP drivers are run on a thread pool.
+
+A blocking call that outlives the fleet's timeout cannot be interrupted and
+keeps running on the thread pool. Until it returns, its miner is reported
+as :exc:`MinerBusy` instead of being polled from a second thread.
+"""
+
+import asyncio
+import concurrent.futures
+import time
+
+from .ClaymoreRPC import (
+    ClaymoreRPC,
+    EthminerRPC,
+    AsyncClaymoreRPC,
+    AsyncEthminerRPC,
+)
+from .SGMinerRPC import (
+    SGMiner,
+    TeamRedMiner,
+    AsyncSGMiner,
+    AsyncTeamRedMiner,
+)
+from .XMRStakAPI import XMRStakAPI
+from .XMRigHTTP import XMRig
+from .session import make_session
+from .timeouts import DEFAULT_TIMEOUT
+from .cache import CachedMiner
+
+
+class MinerBusy(RuntimeError):
+    """The previous blocking call to a miner has not returned yet"""
+
+
+#: dict: Inventory driver names and the driver class they stand for
+DRIVERS = {
+    "claymore": ClaymoreRPC,
+    "ethminer": EthminerRPC,
+    "sgminer": SGMiner,
+    "teamredminer": TeamRedMiner,
+    "xmrig": XMRig,
+    "xmrstak": XMRStakAPI,
+}
+
+#: dict: Blocking driver classes and their asyncio counterpart
+ASYNC_DRIVERS = {
+    ClaymoreRPC: AsyncClaymoreRPC,
+    EthminerRPC: AsyncEthminerRPC,
+    SGMiner: AsyncSGMiner,
+    TeamRedMiner: AsyncTeamRedMiner,
+}
+
+#: tuple: Driver classes that take a shared :obj:`requests.Session`
+HTTP_DRIVERS = (XMRig, XMRStakAPI)
+
+#: tuple: Driver classes that take a ``dead_hosts`` registry. TeamRedMiner
+#: is the base class of SGMiner.
+TCP_DRIVERS = (ClaymoreRPC, TeamRedMiner)
+
+
+def resolve_driver(driver):
+    """Look up a driver class
+
+    Parameters
+    ----------
+    driver : str or type
+        A key of :data:`DRIVERS` (case insensitive) or a driver class
+
+    Returns
+    -------
+    type
+        The driver class
+    """
+    if isinstance(driver, str):
+        try:
+            return DRIVERS[driver.lower()]
+        except KeyError:
+            raise ValueError("Unknown driver {!r}".format(driver))
+    return driver
+
+
+def load_inventory(lines):
+    """Read an inventory of miners
+
+    Each line holds a driver name, an IP address and a port, separated by
+    whitespace or commas, e.g. ``ethminer 192.168.0.2 3333``. The address
+    and port may also be written ``192.168.0.2:3333``. Blank lines and
+    everything after a ``#`` are ignored.
+
+    Parameters
+    ----------
+    lines : iterable of str
+        E.g. an open inventory file
+
+    Returns
+    -------
+    list of tuple
+        ``(driver, ip, port)`` entries, as accepted by :class:`Fleet`
+    """
+    inventory = []
+    for number, line in enumerate(lines, 1):
+        fields = line.split("#", 1)[0].replace(",", " ").split()
+        if not fields:
+            continue
+        if len(fields) == 2 and ":" in fields[1]:
+            fields[1:] = fields[1].rsplit(":", 1)
+        try:
+            driver, ip, port = fields
+            resolve_driver(driver)
+            inventory.append((driver.lower(), ip, int(port)))
+        except ValueError as error:
+            raise ValueError(
+                "Inventory line {}: {!r}: {}".format(
+                    number, line.strip(), error
+                )
+            )
+    return inventory
+
+
+class Fleet(object):
+    """Collects unified data from many miners in parallel
+
+    Parameters
+    ----------
+    inventory : iterable of tuple
+        ``(driver, ip, port)`` entries. ``driver`` is anything accepted by
+        :func:`resolve_driver`.
+    concurrency : int
+        Maximum number of miners polled at the same time
+    timeout : float
+        Seconds allowed for each miner before it is reported as failed
+    driver_timeout : float, tuple or None
+        Connect and read timeouts of the drivers, see
+        :class:`apiminer.ClaymoreRPC.ClaymoreRPC`
+    dead_hosts : apiminer.deadhosts.DeadHosts or None
+        Registry shared by the drivers. Miners that just failed are reported
+        as :exc:`apiminer.deadhosts.HostDown` without being contacted, until
+        their retry delay has passed.
+    keep_alive : bool
+        Keep connections to ClaymoreRPC/EthminerRPC miners open between
+        polls. See :class:`apiminer.ClaymoreRPC.ClaymoreRPC`
+    session : requests.Session or None
+        Session shared by the HTTP drivers. If None, one is created on the
+        first poll with a connection pool for every HTTP miner in the fleet.
+    cache : apiminer.cache.TTLCache or None
+        If given, miners are wrapped in :class:`apiminer.cache.CachedMiner`
+        and results still live in the cache are returned without polling.
+    cache_ttls : dict or None
+        Time-to-live of the cached methods. Defaults to
+        :data:`apiminer.cache.DEFAULT_TTLS`.
+
+    Attributes
+    ----------
+    miners : dict
+        ``(ip, port)`` mapped to the driver instance used to poll it. Async
+        drivers are created up front, blocking drivers on their first poll.
+    """
+
+    def __init__(
+        self,
+        inventory=(),
+        concurrency=256,
+        timeout=5.0,
+        keep_alive=False,
+        session=None,
+        cache=None,
+        cache_ttls=None,
+        driver_timeout=DEFAULT_TIMEOUT,
+        dead_hosts=None,
+    ):
+        self.concurrency = int(concurrency)
+        self.timeout = timeout
+        self.driver_timeout = driver_timeout
+        self.dead_hosts = dead_hosts
+        self.keep_alive = keep_alive
+        self.session = session
+        self.cache = cache
+        self.cache_ttls = cache_ttls
+
+        #: dict: ``(ip, port)`` mapped to the driver class of that miner
+        self.drivers = {}
+        self.miners = {}
+
+        #: dict: ``(ip, port)`` mapped to the seconds its last poll took
+        self.latencies = {}
+
+        self._executor = None
+
+        #: dict: ``(ip, port)`` mapped to the :class:`concurrent.futures.Future`
+        #: of the last blocking call to that miner
+        self._calls = {}
+
+        #: :obj:`asyncio.AbstractEventLoop`: Private loop of :meth:`poll`
+        self._loop = None
+
+        for driver, ip, port in inventory:
+            self.add(driver, ip, port)
+
+    def add(self, driver, ip, port):
+        """Add a miner to the fleet
+
+        Parameters
+        ----------
+        driver : str or type
+            See :func:`resolve_driver`
+        ip : str
+            IP address of the api host
+        port : int
+            The port on which the api is listening
+        """
+        driver = resolve_driver(driver)
+        key = (str(ip), int(port))
+        self.drivers[key] = driver
+        self.miners.pop(key, None)
+        if driver in ASYNC_DRIVERS:
+            driver = ASYNC_DRIVERS[driver]
+            kwargs = {
+                "timeout": self.driver_timeout,
+                "dead_hosts": self.dead_hosts,
+            }
+            if issubclass(driver, AsyncClaymoreRPC):
+                kwargs["keep_alive"] = self.keep_alive
+            self.miners[key] = self._wrap(driver(*key, **kwargs))
+
+    def _wrap(self, miner):
+        if self.cache is not None:
+            return CachedMiner(miner, self.cache, self.cache_ttls)
+        return miner
+
+    def remove(self, ip, port):
+        """Remove a miner from the fleet"""
+        key = (str(ip), int(port))
+        del self.drivers[key]
+        self.miners.pop(key, None)
+        self.latencies.pop(key, None)
+        self._calls.pop(key, None)
+
+    def __len__(self):
+        return len(self.drivers)
+
+    def _blocking_call(self, key, method, kwargs):
+        """Runs on the thread pool for drivers without asyncio support"""
+        miner = self.miners.get(key)
+        if miner is None:
+            driver = self.drivers[key]
+            if issubclass(driver, HTTP_DRIVERS):
+                miner = driver(
+                    *key, session=self.session, timeout=self.driver_timeout
+                )
+            elif issubclass(driver, TCP_DRIVERS):
+                miner = driver(
+                    *key,
+                    timeout=self.driver_timeout,
+                    dead_hosts=self.dead_hosts
+                )
+            else:
+                miner = driver(*key)
+            miner = self._wrap(miner)
+            self.miners[key] = miner
+        return getattr(miner, method)(**kwargs)
+
+    async def _poll_one(self, key, method, kwargs, semaphore, loop):
+        async with semaphore:
+            miner = self.miners.get(key)
+            native = asyncio.iscoroutinefunction(getattr(miner, method, None))
+            if native:
+                job = getattr(miner, method)(**kwargs)
+            else:
+                call = self._calls.get(key)
+                if call is not None and not call.done():
+                    # Drivers are not thread safe
+                    return MinerBusy(
+                        "The last call to {}:{} has not returned".format(*key)
+                    )
+                call = self._executor.submit(
+                    self._blocking_call, key, method, kwargs
+                )
+                self._calls[key] = call
+                job = asyncio.wrap_future(call, loop=loop)
+            start = time.monotonic()
+            try:
+                return await asyncio.wait_for(job, self.timeout)
+            except Exception as error:
+                if (
+                    self.dead_hosts is not None
+                    and issubclass(self.drivers[key], TCP_DRIVERS)
+                    and isinstance(error, asyncio.TimeoutError)
+                    and time.monotonic() - start >= self.timeout
+                ):
+                    # Cut off by the fleet before the driver's own timeouts
+                    # expired, so the driver could not record it. Only the
+                    # TCP drivers consult the registry.
+                    self.dead_hosts.failure(key, error)
+                # A blocking driver may still be using its socket on the
+                # thread pool, so only the async drivers are reset here
+                if native and hasattr(miner, "_disconnect"):
+                    miner._disconnect()
+                return error
+            finally:
+                self.latencies[key] = time.monotonic() - start
+
+    async def apoll(self, method="unified_data", keys=None, **kwargs):
+        """Poll every miner in the fleet
+
+        Parameters
+        ----------
+        method : str
+            Driver method called on every miner. Use "snapshot" to collect
+            :class:`apiminer.snapshot.MinerSnapshot` objects.
+        keys : iterable of tuple or None
+            Only poll these ``(ip, port)`` miners of the fleet
+        **kwargs
+            Passed to the driver method, e.g. ``normalize=True``
+
+        Returns
+        -------
+        dict
+            ``(ip, port)`` mapped to the miner's unified data, or to the
+            exception raised while polling it. :exc:`MinerBusy` if a
+            blocking call to the miner from an earlier poll is still running.
+        """
+        loop = asyncio.get_event_loop()
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.concurrency
+            )
+        if self.session is None:
+            hosts = sum(
+                issubclass(driver, HTTP_DRIVERS)
+                for driver in self.drivers.values()
+            )
+            self.session = make_session(pool_connections=max(hosts, 1))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        keys = list(self.drivers if keys is None else keys)
+        results = await asyncio.gather(
+            *[
+                self._poll_one(key, method, kwargs, semaphore, loop)
+                for key in keys
+            ]
+        )
+        return dict(zip(keys, results))
+
+    def poll(self, method="unified_data", keys=None, **kwargs):
+        """Blocking version of :meth:`Fleet.apoll`
+
+        Runs a private event loop, so it must not be called from a running
+        event loop. The loop is kept between polls, as kept alive
+        connections of the async drivers belong to it.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(
+            self.apoll(method, keys, **kwargs)
+        )
+
+    def close(self):
+        """Close kept alive connections and shut down the thread pool"""
+        for miner in self.miners.values():
+            if hasattr(miner, "close"):
+                miner.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._loop is not None:
+            # Let the closed transports finish before closing the loop
+            self._loop.run_until_complete(asyncio.sleep(0))
+            self._loop.close()
+            self._loop = None
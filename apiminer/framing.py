@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Buffered reader for the JSON responses of the TCP APIs
+
+Miner APIs answer with a single JSON document, terminated by a newline
+(ClaymoreRPC), a NUL byte (SGMiner) or simply by closing the connection.
+Large responses arrive in several segments, so a single ``recv`` is not
+enough. :class:`FrameReader` accumulates segments in one reusable buffer until
+a complete document has arrived.
+"""
+
+import json
+import re
+
+#: int: Default limit on the size of a single response, in bytes
+DEFAULT_MAX_SIZE = 1 << 20
+
+_TERMINATOR = re.compile(b"[\n\x00]")
+
+_WHITESPACE = b" \t\r\n\x00"
+
+
+class FrameTooLarge(ValueError):
+    """Raised when a response grows past :attr:`FrameReader.max_size`"""
+
+
+class FrameReader(object):
+    """Accumulates response segments until a JSON document is complete
+
+    The buffer is kept between responses, so a driver holding one reader
+    does not reallocate it for every request.
+
+    Parameters
+    ----------
+    max_size : int
+        Largest response accepted, in bytes. :exc:`FrameTooLarge` is raised
+        once the buffered data exceeds it.
+    chunk_size : int
+        Bytes requested from the socket per read
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, chunk_size=4096):
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+
+        #: bytearray: Received bytes not yet returned as a document
+        self.buffer = bytearray()
+
+        #: int: Position up to which the buffer was searched for terminators
+        self._scanned = 0
+
+    def clear(self):
+        """Drop buffered data, e.g. after reconnecting"""
+        del self.buffer[:]
+        self._scanned = 0
+
+    def _ends_document(self, end):
+        """Whether ``buffer[:end]`` ends the way a JSON document does"""
+        end -= 1
+        while end >= 0 and self.buffer[end] in _WHITESPACE:
+            end -= 1
+        return end >= 0 and self.buffer[end] in b"}]"
+
+    def _decode(self, end):
+        """Decode ``buffer[:end]``. Raises ValueError if it is incomplete"""
+        return json.loads(self.buffer[:end].decode("utf-8"))
+
+    def _consume(self, end):
+        del self.buffer[:end]
+        self._scanned = 0
+
+    def feed(self, data):
+        """Add received bytes to the buffer
+
+        Parameters
+        ----------
+        data : bytes
+            Bytes received from the API host
+
+        Returns
+        -------
+        object or None
+            The decoded document once complete, None while incomplete.
+        """
+        self.buffer += data
+
+        match = _TERMINATOR.search(self.buffer, self._scanned)
+        while match is not None:
+            end = match.start()
+            # A NUL always ends the response. A newline may just be
+            # whitespace inside a pretty printed document.
+            if match.group() == b"\x00" or self._ends_document(end):
+                try:
+                    message = self._decode(end)
+                except ValueError:
+                    if match.group() == b"\x00":
+                        raise
+                else:
+                    self._consume(end + 1)
+                    return message
+            match = _TERMINATOR.search(self.buffer, end + 1)
+        self._scanned = len(self.buffer)
+
+        # Some hosts send no terminator at all. Only attempt to decode when
+        # the data ends the way a JSON document does.
+        if self._ends_document(len(self.buffer)):
+            try:
+                message = self._decode(len(self.buffer))
+            except ValueError:
+                pass
+            else:
+                self._consume(len(self.buffer))
+                return message
+
+        if len(self.buffer) > self.max_size:
+            size = len(self.buffer)
+            self.clear()
+            raise FrameTooLarge(
+                "Response exceeds {} bytes ({} received)".format(
+                    self.max_size, size
+                )
+            )
+        return None
+
+    def eof(self):
+        """The host closed the connection
+
+        Returns
+        -------
+        object or None
+            The decoded remainder of the buffer, or None if it was empty.
+
+        Raises
+        ------
+        ValueError
+            The buffered data is not a complete JSON document
+        """
+        if not self.buffer.strip(_WHITESPACE):
+            self.clear()
+            return None
+        try:
+            return self._decode(len(self.buffer))
+        finally:
+            self.clear()
+
+    def read_socket(self, sock):
+        """Read one document from a blocking socket
+
+        Returns
+        -------
+        object or None
+            The decoded document, or None if the connection was closed
+            before any data arrived.
+        """
+        while True:
+            data = sock.recv(self.chunk_size)
+            if not data:
+                return self.eof()
+            message = self.feed(data)
+            if message is not None:
+                return message
+
+    async def read_stream(self, reader):
+        """Read one document from an :obj:`asyncio.StreamReader`
+
+        See :meth:`FrameReader.read_socket`
+        """
+        while True:
+            data = await reader.read(self.chunk_size)
+            if not data:
+                return self.eof()
+            message = self.feed(data)
+            if message is not None:
+                return message
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Fleet history in preallocated NumPy ring buffers
+
+:class:`History` keeps the last ``samples`` polls of a whole fleet: per-GPU
+hashrate, temperature and fan speed, and per-miner total hashrate and share
+counters. Each poll of the fleet is recorded as one sample column.
+
+Every sample is written twice, at ``i`` and ``i + samples``, so the most
+recent ``n`` samples are always a contiguous slice of the buffers. Appending
+is O(1) and :meth:`History.window` returns views, never copies, at the cost
+of twice the memory.
+
+Requires NumPy, installed with the ``analytics`` extra.
+"""
+
+import collections
+import time
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    raise ImportError(
+        "apiminer.history requires numpy. "
+        "Install it with: pip install apiminer[analytics]"
+    )
+
+from .snapshot import MinerSnapshot
+
+#: Views of the last samples of a :class:`History`. Missing values are NaN.
+#:
+#: + keys: list of the miner keys, in row order
+#: + times: (samples,) poll timestamps
+#: + hashrate, temp, fan: (miners, gpus, samples) per-GPU values
+#: + total_hashrate: (miners, samples)
+#: + shares: (miners, 3, samples) accepted, rejected and invalid counters
+HistoryWindow = collections.namedtuple(
+    "HistoryWindow",
+    ["keys", "times", "hashrate", "temp", "fan", "total_hashrate", "shares"],
+)
+
+
+class History(object):
+    """Ring buffers holding the recent state of a fleet
+
+    Parameters
+    ----------
+    miners : int
+        Number of miners the buffers have room for
+    gpus : int
+        GPUs per miner the buffers have room for. Extra GPUs are ignored.
+    samples : int
+        Number of polls kept
+    clock : callable
+        Returns the current time in seconds, used when :meth:`record` is not
+        given a timestamp
+    """
+
+    def __init__(self, miners, gpus, samples, clock=time.time):
+        self.capacity = miners
+        self.gpus = gpus
+        self.samples = samples
+        self.clock = clock
+
+        #: list: Miner keys, in the order of the buffer rows
+        self.keys = []
+        self._rows = {}
+
+        #: int: Index of the next sample to write, in [0, samples)
+        self.head = 0
+
+        #: int: Number of samples recorded, up to ``samples``
+        self.count = 0
+
+        length = 2 * samples
+        self.times = numpy.full(length, numpy.nan)
+        self.hashrate = numpy.full(
+            (miners, gpus, length), numpy.nan, dtype=numpy.float32
+        )
+        self.temp = numpy.full_like(self.hashrate, numpy.nan)
+        self.fan = numpy.full_like(self.hashrate, numpy.nan)
+        self.total_hashrate = numpy.full((miners, length), numpy.nan)
+        self.shares = numpy.full((miners, 3, length), numpy.nan)
+
+    def __len__(self):
+        return self.count
+
+    def row(self, key):
+        """Buffer row of a miner, assigned on first use
+
+        Raises
+        ------
+        ValueError
+            There is no room for another miner
+        """
+        row = self._rows.get(key)
+        if row is None:
+            if len(self.keys) >= self.capacity:
+                raise ValueError(
+                    "History is full ({} miners)".format(self.capacity)
+                )
+            row = len(self.keys)
+            self._rows[key] = row
+            self.keys.append(key)
+        return row
+
+    def record(self, snapshots, timestamp=None):
+        """Append one poll of the fleet
+
+        Parameters
+        ----------
+        snapshots : dict
+            Miner keys, e.g. ``(ip, port)``, mapped to a normalized
+            :class:`apiminer.snapshot.MinerSnapshot`, e.g. from
+            ``fleet.poll("snapshot", normalize=True)``. Exceptions, as
+            returned by :meth:`apiminer.fleet.Fleet.poll`, are recorded as
+            missing values.
+        timestamp : float or None
+            Time of the poll. Defaults to the current time.
+
+        Raises
+        ------
+        TypeError
+            A value is neither a snapshot nor an exception
+        ValueError
+            A snapshot is not normalized, or there is no room for a new
+            miner. Nothing is recorded.
+        """
+        polled = []
+        new = set()
+        for key, snapshot in snapshots.items():
+            if isinstance(snapshot, BaseException):
+                continue
+            if not isinstance(snapshot, MinerSnapshot):
+                raise TypeError(
+                    "Expected a MinerSnapshot for {!r}, got {}. Poll with "
+                    "method='snapshot', normalize=True".format(
+                        key, type(snapshot).__name__
+                    )
+                )
+            if not snapshot.normalized:
+                raise ValueError(
+                    "The snapshot of {!r} is not normalized. Poll with "
+                    "normalize=True".format(key)
+                )
+            if key not in self._rows:
+                new.add(key)
+            polled.append((key, snapshot))
+        if len(self.keys) + len(new) > self.capacity:
+            raise ValueError(
+                "History is full ({} miners)".format(self.capacity)
+            )
+
+        columns = [self.head, self.head + self.samples]
+        self.times[columns] = self.clock() if timestamp is None else timestamp
+        for buffer in (self.hashrate, self.temp, self.fan):
+            buffer[..., columns] = numpy.nan
+        self.total_hashrate[:, columns] = numpy.nan
+        self.shares[..., columns] = numpy.nan
+
+        for key, snapshot in polled:
+            row = self.row(key)
+            gpus = min(len(snapshot), self.gpus)
+            for buffer, values in (
+                (self.hashrate, snapshot.hashrates),
+                (self.temp, snapshot.temps),
+                (self.fan, snapshot.fans),
+            ):
+                column = numpy.array(values[:gpus], dtype=numpy.float32)
+                buffer[row, :gpus, self.head] = column
+                buffer[row, :gpus, self.head + self.samples] = column
+            self.total_hashrate[row, columns] = snapshot.total_hashrate
+            self.shares[row, :, columns] = numpy.array(
+                [snapshot.accepted, snapshot.rejected, snapshot.invalid],
+                dtype=float,
+            )
+
+        self.head = (self.head + 1) % self.samples
+        self.count = min(self.count + 1, self.samples)
+
+    def window(self, samples=None, seconds=None, now=None):
+        """Views of the most recent samples
+
+        Parameters
+        ----------
+        samples : int or None
+            Number of samples. Defaults to every sample recorded.
+        seconds : float or None
+            Only samples recorded within this many seconds of ``now``
+        now : float or None
+            Defaults to the current time
+
+        Returns
+        -------
+        HistoryWindow
+            Views into the buffers, oldest sample first. They are overwritten
+            by later calls to :meth:`record`; copy them to keep them.
+        """
+        count = self.count if samples is None else min(samples, self.count)
+        stop = self.head + self.samples
+        start = stop - count
+        if seconds is not None:
+            now = self.clock() if now is None else now
+            start += int(
+                numpy.searchsorted(self.times[start:stop], now - seconds)
+            )
+        rows = len(self.keys)
+        return HistoryWindow(
+            list(self.keys),
+            self.times[start:stop],
+            self.hashrate[:rows, :, start:stop],
+            self.temp[:rows, :, start:stop],
+            self.fan[:rows, :, start:stop],
+            self.total_hashrate[:rows, start:stop],
+            self.shares[:rows, :, start:stop],
+        )
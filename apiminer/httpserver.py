@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""HTTP server shared by the exporter and the distributed coordinator"""
+
+import http.server
+import socketserver
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Handles every request in its own daemon thread
+
+    :class:`http.server.ThreadingHTTPServer` only exists from Python 3.7.
+    """
+
+    daemon_threads = True
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Adaptive per-miner polling schedule
+
+Polling every miner of a farm at the same fixed interval makes every sweep a
+load spike and spends as much time on dead rigs as on healthy ones.
+:class:`Scheduler` gives each miner of a :class:`apiminer.fleet.Fleet` its
+own interval instead:
+
++ first polls are spread over one interval, and every interval is jittered,
+  so the polls do not line up again
++ miners that fail are backed off exponentially, up to ``max_interval``
++ miners whose hashrate or temperature is changing are polled more often,
+  down to ``min_interval``, and relax back to ``interval`` once stable
+"""
+
+import asyncio
+import heapq
+import random
+import time
+
+from .snapshot import MinerSnapshot
+
+
+class _Host(object):
+    """Schedule of one miner"""
+
+    __slots__ = ("interval", "failures", "due", "last")
+
+    def __init__(self, interval, due):
+        self.interval = interval
+        self.failures = 0
+        self.due = due
+        #: MinerSnapshot or None: Result of the last successful poll
+        self.last = None
+
+
+class Scheduler(object):
+    """Decides when to poll each miner of a fleet
+
+    Parameters
+    ----------
+    fleet : apiminer.fleet.Fleet
+        Miners to poll. Miners added to or removed from the fleet are picked
+        up on the next poll.
+    interval : float
+        Seconds between two polls of a stable miner
+    min_interval : float or None
+        Shortest interval of a changing miner. Defaults to a quarter of
+        ``interval``.
+    max_interval : float or None
+        Longest interval of a failing miner. Defaults to 16 times
+        ``interval``.
+    jitter : float
+        Every interval is scaled by a random factor within ``1 ± jitter``
+    backoff : float
+        The interval of a failing miner is ``interval * backoff **
+        failures``
+    hashrate_change : float
+        Relative change of the total hashrate that counts as changing
+    temp_change : float
+        Change of any GPU temperature, in degrees, that counts as changing
+    clock : callable
+        Returns the current time in seconds
+    seed : int or None
+        Seeds the jitter
+    """
+
+    def __init__(
+        self,
+        fleet,
+        interval=30.0,
+        min_interval=None,
+        max_interval=None,
+        jitter=0.1,
+        backoff=2.0,
+        hashrate_change=0.05,
+        temp_change=3,
+        clock=time.monotonic,
+        seed=None,
+    ):
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be in [0, 1)")
+        self.fleet = fleet
+        self.interval = float(interval)
+        self.min_interval = (
+            self.interval / 4 if min_interval is None else min_interval
+        )
+        self.max_interval = (
+            self.interval * 16 if max_interval is None else max_interval
+        )
+        self.jitter = jitter
+        self.backoff = backoff
+        self.hashrate_change = hashrate_change
+        self.temp_change = temp_change
+        self.clock = clock
+        self.random = random.Random(seed)
+
+        #: dict: ``(ip, port)`` mapped to the schedule of that miner
+        self.hosts = {}
+
+        #: list: ``(due, key)`` heap. Stale entries are skipped.
+        self._queue = []
+
+    def _schedule(self, key, host, now, interval):
+        spread = 1 + self.random.uniform(-self.jitter, self.jitter)
+        host.due = now + interval * spread
+        heapq.heappush(self._queue, (host.due, key))
+
+    def _sync(self, now):
+        """Pick up miners added to or removed from the fleet"""
+        for key in self.fleet.drivers:
+            if key not in self.hosts:
+                # Spread the first polls over one interval
+                due = now + self.random.uniform(0, self.interval)
+                self.hosts[key] = _Host(self.interval, due)
+                heapq.heappush(self._queue, (due, key))
+        for key in list(self.hosts):
+            if key not in self.fleet.drivers:
+                del self.hosts[key]
+
+    def next_due(self):
+        """Time of the next poll, None if the fleet is empty"""
+        self._sync(self.clock())
+        while self._queue:
+            due, key = self._queue[0]
+            host = self.hosts.get(key)
+            if host is not None and host.due == due:
+                return due
+            heapq.heappop(self._queue)
+        return None
+
+    def due(self, now=None):
+        """Keys of the miners due for a poll, removed from the queue"""
+        now = self.clock() if now is None else now
+        self._sync(now)
+        keys = []
+        while self._queue and self._queue[0][0] <= now:
+            due, key = heapq.heappop(self._queue)
+            host = self.hosts.get(key)
+            if host is not None and host.due == due:
+                keys.append(key)
+        return keys
+
+    def _changing(self, last, snapshot):
+        if last.total_hashrate and snapshot.total_hashrate is not None:
+            change = abs(snapshot.total_hashrate - last.total_hashrate)
+            if change > self.hashrate_change * abs(last.total_hashrate):
+                return True
+        if len(last) != len(snapshot):
+            return True
+        for old, new in zip(last.temps, snapshot.temps):
+            if old is not None and new is not None:
+                if abs(new - old) >= self.temp_change:
+                    return True
+        return False
+
+    def record(self, key, result, now=None):
+        """Reschedule a miner after a poll
+
+        Parameters
+        ----------
+        key : tuple
+            ``(ip, port)`` of the miner
+        result : object
+            Snapshot or :meth:`unified_data` of the miner, or the exception
+            its poll raised
+
+        Returns
+        -------
+        float
+            The new interval of the miner, before jitter
+
+        Raises
+        ------
+        KeyError
+            The miner is not scheduled, e.g. it was removed from the fleet
+        """
+        now = self.clock() if now is None else now
+        host = self.hosts[key]
+
+        if isinstance(result, BaseException):
+            host.failures += 1
+            host.interval = min(
+                self.max_interval,
+                self.interval * self.backoff**host.failures,
+            )
+        else:
+            if not isinstance(result, MinerSnapshot):
+                result = MinerSnapshot.from_dict(result)
+            if host.failures:
+                host.failures = 0
+                host.interval = self.interval
+            elif host.last is not None and self._changing(host.last, result):
+                host.interval = max(self.min_interval, host.interval / 2)
+            else:
+                host.interval = min(self.interval, host.interval * 1.5)
+            host.last = result
+
+        self._schedule(key, host, now, host.interval)
+        return host.interval
+
+    async def apoll(self, method="snapshot", **kwargs):
+        """Wait for the next miners to be due and poll them
+
+        Parameters
+        ----------
+        method : str
+            Driver method called, see :meth:`apiminer.fleet.Fleet.apoll`.
+            It must return a snapshot or :meth:`unified_data`.
+        **kwargs
+            Passed to the driver method
+
+        Returns
+        -------
+        dict
+            ``(ip, port)`` mapped to the result or exception of each miner
+            polled, empty if the fleet is empty
+        """
+        due = self.next_due()
+        if due is None:
+            return {}
+        delay = due - self.clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        keys = self.due()
+        results = await self.fleet.apoll(method, keys, **kwargs)
+        now = self.clock()
+        for key, result in results.items():
+            if key in self.hosts:
+                self.record(key, result, now)
+        return results
+
+    async def run(self, callback, method="snapshot", **kwargs):
+        """Poll forever, passing every batch of results to ``callback``"""
+        while True:
+            results = await self.apoll(method, **kwargs)
+            if results:
+                callback(results)
+            else:
+                await asyncio.sleep(self.interval)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Pooled keep-alive HTTP sessions for the HTTP drivers
+
+:class:`apiminer.XMRig` and :class:`apiminer.XMRStakAPI` send their requests
+through a :obj:`requests.Session`, so connections to a host are kept alive and
+reused between polls. Pass one session to many drivers to share a single pool
+across a fleet.
+"""
+
+import requests
+import requests.adapters
+
+
+def make_session(pool_connections=1, pool_maxsize=4, max_retries=0):
+    """Create a session with a keep-alive connection pool
+
+    Parameters
+    ----------
+    pool_connections : int
+        Number of hosts whose connection pools are kept. Set it to the number
+        of miners when sharing a session across a fleet, otherwise pools are
+        discarded and connections reopened.
+    pool_maxsize : int
+        Connections kept alive per host
+    max_retries : int
+        Retries on failed connections. See :class:`requests.adapters.HTTPAdapter`
+
+    Returns
+    -------
+    :obj:`requests.Session`
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=max_retries,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Poll a fleet from several processes
+
+One process polling tens of thousands of miners spends its time decoding
+and parsing responses on a single core. :class:`ShardedFleet` splits the
+inventory into shards, one per worker process, each polled by its own
+:class:`apiminer.fleet.Fleet`. The results come back to the parent as
+compact pickles (see :meth:`apiminer.snapshot.MinerSnapshot.__reduce__`),
+so poll ``"snapshot"`` rather than ``"unified_data"`` to keep the merge
+cheap.
+
+A miner always lands on the same worker, chosen from a hash of its address,
+so kept alive connections, caches and dead host records stay valid between
+polls.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import pickle
+import threading
+import zlib
+
+from .cache import TTLCache
+from .deadhosts import DeadHosts
+from .fleet import Fleet, resolve_driver
+from .timeouts import DEFAULT_TIMEOUT
+
+
+def shard_of(key, shards):
+    """Index of the shard polling a miner
+
+    Parameters
+    ----------
+    key : tuple
+        ``(ip, port)`` of the miner
+    shards : int
+        Number of shards
+    """
+    return zlib.crc32("{}:{}".format(*key).encode("utf-8")) % shards
+
+
+def _portable(result):
+    """Replace exceptions that cannot be sent back to the parent"""
+    if isinstance(result, BaseException):
+        try:
+            pickle.dumps(result)
+        except Exception:
+            return RuntimeError(repr(result))
+    return result
+
+
+def _worker(connection, inventory, options):
+    """Main loop of a worker process"""
+    options = dict(options)
+    if options.pop("cache"):
+        options["cache"] = TTLCache()
+    if options.pop("dead_hosts"):
+        options["dead_hosts"] = DeadHosts()
+    fleet = Fleet(inventory, **options)
+    try:
+        while True:
+            command, arguments = connection.recv()
+            if command == "poll":
+                method, keys, kwargs = arguments
+                results = fleet.poll(method, keys, **kwargs)
+                connection.send(
+                    (
+                        [
+                            (key, _portable(value))
+                            for key, value in results.items()
+                        ],
+                        fleet.latencies,
+                    )
+                )
+            elif command == "add":
+                fleet.add(*arguments)
+            elif command == "remove":
+                fleet.remove(*arguments)
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        fleet.close()
+        connection.close()
+
+
+class ShardedFleet(object):
+    """Polls a fleet from a pool of worker processes
+
+    Offers the polling interface of :class:`apiminer.fleet.Fleet`, so it can
+    stand in for one, e.g. in :class:`apiminer.exporter.Exporter`.
+
+    Parameters
+    ----------
+    inventory : iterable of tuple
+        ``(driver, ip, port)`` entries, see :class:`apiminer.fleet.Fleet`.
+        Driver classes must be importable by the workers.
+    processes : int or None
+        Number of worker processes. Defaults to the number of CPUs.
+    concurrency : int
+        Maximum number of miners polled at the same time, per worker
+    timeout, keep_alive, cache_ttls, driver_timeout
+        See :class:`apiminer.fleet.Fleet`
+    cache : bool
+        Give each worker a :class:`apiminer.cache.TTLCache`
+    dead_hosts : bool
+        Give each worker a :class:`apiminer.deadhosts.DeadHosts` registry
+    context : multiprocessing context or None
+        Starts the workers. Defaults to the platform default.
+    """
+
+    def __init__(
+        self,
+        inventory=(),
+        processes=None,
+        concurrency=256,
+        timeout=5.0,
+        keep_alive=False,
+        cache=False,
+        cache_ttls=None,
+        driver_timeout=DEFAULT_TIMEOUT,
+        dead_hosts=False,
+        context=None,
+    ):
+        self.processes = int(processes or os.cpu_count() or 1)
+        self.options = {
+            "concurrency": concurrency,
+            "timeout": timeout,
+            "keep_alive": keep_alive,
+            "cache": bool(cache),
+            "cache_ttls": cache_ttls,
+            "driver_timeout": driver_timeout,
+            "dead_hosts": bool(dead_hosts),
+        }
+        self.context = context or multiprocessing.get_context()
+
+        #: dict: ``(ip, port)`` mapped to the driver class of that miner
+        self.drivers = {}
+
+        #: dict: ``(ip, port)`` mapped to the seconds its last poll took
+        self.latencies = {}
+
+        #: list: The ``(driver, ip, port)`` entries of each shard
+        self._shards = [[] for _ in range(self.processes)]
+
+        #: list: Worker process and connection of each shard, or None
+        self._workers = [None] * self.processes
+
+        self._lock = threading.Lock()
+
+        for driver, ip, port in inventory:
+            key = (str(ip), int(port))
+            self.drivers[key] = resolve_driver(driver)
+            self._shards[shard_of(key, self.processes)].append((driver,) + key)
+
+    def __len__(self):
+        return len(self.drivers)
+
+    def _worker(self, index):
+        """The worker of a shard, started if needed"""
+        worker = self._workers[index]
+        if worker is not None and worker[0].is_alive():
+            return worker
+        if worker is not None:
+            worker[1].close()
+        parent, child = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker,
+            args=(child, self._shards[index], self.options),
+            name="apiminer-shard-{}".format(index),
+        )
+        process.daemon = True
+        process.start()
+        child.close()
+        self._workers[index] = (process, parent)
+        return self._workers[index]
+
+    def start(self):
+        """Start every worker now instead of on the first poll"""
+        with self._lock:
+            for index in range(self.processes):
+                self._worker(index)
+
+    def _send(self, index, command, arguments):
+        worker = self._workers[index]
+        if worker is not None and worker[0].is_alive():
+            worker[1].send((command, arguments))
+
+    def add(self, driver, ip, port):
+        """Add a miner to the fleet, see :meth:`apiminer.fleet.Fleet.add`"""
+        key = (str(ip), int(port))
+        with self._lock:
+            if key in self.drivers:
+                self._remove(key)
+            self.drivers[key] = resolve_driver(driver)
+            index = shard_of(key, self.processes)
+            self._shards[index].append((driver,) + key)
+            self._send(index, "add", (driver,) + key)
+
+    def remove(self, ip, port):
+        """Remove a miner from the fleet"""
+        with self._lock:
+            self._remove((str(ip), int(port)))
+
+    def _remove(self, key):
+        del self.drivers[key]
+        self.latencies.pop(key, None)
+        index = shard_of(key, self.processes)
+        self._shards[index] = [
+            entry for entry in self._shards[index] if entry[1:] != key
+        ]
+        self._send(index, "remove", key)
+
+    def poll(self, method="unified_data", keys=None, **kwargs):
+        """Poll every miner, each shard in its own process
+
+        Takes the same arguments as :meth:`apiminer.fleet.Fleet.poll`. The
+        polls of all shards run at the same time.
+
+        Returns
+        -------
+        dict
+            ``(ip, port)`` mapped to the result of the miner, or to the
+            exception raised while polling it. If a worker died, its miners
+            are reported with a :exc:`ConnectionError` and the worker is
+            restarted on the next poll.
+        """
+        if keys is None:
+            shard_keys = [None] * self.processes
+        else:
+            shard_keys = [[] for _ in range(self.processes)]
+            for key in keys:
+                shard_keys[shard_of(key, self.processes)].append(key)
+
+        with self._lock:
+            # Send every request before reading any answer, so the shards
+            # are polled in parallel
+            busy = []
+            for index, selected in enumerate(shard_keys):
+                if not self._shards[index] or selected == []:
+                    continue
+                process, connection = self._worker(index)
+                connection.send(("poll", (method, selected, kwargs)))
+                busy.append((index, selected, connection))
+
+            results = {}
+            for index, selected, connection in busy:
+                try:
+                    pairs, latencies = connection.recv()
+                except (EOFError, OSError) as error:
+                    failure = ConnectionError(
+                        "Shard {} worker exited: {!r}".format(index, error)
+                    )
+                    if selected is None:
+                        selected = [entry[1:] for entry in self._shards[index]]
+                    for key in selected:
+                        results[key] = failure
+                    continue
+                results.update(pairs)
+                self.latencies.update(latencies)
+        return results
+
+    async def apoll(self, method="unified_data", keys=None, **kwargs):
+        """Run :meth:`ShardedFleet.poll` without blocking the event loop"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.poll, method, keys, **kwargs)
+        )
+
+    def close(self):
+        """Stop the workers, which close their connections"""
+        with self._lock:
+            for index, worker in enumerate(self._workers):
+                if worker is None:
+                    continue
+                process, connection = worker
+                try:
+                    connection.send(("close", None))
+                except OSError:
+                    pass
+                process.join(5)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+                connection.close()
+                self._workers[index] = None
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Simulated miners for testing and benchmarking without real rigs
+
+Every server in :mod:`apiminer.simulator.servers` speaks one miner API on a
+loopback port. :class:`Simulator` runs any number of them on a single event
+loop in a background thread::
+
+    from apiminer import Fleet
+    from apiminer.simulator import Simulator, Faults
+
+    with Simulator() as simulator:
+        simulator.add("claymore", count=100, gpus=8)
+        simulator.add("xmrig", count=100, faults=Faults(latency=0.05))
+        fleet = Fleet(simulator.inventory())
+        results = fleet.poll()
+
+Run ``python -m apiminer.simulator --help`` to start simulated miners from
+the command line.
+"""
+
+import asyncio
+import threading
+
+from .servers import (
+    Faults,
+    ClaymoreServer,
+    EthminerServer,
+    SGMinerServer,
+    TeamRedMinerServer,
+    XMRigServer,
+    XMRStakServer,
+    SERVERS,
+)
+
+
+class Simulator(object):
+    """Runs simulated miners on an event loop in a background thread
+
+    Parameters
+    ----------
+    host : str
+        Address the miners listen on
+    """
+
+    def __init__(self, host="127.0.0.1"):
+        self.host = host
+
+        #: list: The simulated miners, in the order they were added
+        self.miners = []
+
+        self.loop = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __len__(self):
+        return len(self.miners)
+
+    def _run(self, coroutine):
+        """Run a coroutine on the simulator's loop and wait for it"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def start(self):
+        """Start the event loop and every miner added so far"""
+        if self._thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="apiminer-simulator",
+            daemon=True,
+        )
+        self._thread.start()
+        for miner in self.miners:
+            self._run(miner.start())
+
+    def add(self, driver, count=1, gpus=8, faults=None, **kwargs):
+        """Add simulated miners
+
+        They start listening right away if the simulator is running.
+
+        Parameters
+        ----------
+        driver : str
+            A key of :data:`SERVERS`, e.g. "claymore" or "xmrig"
+        count : int
+            Number of miners to add
+        gpus : int
+            GPUs reported by each miner
+        faults : Faults or None
+            Misbehaviour shared by the miners
+        **kwargs
+            Passed to the server class, e.g. ``joined=False`` for
+            :class:`SGMinerServer`
+
+        Returns
+        -------
+        list
+            The new servers
+        """
+        try:
+            server = SERVERS[driver.lower()]
+        except KeyError:
+            raise ValueError("Unknown driver {!r}".format(driver))
+        added = []
+        for _ in range(count):
+            miner = server(
+                gpus, faults, seed=len(self.miners), host=self.host, **kwargs
+            )
+            if self._thread is not None:
+                self._run(miner.start())
+            self.miners.append(miner)
+            added.append(miner)
+        return added
+
+    def inventory(self):
+        """``(driver, host, port)`` of every miner, for
+        :class:`apiminer.fleet.Fleet`"""
+        return [miner.inventory for miner in self.miners]
+
+    def stop(self):
+        """Close every miner and stop the event loop"""
+        if self._thread is None:
+            return
+
+        async def close():
+            await asyncio.gather(*[miner.close() for miner in self.miners])
+
+        self._run(close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.loop = None
+        self._thread = None
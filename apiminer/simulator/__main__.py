@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Start simulated miners and print their inventory
+
+Example: ``python -m apiminer.simulator claymore=500 xmrig=500 --gpus 8``
+"""
+
+import argparse
+import sys
+import time
+
+from . import Simulator, Faults, SERVERS
+
+
+def _miners(spec):
+    driver, _, count = spec.partition("=")
+    if driver.lower() not in SERVERS:
+        raise argparse.ArgumentTypeError(
+            "unknown driver {!r}, choose from {}".format(
+                driver, ", ".join(sorted(SERVERS))
+            )
+        )
+    return driver.lower(), int(count or 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m apiminer.simulator",
+        description="Run simulated miners on loopback until interrupted. "
+        "Prints one 'driver host port' line per miner.",
+    )
+    parser.add_argument(
+        "miners",
+        nargs="+",
+        type=_miners,
+        metavar="DRIVER[=COUNT]",
+        help="Miners to start, e.g. claymore=100",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--gpus", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--reset", type=float, default=0.0)
+    parser.add_argument("--truncate", type=float, default=0.0)
+    parser.add_argument("--oversize", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    faults = Faults(
+        latency=args.latency,
+        jitter=args.jitter,
+        reset=args.reset,
+        truncate=args.truncate,
+        oversize=args.oversize,
+    )
+    with Simulator(args.host) as simulator:
+        for driver, count in args.miners:
+            simulator.add(driver, count, gpus=args.gpus, faults=faults)
+        for entry in simulator.inventory():
+            print("{} {} {}".format(*entry))
+        sys.stdout.flush()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Realistic API responses for rigs of various sizes
+
+Every function takes a GPU count and returns what the miner would send, so
+the benchmarks and the simulated miners exercise the same shapes of data. The
+same ``gpus`` and ``seed`` always give the same response.
+"""
+
+import json
+import random
+
+#: tuple of int: Rig sizes benchmarked
+GPU_COUNTS = (1, 8, 13, 24)
+
+
+def _rng(gpus, seed):
+    return random.Random(gpus * 1000 + seed)
+
+
+def claymore_getstat1(gpus, seed=0):
+    """The ``result`` list of a miner_getstat1 response"""
+    rng = _rng(gpus, seed)
+    eth = [rng.randint(28000, 32000) for _ in range(gpus)]
+    dcr = ["off"] * gpus
+    tempsfans = []
+    for _ in range(gpus):
+        tempsfans += [rng.randint(50, 75), rng.randint(30, 90)]
+    return [
+        "PM 4.2c - ETH",
+        str(rng.randint(60, 100000)),
+        "{};{};{}".format(sum(eth), rng.randint(0, 50000), rng.randint(0, 99)),
+        ";".join(str(rate) for rate in eth),
+        "0;0;0",
+        ";".join(dcr),
+        "; ".join(
+            "{};{}".format(tempsfans[index], tempsfans[index + 1])
+            for index in range(0, len(tempsfans), 2)
+        ),
+        "us1.ethermine.org:4444",
+        "{};{};0;0".format(rng.randint(0, 10), rng.randint(0, 3)),
+    ]
+
+
+def claymore_response(gpus, seed=0):
+    """A complete miner_getstat1 response, as sent on the wire"""
+    message = {
+        "id": 0,
+        "jsonrpc": "2.0",
+        "result": claymore_getstat1(gpus, seed),
+    }
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def ethminer_getstathr(gpus, seed=0):
+    """The ``result`` of ethminer's miner_getstathr"""
+    raw = claymore_getstat1(gpus, seed)
+    rates = [int(rate) * 1000 for rate in raw[3].split(";")]
+    tempsfans = [int(value) for value in raw[6].replace(" ", "").split(";")]
+    shares = raw[2].split(";")
+    return {
+        "ethhashrate": sum(rates),
+        "ethhashrates": rates,
+        "ethinvalid": 0,
+        "ethpoolsw": 0,
+        "ethrejected": int(shares[2]),
+        "ethshares": int(shares[1]),
+        "fanpercentages": tempsfans[1::2],
+        "pooladdrs": raw[7],
+        "powerusages": [0.0] * gpus,
+        "runtime": raw[1],
+        "temperatures": tempsfans[::2],
+        "version": "ethminer-0.18.0",
+    }
+
+
+def ethminer_getstatdetail(gpus, seed=0):
+    """The ``result`` of ethminer's miner_getstatdetail"""
+    stats = ethminer_getstathr(gpus, seed)
+    return {
+        "host": {"name": "rig{}".format(gpus), "version": stats["version"]},
+        "mining": {
+            "hashrate": hex(stats["ethhashrate"]),
+            "shares": [stats["ethshares"], stats["ethrejected"], 0, 0],
+        },
+        "devices": [
+            {
+                "_index": index,
+                "_mode": "OpenCL",
+                "mining": {"hashrate": hex(rate), "shares": [0, 0, 0, 0]},
+                "hardware": {
+                    "sensors": [
+                        stats["temperatures"][index],
+                        stats["fanpercentages"][index],
+                        0,
+                    ]
+                },
+            }
+            for index, rate in enumerate(stats["ethhashrates"])
+        ],
+    }
+
+
+#: str: Miner name and version reported by the simulated SGMiner APIs
+SGMINER_VERSION = "TeamRedMiner 0.4.5"
+
+
+def sgminer_status(code, message, miner=SGMINER_VERSION):
+    """The STATUS list of a successful SGMiner response"""
+    return [
+        {
+            "STATUS": "S",
+            "When": 1555555555,
+            "Code": code,
+            "Msg": message,
+            "Description": miner,
+        }
+    ]
+
+
+def sgminer_messages(gpus, seed=0, miner=SGMINER_VERSION):
+    """Decoded responses to the parameterless commands of an SGMiner API
+
+    ``miner`` is the name and version the API reports.
+
+    Returns
+    -------
+    dict
+        Command mapped to its response: summary, devs, version, config,
+        gpucount and pgacount
+    """
+    rng = _rng(gpus, seed)
+    devs = []
+    for gpu in range(gpus):
+        devs.append(
+            {
+                "GPU": gpu,
+                "Enabled": "Y",
+                "Status": "Alive",
+                "Temperature": float(rng.randint(50, 75)),
+                "Fan Speed": rng.randint(1000, 3000),
+                "Fan Percent": rng.randint(30, 90),
+                "GPU Clock": 1200,
+                "Memory Clock": 2000,
+                "GPU Voltage": 0.9,
+                "GPU Activity": 100,
+                "Powertune": 0,
+                "MHS av": 0.0022,
+                "MHS 30s": 0.0022,
+                "KHS av": rng.uniform(1.9, 2.3),
+                "KHS 30s": rng.uniform(1.9, 2.3),
+                "Accepted": rng.randint(0, 5000),
+                "Rejected": rng.randint(0, 5),
+                "Hardware Errors": 0,
+                "Utility": 1.2,
+                "Intensity": "0",
+                "Last Share Pool": 0,
+                "Last Share Time": 1555555500,
+                "Total MH": 1500.0,
+                "Diff1 Work": 0,
+                "Difficulty Accepted": 0.0,
+                "Difficulty Rejected": 0.0,
+                "Last Share Difficulty": 0.0,
+                "Last Valid Work": 1555555500,
+                "Device Hardware%": 0.0,
+                "Device Rejected%": 0.0,
+                "Device Elapsed": 7320,
+            }
+        )
+    summary = {
+        "Elapsed": rng.randint(60, 1000000),
+        "MHS av": 0.0022 * gpus,
+        "KHS av": sum(dev["KHS av"] for dev in devs),
+        "Found Blocks": 0,
+        "Getworks": 100,
+        "Accepted": sum(dev["Accepted"] for dev in devs),
+        "Rejected": sum(dev["Rejected"] for dev in devs),
+        "Hardware Errors": 0,
+        "Utility": 1.2,
+        "Discarded": rng.randint(0, 10),
+        "Stale": rng.randint(0, 10),
+        "Get Failures": 0,
+        "Local Work": 100,
+        "Remote Failures": 0,
+        "Network Blocks": 100,
+        "Total MH": 1500.0,
+        "Work Utility": 1.2,
+        "Difficulty Accepted": 0.0,
+        "Difficulty Rejected": 0.0,
+        "Difficulty Stale": 0.0,
+        "Best Share": 0,
+        "Device Hardware%": 0.0,
+        "Device Rejected%": 0.0,
+        "Pool Rejected%": 0.0,
+        "Pool Stale%": 0.0,
+        "Last getwork": 1555555500,
+    }
+    return {
+        "summary": {
+            "STATUS": sgminer_status(11, "Summary", miner),
+            "SUMMARY": [summary],
+            "id": 1,
+        },
+        "devs": {
+            "STATUS": sgminer_status(9, "{} GPU(s)".format(gpus), miner),
+            "DEVS": devs,
+            "id": 1,
+        },
+        "version": {
+            "STATUS": sgminer_status(22, "CGMiner versions", miner),
+            "VERSION": [{"Miner": miner, "API": "3.7"}],
+            "id": 1,
+        },
+        "config": {
+            "STATUS": sgminer_status(33, "CGMiner config", miner),
+            "CONFIG": [
+                {
+                    "GPU Count": gpus,
+                    "PGA Count": 0,
+                    "Pool Count": 1,
+                    "Strategy": "Failover",
+                    "OS": "Linux",
+                }
+            ],
+            "id": 1,
+        },
+        "gpucount": {
+            "STATUS": sgminer_status(20, "GPU count", miner),
+            "GPUS": [{"Count": gpus}],
+            "id": 1,
+        },
+        "pgacount": {
+            "STATUS": sgminer_status(104, "PGA count", miner),
+            "PGAS": [{"Count": 0}],
+            "id": 1,
+        },
+    }
+
+
+def sgminer_response(gpus, command="summary+devs+version", seed=0):
+    """The response to a (possibly joined) command, as sent on the wire"""
+    messages = sgminer_messages(gpus, seed)
+    commands = command.split("+")
+    if len(commands) == 1:
+        message = messages[command]
+    else:
+        message = {name: [messages[name]] for name in commands}
+        message["id"] = 1
+    return json.dumps(message).encode("utf-8") + b"\x00"
+
+
+def xmrig_summary(gpus, seed=0):
+    """The body of XMRig's /1/summary"""
+    rng = _rng(gpus, seed)
+    threads = [[rng.uniform(900, 1100)] * 3 for _ in range(gpus)]
+    good = rng.randint(0, 50000)
+    return {
+        "id": "92f3104f9a2ee78c",
+        "worker_id": "rig{}".format(gpus),
+        "version": "2.14.1",
+        "kind": "cpu",
+        "ua": "XMRig/2.14.1",
+        "algo": "cn/r",
+        "uptime": rng.randint(60, 1000000),
+        "hugepages": True,
+        "donate_level": 1,
+        "hashrate": {
+            "total": [sum(thread[0] for thread in threads)] * 3,
+            "highest": 1200.0,
+            "threads": threads,
+        },
+        "results": {
+            "diff_current": 100001,
+            "shares_good": good,
+            "shares_total": good + rng.randint(0, 20),
+            "avg_time": 30,
+            "hashes_total": 123456789,
+            "best": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+            "error_log": [],
+        },
+        "connection": {
+            "pool": "pool.supportxmr.com:3333",
+            "uptime": rng.randint(60, 1000000),
+            "ping": 40,
+            "failures": 0,
+            "error_log": [],
+        },
+    }
+
+
+def xmrig_threads(gpus, seed=0):
+    """The body of XMRig's /1/threads"""
+    return {
+        "hugepages": [gpus, gpus],
+        "memory": 2097152 * gpus,
+        "threads": [
+            {
+                "type": "cpu",
+                "algo": "cn/r",
+                "av": 1,
+                "low_power_mode": 1,
+                "affine_to_cpu": index,
+                "priority": -1,
+                "soft_aes": False,
+                "count": 1,
+                "hashrate": rate,
+            }
+            for index, rate in enumerate(
+                xmrig_summary(gpus, seed)["hashrate"]["threads"]
+            )
+        ],
+    }
+
+
+def xmrig_config(gpus, seed=0):
+    """The body of XMRig's /1/config"""
+    return {
+        "algo": "cn/r",
+        "api": {"port": 0, "access-token": None, "worker-id": None},
+        "background": False,
+        "colors": True,
+        "cpu-affinity": None,
+        "cpu-priority": None,
+        "donate-level": 1,
+        "huge-pages": True,
+        "max-cpu-usage": 100,
+        "pools": [
+            {
+                "url": "pool.supportxmr.com:3333",
+                "user": "wallet",
+                "pass": "rig{}".format(gpus),
+                "keepalive": True,
+                "nicehash": False,
+            }
+        ],
+        "print-time": 60,
+        "retries": 5,
+        "retry-pause": 5,
+        "threads": gpus,
+    }
+
+
+def xmrstak_api(gpus, seed=0):
+    """The body of XMR-Stak's /api.json"""
+    rng = _rng(gpus, seed)
+    threads = [[rng.uniform(900, 1100), None, None] for _ in range(gpus)]
+    good = rng.randint(0, 50000)
+    return {
+        "version": "xmr-stak/2.10.4/4a48f7f/master/lin/nvidia-amd-cpu/0",
+        "hashrate": {
+            "threads": threads,
+            "total": [sum(thread[0] for thread in threads), None, None],
+            "highest": 1200.0,
+        },
+        "results": {
+            "diff_current": 100001,
+            "shares_good": good,
+            "shares_total": good + rng.randint(0, 20),
+            "avg_time": 30.0,
+            "hashes_total": 123456789,
+            "best": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+            "error_log": [],
+        },
+        "connection": {
+            "pool": "pool.supportxmr.com:3333",
+            "uptime": rng.randint(60, 1000000),
+            "ping": 40,
+            "error_log": [],
+        },
+    }
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""asyncio servers imitating the miner APIs
+
+Each server listens on its own port and answers with the responses of
+:mod:`apiminer.simulator.responses`. Many servers can share one event loop,
+see :class:`apiminer.simulator.Simulator`.
+"""
+
+import asyncio
+import json
+import random
+import socket
+import struct
+
+from ..framing import FrameReader
+from . import responses
+
+
+class Faults(object):
+    """Misbehaviour of a simulated miner
+
+    Rates are probabilities, checked for every request.
+
+    Parameters
+    ----------
+    latency : float
+        Seconds to wait before answering
+    jitter : float
+        Up to this many seconds are added to ``latency``, uniformly
+        distributed
+    reset : float
+        Rate of connections reset (RST) instead of answered
+    truncate : float
+        Rate of responses cut in half, after which the connection is closed
+    oversize : float
+        Rate of responses padded with ``oversize_bytes`` of junk
+    oversize_bytes : int
+        Size of oversized responses. Defaults to twice the default
+        :class:`apiminer.framing.FrameReader` limit.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        reset=0.0,
+        truncate=0.0,
+        oversize=0.0,
+        oversize_bytes=2 << 20,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.reset = reset
+        self.truncate = truncate
+        self.oversize = oversize
+        self.oversize_bytes = oversize_bytes
+
+    def __repr__(self):
+        return (
+            "Faults(latency={}, jitter={}, reset={}, truncate={}, "
+            "oversize={})".format(
+                self.latency,
+                self.jitter,
+                self.reset,
+                self.truncate,
+                self.oversize,
+            )
+        )
+
+
+class _SimulatedMiner(object):
+    """Shared connection handling and fault injection
+
+    Parameters
+    ----------
+    gpus : int
+        Number of GPUs the miner reports
+    faults : Faults or None
+        Misbehaviour to inject. None for a well behaved miner.
+    seed : int
+        Selects the reported statistics and seeds the fault injection.
+        Change :attr:`seed` to make the miner report new statistics.
+    host : str
+        Address to listen on
+    port : int
+        Port to listen on. 0 picks a free port.
+    """
+
+    #: str: Name of the driver polling this miner, see
+    #: :data:`apiminer.fleet.DRIVERS`
+    driver = None
+
+    #: bool: Answer several requests on one connection
+    keep_alive = True
+
+    def __init__(self, gpus=8, faults=None, seed=0, host="127.0.0.1", port=0):
+        self.gpus = int(gpus)
+        self.faults = faults if faults is not None else Faults()
+        self.seed = seed
+        self.host = host
+        self.port = int(port)
+
+        #: int: Requests received
+        self.requests = 0
+
+        #: int: Connections accepted
+        self.connections = 0
+
+        self.server = None
+        self._random = random.Random(seed)
+
+        #: dict: Open connections, writers mapped to a future set on close
+        self._open = {}
+
+    def __repr__(self):
+        return "{}(gpus={}, port={})".format(
+            type(self).__name__, self.gpus, self.port
+        )
+
+    @property
+    def inventory(self):
+        """``(driver, host, port)`` entry for :class:`apiminer.fleet.Fleet`"""
+        return (self.driver, self.host, self.port)
+
+    async def start(self):
+        """Start listening. Must be awaited on the loop serving the miner"""
+        self.server = await asyncio.start_server(
+            self._client, self.host, self.port, backlog=1024
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        """Stop listening and drop open connections"""
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self._open):
+                writer.transport.abort()
+            await asyncio.gather(*self._open.values())
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _read_request(self, reader):
+        """Read one request. Returns None once the client is done"""
+        raise NotImplementedError
+
+    def respond(self, request):
+        """Build the response to a request"""
+        raise NotImplementedError
+
+    def _encode(self, response, padding=0):
+        """The bytes sent for a response, padded by ``padding`` bytes
+
+        The padding is an extra string member of the response object, so
+        the oversized document is still valid JSON.
+        """
+        if padding:
+            response = (
+                b'{"padding": "' + b"x" * padding + b'", ' + response[1:]
+            )
+        return response
+
+    async def _client(self, reader, writer):
+        self.connections += 1
+        self._open[writer] = asyncio.get_event_loop().create_future()
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (ValueError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                self.requests += 1
+                if not await self._send(writer, self.respond(request)):
+                    return
+                if not self.keep_alive:
+                    break
+        finally:
+            # Closing an aborted transport again is a no-op
+            writer.close()
+            self._open.pop(writer).set_result(None)
+
+    async def _send(self, writer, response):
+        """Send a response, misbehaving as configured
+
+        Returns
+        -------
+        bool
+            Whether the connection is still usable
+        """
+        faults = self.faults
+        delay = faults.latency
+        if faults.jitter:
+            delay += self._random.uniform(0, faults.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        padding = 0
+        if faults.oversize and self._random.random() < faults.oversize:
+            padding = faults.oversize_bytes
+        payload = self._encode(response, padding)
+
+        if faults.reset and self._random.random() < faults.reset:
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(
+                    socket.SOL_SOCKET,
+                    socket.SO_LINGER,
+                    struct.pack("ii", 1, 0),
+                )
+            writer.transport.abort()
+            return False
+        if faults.truncate and self._random.random() < faults.truncate:
+            writer.write(payload[: len(payload) // 2])
+            await writer.drain()
+            writer.close()
+            return False
+
+        try:
+            writer.write(payload)
+            await writer.drain()
+        except ConnectionError:
+            return False
+        return True
+
+
+class ClaymoreServer(_SimulatedMiner):
+    """Speaks the ClaymoreRPC and ethminer JSON-RPC API
+
+    Answers newline terminated requests on a kept alive connection, like
+    ethminer does.
+    """
+
+    driver = "claymore"
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        return json.loads(line.decode("utf-8"))
+
+    def result(self, method):
+        """The ``result`` of a method, or None if it is unknown"""
+        if method in ("miner_getstat1", "miner_getstat2"):
+            return responses.claymore_getstat1(self.gpus, self.seed)
+        if method in ("control_gpu", "miner_reboot", "miner_restart"):
+            return True
+        return None
+
+    def respond(self, request):
+        message = {"id": request.get("id", 0), "jsonrpc": "2.0"}
+        result = self.result(request.get("method"))
+        if result is None:
+            message["error"] = {"code": -32601, "message": "Method not found"}
+        else:
+            message["result"] = result
+        return (json.dumps(message) + "\n").encode("utf-8")
+
+
+class EthminerServer(ClaymoreServer):
+    """Also answers the ethminer extensions of the protocol"""
+
+    driver = "ethminer"
+
+    def result(self, method):
+        if method == "miner_getstathr":
+            return responses.ethminer_getstathr(self.gpus, self.seed)
+        if method == "miner_getstatdetail":
+            return responses.ethminer_getstatdetail(self.gpus, self.seed)
+        if method == "miner_ping":
+            return "pong"
+        if method == "api_authorize":
+            return True
+        return super().result(method)
+
+
+class SGMinerServer(_SimulatedMiner):
+    """Speaks the sgminer JSON command API
+
+    Answers one NUL terminated response per connection, like sgminer.
+
+    Parameters
+    ----------
+    joined : bool or None
+        Accept several commands joined with "+". Defaults to
+        :attr:`joined`.
+    """
+
+    driver = "sgminer"
+
+    keep_alive = False
+
+    #: str: Miner name and version the API reports
+    miner = "sgminer 5.6.0"
+
+    #: bool: Whether commands joined with "+" are answered by default
+    joined = True
+
+    def __init__(self, *args, joined=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if joined is not None:
+            self.joined = joined
+
+    async def _read_request(self, reader):
+        return await FrameReader().read_stream(reader)
+
+    def _invalid(self, command):
+        return {
+            "STATUS": [
+                {
+                    "STATUS": "E",
+                    "When": 1555555555,
+                    "Code": 14,
+                    "Msg": "Invalid command",
+                    "Description": command,
+                }
+            ],
+            "id": 1,
+        }
+
+    def message(self, command, parameter=None):
+        """The decoded response to a single command"""
+        messages = responses.sgminer_messages(self.gpus, self.seed, self.miner)
+        if command == "gpu":
+            try:
+                dev = messages["devs"]["DEVS"][int(parameter)]
+            except (TypeError, ValueError, IndexError):
+                return self._invalid(command)
+            return {
+                "STATUS": responses.sgminer_status(
+                    17, "GPU{}".format(parameter), self.miner
+                ),
+                "GPU": [dev],
+                "id": 1,
+            }
+        return messages.get(command) or self._invalid(command)
+
+    def respond(self, request):
+        command = str(request.get("command", ""))
+        commands = command.split("+")
+        if len(commands) == 1:
+            message = self.message(command, request.get("parameter"))
+        elif self.joined:
+            message = {name: [self.message(name)] for name in commands}
+            message["id"] = 1
+        else:
+            message = self._invalid(command)
+        return json.dumps(message).encode("utf-8") + b"\x00"
+
+
+class TeamRedMinerServer(SGMinerServer):
+    """Speaks the TeamRedMiner flavour of the sgminer API, which rejects
+    joined commands"""
+
+    driver = "teamredminer"
+
+    miner = responses.SGMINER_VERSION
+
+    joined = False
+
+
+class _HTTPServer(_SimulatedMiner):
+    """Minimal HTTP/1.1 server with keep-alive support"""
+
+    #: dict: HTTP status codes used and their reason
+    REASONS = {
+        200: "OK",
+        401: "Unauthorized",
+        404: "Not Found",
+        405: "Method Not Allowed",
+    }
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    def route(self, method, path, headers, body):
+        """Returns the status code and decoded body of a request"""
+        raise NotImplementedError
+
+    def respond(self, request):
+        status, message = self.route(*request)
+        return status, json.dumps(message).encode("utf-8")
+
+    def _encode(self, response, padding=0):
+        status, body = response
+        body = super()._encode(body, padding)
+        head = (
+            "HTTP/1.1 {} {}\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: {}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).format(status, self.REASONS[status], len(body))
+        return head.encode("latin-1") + body
+
+
+class XMRigServer(_HTTPServer):
+    """Speaks the XMRig HTTP API: /1/summary, /1/threads and /1/config
+
+    Parameters
+    ----------
+    token : str
+        Access token required as a Bearer token. Empty to allow anyone.
+    """
+
+    driver = "xmrig"
+
+    def __init__(self, *args, token="", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.token = token
+
+        #: dict: Configuration served by /1/config, replaced on PUT
+        self.config = responses.xmrig_config(self.gpus, self.seed)
+
+    def route(self, method, path, headers, body):
+        if self.token and headers.get("authorization") != (
+            "Bearer " + self.token
+        ):
+            return 401, {"status": 401, "error": "Unauthorized"}
+        if path == "/1/summary" and method == "GET":
+            return 200, responses.xmrig_summary(self.gpus, self.seed)
+        if path == "/1/threads" and method == "GET":
+            return 200, responses.xmrig_threads(self.gpus, self.seed)
+        if path == "/1/config":
+            if method == "PUT":
+                self.config = json.loads(body.decode("utf-8"))
+                return 200, self.config
+            if method == "GET":
+                return 200, self.config
+            return 405, {"status": 405, "error": "Method Not Allowed"}
+        return 404, {"status": 404, "error": "Not Found"}
+
+
+class XMRStakServer(_HTTPServer):
+    """Speaks the XMR-Stak HTTP API: /api.json"""
+
+    driver = "xmrstak"
+
+    def route(self, method, path, headers, body):
+        if path == "/api.json" and method == "GET":
+            return 200, responses.xmrstak_api(self.gpus, self.seed)
+        return 404, {"status": 404, "error": "Not Found"}
+
+
+#: dict: Driver names (see :data:`apiminer.fleet.DRIVERS`) and the server
+#: imitating them
+SERVERS = {
+    "claymore": ClaymoreServer,
+    "ethminer": EthminerServer,
+    "sgminer": SGMinerServer,
+    "teamredminer": TeamRedMinerServer,
+    "xmrig": XMRigServer,
+    "xmrstak": XMRStakServer,
+}
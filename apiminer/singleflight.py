@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Coalesce concurrent identical requests to a miner
+
+Miner APIs tend to drop concurrent clients. When several threads or tasks
+ask the same host for the same data at the same time, only the first request
+is sent; the others wait for it and receive the same result (or exception).
+"""
+
+import asyncio
+import functools
+import threading
+import weakref
+
+from .cache import DEFAULT_TTLS
+
+#: frozenset: Methods coalesced by :class:`CoalescedMiner` by default
+READ_ONLY_METHODS = frozenset(DEFAULT_TTLS)
+
+
+class _Call(object):
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Runs at most one call per key at a time, for threads"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args, **kwargs):
+        """Call function, or wait for the call already running for key
+
+        Returns
+        -------
+        object
+            The return value of the call that ran
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = function(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.value
+
+
+class AsyncSingleFlight(object):
+    """Runs at most one call per key at a time, for asyncio tasks
+
+    Calls are tracked per event loop, so one instance may be shared by
+    several loops.
+    """
+
+    def __init__(self):
+        #: :obj:`weakref.WeakKeyDictionary`: Event loops mapped to their
+        #: calls in flight, dropped along with the loop
+        self._loops = weakref.WeakKeyDictionary()
+
+    async def do(self, key, function, *args, **kwargs):
+        """Await function, or the call already running for key
+
+        The call keeps running if the task that started it is cancelled, so
+        the other waiters still receive its result.
+        """
+        loop = asyncio.get_event_loop()
+        calls = self._loops.get(loop)
+        if calls is None:
+            calls = self._loops[loop] = {}
+        future = calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(function(*args, **kwargs))
+            calls[key] = future
+            future.add_done_callback(lambda _: calls.pop(key, None))
+        return await asyncio.shield(future)
+
+
+#: :obj:`SingleFlight`: Group shared by every :class:`CoalescedMiner` that
+#: is not given its own
+default_group = SingleFlight()
+
+#: :obj:`AsyncSingleFlight`: Group shared by every :class:`CoalescedMiner`
+#: wrapping an asyncio driver that is not given its own
+default_async_group = AsyncSingleFlight()
+
+
+class CoalescedMiner(object):
+    """Wraps a driver so identical concurrent requests share one call
+
+    Requests are keyed by host, port, method and arguments, so wrappers
+    around different driver instances for the same miner coalesce too, as
+    long as they share a group. Every other attribute is passed through to
+    the wrapped driver. Combine with :class:`apiminer.cache.CachedMiner` by
+    wrapping this object.
+
+    Parameters
+    ----------
+    miner : object
+        Any apiminer driver instance
+    group : SingleFlight or AsyncSingleFlight or None
+        Defaults to :data:`default_group` or :data:`default_async_group`
+    methods : iterable of str or None
+        Methods to coalesce. Defaults to :data:`READ_ONLY_METHODS`.
+    """
+
+    def __init__(self, miner, group=None, methods=None):
+        self.miner = miner
+        self.group = group
+        self.methods = (
+            READ_ONLY_METHODS if methods is None else frozenset(methods)
+        )
+
+        ip = miner.ip
+        if isinstance(ip, bytes):
+            ip = ip.decode("utf-8")
+        self._host = (ip, int(miner.port))
+
+    def _key(self, name, args, kwargs):
+        return self._host + (name, args, tuple(sorted(kwargs.items())))
+
+    def __getattr__(self, name):
+        attribute = getattr(self.miner, name)
+        if name not in self.methods or not callable(attribute):
+            return attribute
+
+        if asyncio.iscoroutinefunction(attribute):
+            group = self.group or default_async_group
+
+            @functools.wraps(attribute)
+            async def coalesced(*args, **kwargs):
+                return await group.do(
+                    self._key(name, args, kwargs), attribute, *args, **kwargs
+                )
+
+        else:
+            group = self.group or default_group
+
+            @functools.wraps(attribute)
+            def coalesced(*args, **kwargs):
+                return group.do(
+                    self._key(name, args, kwargs), attribute, *args, **kwargs
+                )
+
+        return coalesced
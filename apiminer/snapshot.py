@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Compact typed representation of the unified data
+
+:meth:`unified_data` builds a nested dict per miner and per GPU, keyed by
+strings like ``"GPU 0"``. The ``snapshot`` method of every driver returns a
+:class:`MinerSnapshot` instead, which keeps the per-GPU values in plain lists
+indexed by GPU number. :meth:`MinerSnapshot.to_dict` converts back to the
+unified dict when needed.
+
+By default every driver reports the units its miner uses: uptime is an
+"HH:MM" string for ClaymoreRPC and SGMiner and minutes for XMRig and XMRStak,
+XMRig reports bare floats per GPU and an invalid share count of -1. With
+``normalize=True`` every driver reports the same units instead:
+
+* uptime in seconds, as an int
+* hashrates in H/s, as floats
+* every GPU as ``{"hashrate": float, "temp": int, "fan": int}``, with None
+  for values the miner does not report
+* share counts as ints, None when the miner does not report them
+"""
+
+import typing
+
+#: One GPU of a :class:`MinerSnapshot`. Values the miner does not report are
+#: None.
+GpuSample = typing.NamedTuple(
+    "GpuSample",
+    [
+        ("hashrate", typing.Optional[float]),
+        ("temp", typing.Optional[int]),
+        ("fan", typing.Optional[int]),
+    ],
+)
+
+
+class MinerSnapshot(object):
+    """The state of one miner at one poll
+
+    Holds the same values as :meth:`unified_data`. The per-GPU lists are
+    indexed by GPU number and hold None where a value is not reported, e.g.
+    the temperatures of an XMRig miner.
+
+    Parameters
+    ----------
+    coin : str
+    total_hashrate : float
+    accepted : int
+    rejected : int
+    invalid : int
+    uptime : int or str
+        As reported by the driver's :meth:`unified_data`
+    version : str
+    hashrates : list of float
+    temps : list of int or None
+        Defaults to None for every GPU
+    fans : list of int or None
+        Defaults to None for every GPU
+    normalized : bool
+        Whether the values are in the normalized units. See the module
+        documentation.
+    bare_gpus : bool
+        Whether the driver reports a bare hashrate per GPU instead of a
+        dict, like :meth:`apiminer.XMRig.unified_data`. :meth:`to_dict`
+        does the same unless the snapshot is normalized.
+    """
+
+    __slots__ = (
+        "coin",
+        "total_hashrate",
+        "accepted",
+        "rejected",
+        "invalid",
+        "uptime",
+        "version",
+        "hashrates",
+        "temps",
+        "fans",
+        "normalized",
+        "bare_gpus",
+    )
+
+    def __init__(
+        self,
+        coin,
+        total_hashrate,
+        accepted,
+        rejected,
+        invalid,
+        uptime,
+        version,
+        hashrates,
+        temps=None,
+        fans=None,
+        normalized=False,
+        bare_gpus=False,
+    ):
+        self.coin = coin
+        self.total_hashrate = total_hashrate
+        self.accepted = accepted
+        self.rejected = rejected
+        self.invalid = invalid
+        self.uptime = uptime
+        self.version = version
+        self.hashrates = hashrates
+        self.temps = [None] * len(hashrates) if temps is None else temps
+        self.fans = [None] * len(hashrates) if fans is None else fans
+        self.normalized = normalized
+        self.bare_gpus = bare_gpus
+
+    def __repr__(self):
+        return "MinerSnapshot({})".format(
+            ", ".join(
+                "{}={!r}".format(name, getattr(self, name))
+                for name in self.__slots__
+            )
+        )
+
+    def __reduce__(self):
+        # Pickle the values alone, without a name per attribute, so
+        # snapshots are cheap to send between processes
+        return (
+            MinerSnapshot,
+            tuple(getattr(self, name) for name in self.__slots__),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, MinerSnapshot):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+    def __len__(self):
+        """Number of GPUs"""
+        return len(self.hashrates)
+
+    def gpu(self, number):
+        """Returns a :obj:`GpuSample` for one GPU"""
+        return GpuSample(
+            self.hashrates[number], self.temps[number], self.fans[number]
+        )
+
+    @property
+    def gpus(self):
+        """list of :obj:`GpuSample`: every GPU, indexed by GPU number"""
+        return [
+            GpuSample(*sample)
+            for sample in zip(self.hashrates, self.temps, self.fans)
+        ]
+
+    @classmethod
+    def from_dict(cls, unified, normalized=False):
+        """Builds a snapshot from a :meth:`unified_data` dictionary
+
+        Accepts the per-GPU dicts of every driver as well as the bare
+        per-GPU hashrates of :meth:`apiminer.XMRig.unified_data`.
+        """
+        gpus = unified["GPUs"]
+        count = max([int(key.split()[-1]) + 1 for key in gpus] or [0])
+        hashrates = [None] * count
+        temps = [None] * count
+        fans = [None] * count
+        bare_gpus = False
+        for key, gpu in gpus.items():
+            number = int(key.split()[-1])
+            if isinstance(gpu, dict):
+                hashrates[number] = gpu.get("hashrate")
+                temps[number] = gpu.get("temp")
+                fans[number] = gpu.get("fan")
+            else:
+                hashrates[number] = gpu
+                bare_gpus = not normalized
+        shares = unified["shares"]
+        return cls(
+            unified["coin"],
+            unified["total hashrate"],
+            shares["accepted"],
+            shares["rejected"],
+            shares["invalid"],
+            unified["uptime"],
+            unified["version"],
+            hashrates,
+            temps,
+            fans,
+            normalized,
+            bare_gpus,
+        )
+
+    def to_dict(self):
+        """Converts to the unified data dictionary
+
+        GPUs missing from the miner's report (None hashrate) are left out.
+        Temperatures and fan speeds reported as None are left out too,
+        unless the snapshot is normalized, so every GPU has the same keys.
+        Snapshots with :attr:`bare_gpus` map every GPU to its hashrate
+        alone, None included, as the driver does.
+
+        Returns
+        -------
+        dict
+            See :meth:`unified_data`
+        """
+        gpus = {}
+        for number, (hashrate, temp, fan) in enumerate(
+            zip(self.hashrates, self.temps, self.fans)
+        ):
+            if self.bare_gpus and not self.normalized:
+                gpus["GPU {}".format(number)] = hashrate
+                continue
+            if hashrate is None:
+                continue
+            gpu = {"hashrate": hashrate}
+            if temp is not None or self.normalized:
+                gpu["temp"] = temp
+            if fan is not None or self.normalized:
+                gpu["fan"] = fan
+            gpus["GPU {}".format(number)] = gpu
+
+        return {
+            "coin": self.coin,
+            "total hashrate": self.total_hashrate,
+            "shares": {
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "invalid": self.invalid,
+            },
+            "uptime": self.uptime,
+            "version": self.version,
+            "GPUs": gpus,
+        }
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Timeouts shared by the TCP and HTTP drivers
+
+Every driver takes a ``timeout``: one number of seconds for both connecting
+and reading, or a ``(connect, read)`` tuple like requests accepts.
+"""
+
+#: float: Seconds every driver waits for a connection or a response
+DEFAULT_TIMEOUT = 3
+
+
+def split_timeout(timeout):
+    """Split a driver timeout into its connect and read parts
+
+    Parameters
+    ----------
+    timeout : float, tuple or None
+        One timeout for both, or a ``(connect, read)`` tuple like requests
+        accepts. None waits forever.
+
+    Returns
+    -------
+    tuple
+        ``(connect, read)`` timeouts in seconds
+    """
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+        return connect, read
+    return timeout, timeout
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""End-to-end benchmark of polling a fleet of simulated miners
+
+Starts simulated miners of mixed protocols in a separate process (see
+:mod:`apiminer.simulator`) and polls every one of them through the apiminer
+drivers, in each of four modes:
+
++ sequential: one blocking driver call after the other
++ threaded: blocking drivers on a thread pool
++ async: :class:`apiminer.fleet.Fleet`
++ sharded: :class:`apiminer.sharded.ShardedFleet`, one Fleet per process.
+  Its latencies leave out the time spent waiting for a free slot, and its
+  CPU use and RSS only count the parent process.
+
+For each mode it reports sweeps (polls of the whole fleet) per second, the
+p50 and p99 latency of a single host, CPU use and peak RSS of the polling
+process. Every mode runs in a fresh process, so the peak RSS of one mode
+does not carry over to the next. The blocking drivers get the same timeout
+and keep-alive setting as the async ones. Run ``python -m benchmarks.fleet --help`` for the options, e.g.
+``python -m benchmarks.fleet --miners 5000``.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import multiprocessing
+import resource
+import subprocess
+import sys
+import time
+
+from apiminer.ClaymoreRPC import ClaymoreRPC
+from apiminer.fleet import Fleet, resolve_driver, HTTP_DRIVERS
+from apiminer.session import make_session
+from apiminer.sharded import ShardedFleet
+
+from .harness import save, load
+
+#: tuple of str: Protocols simulated by default, in equal numbers
+DEFAULT_MIX = ("claymore", "sgminer", "xmrig", "xmrstak")
+
+#: tuple of str: Polling modes, in the order they are run
+MODES = ("sequential", "threaded", "async", "sharded")
+
+
+def raise_fd_limit():
+    """Allow as many open files as the hard limit does"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def start_simulator(miners, mix, gpus, latency, jitter):
+    """Start simulated miners in a child process
+
+    Returns
+    -------
+    tuple
+        The child process and the ``(driver, ip, port)`` inventory
+    """
+    counts = collections.Counter(mix[i % len(mix)] for i in range(miners))
+    command = [sys.executable, "-m", "apiminer.simulator"]
+    command += [
+        "{}={}".format(driver, count) for driver, count in counts.items()
+    ]
+    command += [
+        "--gpus",
+        str(gpus),
+        "--latency",
+        str(latency),
+        "--jitter",
+        str(jitter),
+    ]
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, universal_newlines=True
+    )
+    inventory = []
+    for _ in range(miners):
+        driver, ip, port = process.stdout.readline().split()
+        inventory.append((driver, ip, int(port)))
+    return process, inventory
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    index = int(round(percent / 100 * (len(values) - 1)))
+    return values[min(index, len(values) - 1)]
+
+
+class _Blocking(object):
+    """Polls with blocking drivers, one instance per miner"""
+
+    def __init__(self, inventory, keep_alive, timeout):
+        self.inventory = inventory
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        hosts = sum(
+            issubclass(resolve_driver(driver), HTTP_DRIVERS)
+            for driver, _, _ in inventory
+        )
+        self.session = make_session(pool_connections=max(hosts, 1))
+        self.miners = {}
+
+    def poll_one(self, entry):
+        """Poll one miner. Returns its latency and whether it failed"""
+        start = time.perf_counter()
+        try:
+            miner = self.miners.get(entry)
+            if miner is None:
+                driver = resolve_driver(entry[0])
+                kwargs = {"timeout": self.timeout}
+                if issubclass(driver, HTTP_DRIVERS):
+                    kwargs["session"] = self.session
+                elif issubclass(driver, ClaymoreRPC):
+                    # As in Fleet, SGMiner has no keep-alive connections
+                    kwargs["keep_alive"] = self.keep_alive
+                miner = driver(entry[1], entry[2], **kwargs)
+                self.miners[entry] = miner
+            miner.unified_data()
+        except Exception:
+            return time.perf_counter() - start, True
+        return time.perf_counter() - start, False
+
+    def close(self):
+        for miner in self.miners.values():
+            if hasattr(miner, "close"):
+                miner.close()
+        self.session.close()
+
+
+def sequential(inventory, args):
+    poller = _Blocking(inventory, args.keep_alive, args.timeout)
+
+    def sweep():
+        return [poller.poll_one(entry) for entry in inventory]
+
+    return sweep, poller.close
+
+
+def threaded(inventory, args):
+    poller = _Blocking(inventory, args.keep_alive, args.timeout)
+    executor = concurrent.futures.ThreadPoolExecutor(args.threads)
+
+    def sweep():
+        return list(executor.map(poller.poll_one, inventory))
+
+    def close():
+        executor.shutdown()
+        poller.close()
+
+    return sweep, close
+
+
+class _TimedFleet(Fleet):
+    """Fleet recording how long each host took, including queueing"""
+
+    async def _poll_one(self, key, *args):
+        start = time.perf_counter()
+        result = await super()._poll_one(key, *args)
+        self.timings.append(
+            (time.perf_counter() - start, isinstance(result, Exception))
+        )
+        return result
+
+
+def asynchronous(inventory, args):
+    fleet = _TimedFleet(
+        inventory,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        keep_alive=args.keep_alive,
+    )
+
+    def sweep():
+        fleet.timings = []
+        fleet.poll()
+        return fleet.timings
+
+    return sweep, fleet.close
+
+
+def sharded(inventory, args):
+    fleet = ShardedFleet(
+        inventory,
+        args.processes,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        keep_alive=args.keep_alive,
+    )
+    fleet.start()
+
+    def sweep():
+        results = fleet.poll("snapshot")
+        return [
+            (fleet.latencies.get(key, 0.0), isinstance(result, Exception))
+            for key, result in results.items()
+        ]
+
+    return sweep, fleet.close
+
+
+#: dict: Mode names mapped to a function returning its sweep and cleanup
+RUNNERS = {
+    "sequential": sequential,
+    "threaded": threaded,
+    "async": asynchronous,
+    "sharded": sharded,
+}
+
+
+def run(mode, inventory, args):
+    """Run the sweeps of one mode
+
+    Returns
+    -------
+    dict
+        sweeps_per_sec, p50/p99 host latency in ms, errors per sweep, CPU
+        use in percent of one core and peak RSS in MiB
+    """
+    sweep, close = RUNNERS[mode](inventory, args)
+    try:
+        for _ in range(args.warmup):
+            sweep()
+        timings = []
+        cpu = time.process_time()
+        start = time.perf_counter()
+        for _ in range(args.sweeps):
+            timings.extend(sweep())
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+    finally:
+        close()
+
+    latencies = [latency for latency, _ in timings]
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "sweeps_per_sec": args.sweeps / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "errors": sum(failed for _, failed in timings) / args.sweeps,
+        "cpu_percent": 100 * cpu / elapsed,
+        "rss_mib": usage.ru_maxrss / 1024,
+    }
+
+
+def _run_child(connection, mode, inventory, args):
+    try:
+        connection.send(run(mode, inventory, args))
+    finally:
+        connection.close()
+
+
+def run_isolated(mode, inventory, args):
+    """:func:`run` in a fresh process, so peak RSS is that of the mode"""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run_child, args=(sender, mode, inventory, args)
+    )
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        raise RuntimeError("The {} mode failed".format(mode))
+    finally:
+        receiver.close()
+        process.join()
+
+
+ROW = "{:<24} {:>10.3f} {:>9.2f} {:>9.2f} {:>8.1f} {:>7.0f} {:>8.1f}"
+
+
+def report(results, baseline=None, stream=sys.stdout):
+    """Print a result table, see :func:`benchmarks.harness.report`"""
+    header = "{:<24} {:>10} {:>9} {:>9} {:>8} {:>7} {:>8}".format(
+        "mode", "sweeps/s", "p50 ms", "p99 ms", "errors", "CPU %", "RSS MiB"
+    )
+    if baseline is not None:
+        header += " {:>8}".format("vs base")
+    print(header, file=stream)
+    print("-" * len(header), file=stream)
+    for name, result in results.items():
+        line = ROW.format(
+            name,
+            result["sweeps_per_sec"],
+            result["p50_ms"],
+            result["p99_ms"],
+            result["errors"],
+            result["cpu_percent"],
+            result["rss_mib"],
+        )
+        if baseline is not None:
+            previous = baseline.get(name)
+            if previous is None:
+                line += " {:>8}".format("new")
+            else:
+                line += " {:>7.2f}x".format(
+                    result["sweeps_per_sec"] / previous["sweeps_per_sec"]
+                )
+        print(line, file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Throughput of polling a fleet of simulated miners"
+    )
+    parser.add_argument("--miners", type=int, default=1000)
+    parser.add_argument(
+        "--mix",
+        default=",".join(DEFAULT_MIX),
+        help="Comma separated protocols, simulated in equal numbers",
+    )
+    parser.add_argument("--gpus", type=int, default=8)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Miner latency, seconds"
+    )
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument(
+        "--modes", default=",".join(MODES), help="Comma separated modes"
+    )
+    parser.add_argument("--sweeps", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Worker processes of the sharded mode (default: CPU count)",
+    )
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--keep-alive", action="store_true")
+    parser.add_argument("--save", help="Write the results to a JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    args = parser.parse_args(argv)
+
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in RUNNERS:
+            parser.error("unknown mode {!r}".format(mode))
+
+    raise_fd_limit()
+    process, inventory = start_simulator(
+        args.miners, args.mix.split(","), args.gpus, args.latency, args.jitter
+    )
+    try:
+        results = collections.OrderedDict()
+        for mode in modes:
+            name = "{} [{} miners]".format(mode, args.miners)
+            results[name] = run_isolated(mode, inventory, args)
+    finally:
+        process.terminate()
+        process.wait()
+
+    report(results, load(args.compare) if args.compare else None)
+    if args.save:
+        save(args.save, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Timing, allocation measurement and reporting shared by the benchmarks"""
+
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+
+def measure(function, min_time=0.2, repeat=3):
+    """Measure the speed and allocations of a function call
+
+    Parameters
+    ----------
+    function : callable
+        Called without arguments
+    min_time : float
+        Minimum seconds per timing run
+    repeat : int
+        Timing runs. The fastest is reported.
+
+    Returns
+    -------
+    dict
+        "ops_per_sec", "peak_bytes" (allocated at once during one call) and
+        "blocks" (memory blocks still held by the result of one call)
+    """
+    timer = timeit.Timer(function)
+    # Like timeit.Timer.autorange, which only exists from Python 3.6
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    function()
+    tracemalloc.start()
+    before = sys.getallocatedblocks()
+    result = function()
+    blocks = sys.getallocatedblocks() - before
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+
+    return {
+        "ops_per_sec": 1 / best,
+        "peak_bytes": peak,
+        "blocks": blocks,
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def report(results, baseline=None, stream=sys.stdout):
+    """Print a result table, with the speedup over a baseline if given
+
+    Parameters
+    ----------
+    results : dict
+        Benchmark names mapped to :func:`measure` results
+    baseline : dict or None
+        Results of a previous run, as saved by :func:`save`
+    """
+    header = "{:<44} {:>12} {:>10} {:>7}".format(
+        "benchmark", "ops/sec", "peak KiB", "blocks"
+    )
+    if baseline is not None:
+        header += " {:>8}".format("vs base")
+    print(header, file=stream)
+    print("-" * len(header), file=stream)
+    for name, result in results.items():
+        line = "{:<44} {:>12,.0f} {:>10.1f} {:>7d}".format(
+            name,
+            result["ops_per_sec"],
+            result["peak_bytes"] / 1024,
+            result["blocks"],
+        )
+        if baseline is not None:
+            previous = baseline.get(name)
+            if previous is None:
+                line += " {:>8}".format("new")
+            else:
+                line += " {:>7.2f}x".format(
+                    result["ops_per_sec"] / previous["ops_per_sec"]
+                )
+        print(line, file=stream)
+
+
+def save(path, results):
+    with open(path, "w") as output:
+        json.dump(
+            {"environment": environment(), "results": results},
+            output,
+            indent=2,
+        )
+
+
+def load(path):
+    with open(path) as baseline:
+        return json.load(baseline)["results"]
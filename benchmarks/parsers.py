@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Micro-benchmarks of the response parsers and formatters
+
+Run ``python -m benchmarks.parsers``. Save a run with ``--save FILE`` and
+compare a later one against it with ``--compare FILE``. No network access is
+needed: every driver parses the responses the simulated miners send, from
+:mod:`apiminer.simulator.responses`.
+"""
+
+import argparse
+import collections
+import fnmatch
+import json
+
+from apiminer.ClaymoreRPC import (
+    _format_getstat1,
+    _unify_getstat1,
+    parse_getstat1,
+)
+from apiminer.SGMinerRPC import TeamRedMiner
+from apiminer.XMRigHTTP import XMRig
+from apiminer.XMRStakAPI import XMRStakAPI
+from apiminer.framing import FrameReader
+
+from apiminer.simulator import responses as fixtures
+from .harness import measure, report, save, load
+
+
+class FakeResponse(object):
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class FakeSession(object):
+    """Answers every request with the same body, like a requests.Session"""
+
+    def __init__(self, body):
+        self.response = FakeResponse(json.dumps(body))
+
+    def get(self, url, **kwargs):
+        return self.response
+
+
+def benchmarks(gpu_counts=fixtures.GPU_COUNTS):
+    """Benchmark names mapped to the function they time"""
+    cases = collections.OrderedDict()
+    commands = ("summary", "devs", "version")
+    miner = TeamRedMiner("127.0.0.1", 4028)
+
+    for gpus in gpu_counts:
+        suffix = "[{} GPU]".format(gpus)
+
+        claymore = fixtures.claymore_response(gpus)
+        raw = fixtures.claymore_getstat1(gpus)
+        cases["claymore json.loads " + suffix] = lambda data=claymore: (
+            json.loads(data.decode("utf-8"))
+        )
+        cases["claymore format_getstat1 " + suffix] = lambda raw=raw: (
+            _format_getstat1(raw, b"127.0.0.1", 3333)
+        )
+        cases["claymore unified_data " + suffix] = lambda raw=raw: (
+            _unify_getstat1(_format_getstat1(raw, b"127.0.0.1", 3333))
+        )
+        cases["claymore parse_getstat1 " + suffix] = lambda raw=raw: (
+            parse_getstat1(raw)
+        )
+        cases["claymore frame " + suffix] = lambda data=claymore: (
+            FrameReader().feed(data)
+        )
+
+        sgminer = fixtures.sgminer_response(gpus)
+        summary = json.dumps(fixtures.sgminer_messages(gpus)["summary"])
+        cases["sgminer json.loads " + suffix] = lambda data=sgminer: (
+            json.loads(data[:-1].decode("utf-8"))
+        )
+        cases["sgminer _decode_status " + suffix] = lambda data=summary: (
+            miner._decode_status(json.loads(data))
+        )
+        cases["sgminer unified_data " + suffix] = lambda data=sgminer: (
+            miner._unify_joined(
+                miner._split_joined(
+                    json.loads(data[:-1].decode("utf-8")), commands
+                )
+            )
+        )
+        cases["sgminer frame " + suffix] = lambda data=sgminer: (
+            FrameReader().feed(data)
+        )
+
+        xmrig = XMRig(
+            "127.0.0.1", 80, session=FakeSession(fixtures.xmrig_summary(gpus))
+        )
+        cases["xmrig unified_data " + suffix] = xmrig.unified_data
+
+        xmrstak = XMRStakAPI(
+            "127.0.0.1", 80, session=FakeSession(fixtures.xmrstak_api(gpus))
+        )
+        cases["xmrstak unified_data " + suffix] = xmrstak.unified_data
+
+    return cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks of the apiminer parsers"
+    )
+    parser.add_argument(
+        "-k", "--filter", default="*", help="Only run benchmarks matching"
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="Seconds per timing run"
+    )
+    parser.add_argument("--save", help="Write the results to a JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    args = parser.parse_args(argv)
+
+    results = collections.OrderedDict()
+    for name, function in benchmarks().items():
+        if fnmatch.fnmatch(name, args.filter):
+            results[name] = measure(function, args.min_time)
+
+    report(results, load(args.compare) if args.compare else None)
+    if args.save:
+        save(args.save, results)
+
+
+if __name__ == "__main__":
+    main()
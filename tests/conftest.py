@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+"""Fixtures shared by the test modules"""
+
+import socket
+import pytest
+from apiminer.simulator import Simulator
+
+
+class Clock(object):
+    """Fake clock for the classes taking a ``clock`` callable"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def closed_port():
+    """A loopback port nothing listens on"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture
+def simulator():
+    """An empty :class:`apiminer.simulator.Simulator`. Modules needing a
+    populated one override this fixture and request it."""
+    with Simulator() as simulator:
+        yield simulator
@@ -200,3 +200,84 @@ def test_format_gpus_response1(response1_fixture):
 #                     self.miner_response3.decode('utf-8')
 #                 )['result']
 #             )
+
+
+@pytest.fixture
+def keep_alive_fixture(mocker):
+    socket = mocker.patch("socket.socket")
+    socket.return_value.recv.return_value = miner_response1
+    RPC = ClaymoreRPC("10.255.255.1", 8080, keep_alive=True)
+    return RPC, socket
+
+
+def test_keep_alive_reuses_socket(keep_alive_fixture):
+    RPC, socket = keep_alive_fixture
+    RPC.getstat1()
+    RPC.getstat1()
+    assert socket.call_count == 1
+    assert socket.return_value.sendall.call_count == 2
+    socket.return_value.close.assert_not_called()
+    RPC.close()
+    socket.return_value.close.assert_called_once()
+
+
+def test_keep_alive_reconnects_stale_socket(keep_alive_fixture):
+    RPC, socket = keep_alive_fixture
+    RPC.getstat1()
+    # Miner closed the idle connection: the next recv returns EOF
+    socket.return_value.recv.side_effect = [b"", miner_response1]
+    assert RPC.getstat1()[0] == "0.14.0"
+    assert socket.call_count == 2
+    assert socket.return_value.sendall.call_count == 3
+
+
+def test_connect_per_request_by_default(response1_fixture):
+    response1_fixture.getstat1()
+    response1_fixture.getstat1()
+    assert response1_fixture.socket.close.call_count == 2
+
+
+def test_snapshot_response1(response1_fixture):
+    snapshot = response1_fixture.snapshot()
+    assert snapshot.to_dict() == response1_fixture.unified_data()
+    assert snapshot.hashrates == [14573000, 15036000, 14805000]
+    assert snapshot.temps == [41, 51, 61]
+    assert snapshot.fans == [11, 21, 31]
+    assert snapshot.gpu(1) == (15036000, 51, 21)
+    assert snapshot.gpus[2].temp == 61
+
+
+def test_snapshot_dual_mining_response1(response1_fixture):
+    snapshot = response1_fixture.snapshot(return_dual_mining=True)
+    assert snapshot.to_dict() == response1_fixture.unified_data(True)
+
+
+def test_normalized_response1(response1_fixture):
+    response = response1_fixture.unified_data(normalize=True)
+    assert response["uptime"] == 306 * 60
+    assert response["total hashrate"] == 44414000.0
+    assert isinstance(response["total hashrate"], float)
+    assert response["GPUs"]["GPU 0"] == {
+        "hashrate": 14573000.0,
+        "temp": 41,
+        "fan": 11,
+    }
+
+
+def test_parse_getstat1_batch():
+    from apiminer.ClaymoreRPC import parse_getstat1, parse_getstat1_batch
+
+    raws = [
+        json.loads(response.decode("utf-8"))["result"]
+        for response in (miner_response1, miner_response2, miner_response3)
+    ]
+    snapshots = parse_getstat1_batch(raws)
+    assert snapshots == [parse_getstat1(raw) for raw in raws]
+    assert snapshots[1].hashrates == [14572000, 15032000, 14802000]
+    assert snapshots[2].invalid == 33
+
+    numpy = pytest.importorskip("numpy")
+    arrays = parse_getstat1_batch(raws, arrays=True)
+    assert arrays["hashrate"].shape == (3, 3)
+    assert list(arrays["uptime"]) == [306 * 60, 200 * 60, 300 * 60]
+    assert numpy.array_equal(arrays["temp"][:, 0], [41, 42, 43])
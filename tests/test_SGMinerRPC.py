@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import json
+import pytest
+from apiminer.SGMinerRPC import TeamRedMiner
+from tests.test_async import sg_handler
+
+
+@pytest.fixture
+def teamredminer_fixture(mocker):
+    socket = mocker.patch("socket.socket")
+    m = socket.return_value
+    m.sendall.side_effect = lambda data: setattr(
+        m.recv, "side_effect", [sg_handler(json.loads(data.decode("utf-8")))]
+    )
+    miner = TeamRedMiner("10.255.255.1", 4028)
+    miner.coin = "Monero"
+    return miner, socket
+
+
+def test_unified_data_single_connection(teamredminer_fixture):
+    miner, socket = teamredminer_fixture
+    response = miner.unified_data()
+    assert socket.call_count == 1
+    assert response["uptime"] == "02:02"
+    assert response["shares"] == {
+        "accepted": 16057,
+        "rejected": 2,
+        "invalid": 1,
+    }
+    assert response["GPUs"] == {
+        "GPU 0": {"hashrate": 2224, "temp": 53, "fan": 79}
+    }
+
+
+def test_query(teamredminer_fixture):
+    miner, socket = teamredminer_fixture
+    messages = miner.query("summary", "version")
+    assert sorted(messages) == ["summary", "version"]
+    assert messages["version"]["VERSION"][0]["Miner"] == "TeamRedMiner 0.4.5"
+
+
+def test_snapshot(teamredminer_fixture):
+    miner, socket = teamredminer_fixture
+    snapshot = miner.snapshot()
+    assert snapshot.to_dict() == miner.unified_data()
+    assert len(snapshot) == 1
+    assert snapshot.gpu(0) == (2224, 53, 79)
+
+
+def test_snapshot_keeps_reported_types(teamredminer_fixture):
+    miner, socket = teamredminer_fixture
+    summary = {
+        "KHS av": 2,
+        "Accepted": 1,
+        "Rejected": 0,
+        "Discarded": 0,
+        "Stale": 0,
+        "Elapsed": 60,
+    }
+    devs = [{"GPU": 0, "KHS av": 2, "Temperature": 53, "Fan Percent": 79}]
+    version = {"Miner": "sgminer 5.6.0"}
+    snapshot = miner._snapshot(summary, devs, version)
+    assert snapshot.to_dict() == miner._unify(summary, devs, version)
+    assert type(snapshot.total_hashrate) is int
+    snapshot = miner._snapshot(summary, devs, version, normalize=True)
+    assert type(snapshot.total_hashrate) is float
+
+
+def test_normalized(teamredminer_fixture):
+    miner, socket = teamredminer_fixture
+    response = miner.unified_data(normalize=True)
+    assert response["uptime"] == 7320
+    assert response["GPUs"] == {
+        "GPU 0": {"hashrate": 2224.0, "temp": 53, "fan": 79}
+    }
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import http.server
+import json
+import threading
+import pytest
+from apiminer import XMRig
+from apiminer.httpserver import ThreadingHTTPServer
+from apiminer.session import make_session
+from apiminer.snapshot import MinerSnapshot
+
+summary = {
+    "algo": "cn/r",
+    "version": "2.14.1",
+    "uptime": 3720,
+    "hashrate": {
+        "total": [2224.5, 2220.1, 2219.3],
+        "threads": [[1112.2], [1112.3]],
+    },
+    "results": {"shares_good": 100, "shares_total": 102},
+}
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = []
+
+    def setup(self):
+        super().setup()
+        Handler.connections.append(self.client_address)
+
+    def do_GET(self):
+        body = json.dumps(summary).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def xmrig_server():
+    Handler.connections = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_unified_data(xmrig_server):
+    response = XMRig("127.0.0.1", xmrig_server).unified_data()
+    assert response["coin"] == "cn/r"
+    assert response["uptime"] == 62
+    assert response["GPUs"] == {"GPU 0": 1112.2, "GPU 1": 1112.3}
+
+
+def test_keep_alive(xmrig_server):
+    miner = XMRig("127.0.0.1", xmrig_server)
+    for _ in range(5):
+        miner.summary()
+    assert len(Handler.connections) == 1
+
+
+def test_shared_session(xmrig_server):
+    session = make_session()
+    miners = [
+        XMRig("127.0.0.1", xmrig_server, session=session) for _ in range(3)
+    ]
+    for miner in miners:
+        miner.summary()
+    assert len(Handler.connections) == 1
+
+
+def test_snapshot(xmrig_server):
+    miner = XMRig("127.0.0.1", xmrig_server)
+    snapshot = miner.snapshot()
+    assert snapshot.hashrates == [1112.2, 1112.3]
+    assert snapshot.temps == [None, None]
+    assert snapshot.to_dict() == miner.unified_data()
+    assert MinerSnapshot.from_dict(miner.unified_data()) == snapshot
+
+
+def test_snapshot_keeps_idle_threads(xmrig_server):
+    summary["hashrate"]["threads"].append([None])
+    try:
+        miner = XMRig("127.0.0.1", xmrig_server)
+        assert miner.snapshot().to_dict() == miner.unified_data()
+        assert miner.unified_data()["GPUs"]["GPU 2"] is None
+    finally:
+        summary["hashrate"]["threads"].pop()
+
+
+def test_normalized(xmrig_server):
+    response = XMRig("127.0.0.1", xmrig_server).unified_data(normalize=True)
+    assert response["uptime"] == 3720
+    assert response["shares"] == {
+        "accepted": 100,
+        "rejected": 2,
+        "invalid": None,
+    }
+    assert response["GPUs"]["GPU 1"] == {
+        "hashrate": 1112.3,
+        "temp": None,
+        "fan": None,
+    }
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import pytest
+from apiminer.snapshot import MinerSnapshot
+
+numpy = pytest.importorskip("numpy")
+from apiminer import analytics  # noqa: E402
+from apiminer.history import History  # noqa: E402
+
+
+def rig(coin, hashrates, temps, shares=(100, 1, 0)):
+    return MinerSnapshot(
+        coin,
+        sum(hashrate or 0 for hashrate in hashrates),
+        shares[0],
+        shares[1],
+        shares[2],
+        3600,
+        "1.0",
+        list(hashrates),
+        list(temps),
+        [50] * len(hashrates),
+        True,
+    )
+
+
+@pytest.fixture
+def frame():
+    return analytics.fleet_frame(
+        {
+            "eth1": rig("ethash", [30e6, 30e6, 12e6], [60, 61, 62]),
+            "eth2": rig("ethash", [31e6, 29e6], [60, 88]),
+            "down": ConnectionRefusedError(),
+            "xmr1": rig("cn/r", [2000, 1000, None], [None, None, None]),
+            "xmr2": rig("cn/r", [2100], [None], (10, 0, None)),
+        }
+    )
+
+
+def test_fleet_frame(frame):
+    assert frame.keys == ["eth1", "eth2", "xmr1", "xmr2"]
+    assert list(frame.miner) == [0, 0, 0, 1, 1, 2, 2, 2, 3]
+    assert list(frame.gpu) == [0, 1, 2, 0, 1, 0, 1, 2, 0]
+    assert numpy.isnan(frame.hashrate[7])
+    assert frame.shares.shape == (4, 3)
+
+
+def test_fleet_frame_needs_normalized_snapshots():
+    with pytest.raises(TypeError):
+        analytics.fleet_frame({"eth1": rig("ethash", [1], [60]).to_dict()})
+    raw = MinerSnapshot("cn/r", 1.0, 9, 10, -1, 60, "v", [1.0])
+    with pytest.raises(ValueError, match="normalize"):
+        analytics.fleet_frame({"xmr1": raw})
+
+
+def test_underperformers(frame):
+    slow = analytics.underperformers(frame, ratio=0.8)
+    # Compared to the median of their own coin, not the whole fleet
+    assert list(numpy.flatnonzero(slow)) == [2, 6]
+
+
+def test_thermal_outliers(frame):
+    hot = analytics.thermal_outliers(frame, z=1.5)
+    assert list(numpy.flatnonzero(hot)) == [4]
+    hot = analytics.thermal_outliers(frame, z=10, limit=62)
+    assert list(numpy.flatnonzero(hot)) == [2, 4]
+
+
+def test_thermal_outliers_small_fleet():
+    small = analytics.fleet_frame(
+        {"rig": rig("ethash", [1, 1, 1, 1], [65, 66, 64, 85])}
+    )
+    assert list(numpy.flatnonzero(analytics.thermal_outliers(small))) == [3]
+
+    # A card only hot for its model
+    small = analytics.fleet_frame(
+        {"rig": rig("ethash", [1] * 8, [60, 61, 60, 70, 80, 81, 80, 81])}
+    )
+    models = numpy.array(["a"] * 4 + ["b"] * 4)
+    assert not analytics.thermal_outliers(small).any()
+    hot = analytics.thermal_outliers(small, groups=models)
+    assert list(numpy.flatnonzero(hot)) == [3]
+
+
+def test_acceptance_ratios(frame):
+    ratios = analytics.acceptance_ratios(frame.shares)
+    assert ratios[0] == pytest.approx(100 / 101)
+    assert ratios[3] == 1.0
+
+
+def test_rolling_mean():
+    values = numpy.array([[1.0, 2.0, numpy.nan, 4.0, 5.0]])
+    means = analytics.rolling_mean(values, 2)
+    assert list(means[0]) == [1.0, 1.5, 2.0, 4.0, 4.5]
+
+
+def test_share_ratio_trend():
+    history = History(miners=2, gpus=1, samples=8)
+    for tick in range(5):
+        history.record(
+            {
+                # Steady 1 rejected share per 10
+                "steady": rig("ethash", [1], [60], (9 * tick, tick, 0)),
+                # Rejects start climbing after tick 2
+                "rising": rig(
+                    "ethash", [1], [60], (10 * tick, max(0, tick - 2) * 5, 0)
+                ),
+            },
+            tick,
+        )
+    trend = analytics.share_ratio_trend(history.window().shares, 2)
+    assert trend[0] == pytest.approx(0)
+    assert trend[1] > 0.2
+    ratios = analytics.acceptance_ratios(history.window().shares, axis=1)
+    assert ratios.shape == (2, 5)
+    with pytest.raises(ValueError, match="at least 7 samples"):
+        analytics.share_ratio_trend(history.window().shares, 3)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import json
+import pytest
+from apiminer import AsyncEthminerRPC, AsyncTeamRedMiner
+from tests.test_ClaymoreRPC import miner_response1
+
+sg_status = {"STATUS": "S", "When": 1555555555, "Code": 11, "Msg": "OK"}
+
+sg_responses = {
+    "summary": {
+        "STATUS": [dict(sg_status)],
+        "SUMMARY": [
+            {
+                "Elapsed": 7320,
+                "KHS av": 2.224,
+                "Accepted": 16057,
+                "Rejected": 2,
+                "Discarded": 1,
+                "Stale": 0,
+            }
+        ],
+    },
+    "devs": {
+        "STATUS": [dict(sg_status)],
+        "DEVS": [
+            {"GPU": 0, "KHS av": 2.224, "Temperature": 53, "Fan Percent": 79}
+        ],
+    },
+    "version": {
+        "STATUS": [dict(sg_status)],
+        "VERSION": [{"Miner": "TeamRedMiner 0.4.5"}],
+    },
+}
+
+
+def sg_handler(query, joined=True):
+    """Answer an sgminer command, joined with "+" if allowed"""
+    commands = query["command"].split("+")
+    if len(commands) == 1:
+        message = sg_responses[commands[0]]
+    elif joined:
+        message = {
+            command: [dict(sg_responses[command], id=1)]
+            for command in commands
+        }
+    else:
+        message = {
+            "STATUS": [
+                dict(sg_status, STATUS="E", Code=14, Msg="Invalid command")
+            ]
+        }
+    return json.dumps(message).encode("utf-8") + b"\x00"
+
+
+def serve(loop, handler):
+    """Start a loopback server answering each request line with handler"""
+
+    async def client(reader, writer):
+        line = await reader.readline()
+        writer.write(handler(json.loads(line.decode("utf-8"))))
+        await writer.drain()
+        writer.close()
+
+    server = loop.run_until_complete(
+        asyncio.start_server(client, "127.0.0.1", 0)
+    )
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_async_ethminer_concurrent(loop):
+    server, port = serve(loop, lambda query: miner_response1)
+    rpc = [AsyncEthminerRPC("127.0.0.1", port) for _ in range(10)]
+
+    async def poll():
+        return await asyncio.gather(*[miner.unified_data() for miner in rpc])
+
+    results = loop.run_until_complete(poll())
+    server.close()
+
+    for result in results:
+        assert result["version"] == "0.14.0"
+        assert result["uptime"] == "05:06"
+        assert result["total hashrate"] == 44414000
+        assert result["GPUs"]["GPU 1"] == {
+            "hashrate": 15036000,
+            "temp": 51,
+            "fan": 21,
+        }
+
+
+def test_async_teamredminer_unified_data(loop):
+    server, port = serve(loop, sg_handler)
+    miner = AsyncTeamRedMiner("127.0.0.1", port)
+    miner.coin = "Monero"
+
+    result = loop.run_until_complete(miner.unified_data())
+    server.close()
+
+    assert result == {
+        "coin": "Monero",
+        "total hashrate": 2224.0,
+        "shares": {"accepted": 16057, "rejected": 2, "invalid": 1},
+        "uptime": "02:02",
+        "version": "TeamRedMiner 0.4.5",
+        "GPUs": {"GPU 0": {"hashrate": 2224, "temp": 53, "fan": 79}},
+    }
+
+
+def test_async_teamredminer_joined_fallback(loop):
+    queries = []
+
+    def handler(query):
+        queries.append(query["command"])
+        return sg_handler(query, joined=False)
+
+    server, port = serve(loop, handler)
+    miner = AsyncTeamRedMiner("127.0.0.1", port)
+
+    first = loop.run_until_complete(miner.unified_data())
+    second = loop.run_until_complete(miner.unified_data())
+    server.close()
+
+    assert first == second
+    assert first["version"] == "TeamRedMiner 0.4.5"
+    assert (
+        queries
+        == ["summary+devs+version"] + ["summary", "devs", "version"] * 2
+    )
+    assert not miner.joined_commands
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import pytest
+from apiminer.cache import TTLCache, CachedMiner
+
+
+class Driver(object):
+    def __init__(self, ip, port):
+        self.ip = str(ip).encode("utf-8")
+        self.port = port
+        self.calls = []
+
+    def unified_data(self, return_dual_mining=False):
+        self.calls.append("unified_data")
+        return {"calls": len(self.calls)}
+
+    def restart(self):
+        self.calls.append("restart")
+        return True
+
+
+class AsyncDriver(Driver):
+    async def summary(self):
+        self.calls.append("summary")
+        return len(self.calls)
+
+
+def test_ttl(clock):
+    cache = TTLCache(clock=clock)
+    cache.set("key", 1, 10)
+    assert cache.get("key") == (True, 1)
+    clock.now = 10
+    assert cache.get("key") == (False, None)
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction(clock):
+    cache = TTLCache(maxsize=2, clock=clock)
+    cache.set("a", 1, 10)
+    cache.set("b", 2, 10)
+    cache.get("a")
+    cache.set("c", 3, 10)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+
+
+def test_cached_miner(clock):
+    cache = TTLCache(clock=clock)
+    driver = Driver("10.0.0.1", 3333)
+    miner = CachedMiner(driver, cache, ttls={"unified_data": 5})
+
+    assert miner.unified_data() == {"calls": 1}
+    assert miner.unified_data() == {"calls": 1}
+    assert miner.unified_data(True) == {"calls": 2}
+    clock.now = 6
+    assert miner.unified_data() == {"calls": 3}
+
+    # Never cached
+    miner.restart()
+    miner.restart()
+    assert driver.calls.count("restart") == 2
+    assert miner.port == 3333
+
+
+def test_shared_cache_between_wrappers(clock):
+    cache = TTLCache(clock=clock)
+    driver = Driver("10.0.0.1", 3333)
+    CachedMiner(driver, cache).unified_data()
+    CachedMiner(Driver("10.0.0.1", 3333), cache).unified_data()
+    CachedMiner(Driver("10.0.0.2", 3333), cache).unified_data()
+    assert len(driver.calls) == 1
+    assert len(cache) == 2
+
+
+def test_cached_async_miner(clock):
+    driver = AsyncDriver("10.0.0.1", 4028)
+    miner = CachedMiner(driver, TTLCache(clock=clock))
+    loop = asyncio.new_event_loop()
+    assert loop.run_until_complete(miner.summary()) == 1
+    assert loop.run_until_complete(miner.summary()) == 1
+    loop.close()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import socket
+import pytest
+from apiminer import ClaymoreRPC, AsyncSGMiner, SGMiner
+from apiminer.deadhosts import DeadHosts, HostDown
+from apiminer.fleet import Fleet
+from apiminer.timeouts import split_timeout
+from apiminer.simulator import Faults
+
+HOST = ("127.0.0.1", 1)
+
+
+def test_split_timeout():
+    assert split_timeout(2) == (2, 2)
+    assert split_timeout((1, 5)) == (1, 5)
+    assert split_timeout(None) == (None, None)
+
+
+def test_backoff_and_half_open_probe(clock):
+    dead = DeadHosts(base_delay=5, max_delay=12, clock=clock)
+    dead.check(HOST)
+
+    dead.failure(HOST, ConnectionRefusedError())
+    assert HOST in dead
+    with pytest.raises(HostDown):
+        dead.check(HOST)
+
+    # Half-open: a single probe goes through
+    clock.now = 5
+    dead.check(HOST)
+    with pytest.raises(HostDown):
+        dead.check(HOST)
+
+    # The probe failed: the delay doubles, up to max_delay
+    dead.failure(HOST)
+    clock.now = 14.9
+    assert dead.is_down(HOST)
+    clock.now = 15
+    dead.check(HOST)
+    dead.failure(HOST)
+    assert dead._circuits[HOST].retry_at == 15 + 12
+
+    # A probe that never reports back is given up after base_delay
+    clock.now = 27
+    dead.check(HOST)
+    clock.now = 32
+    dead.check(HOST)
+
+    dead.success(HOST)
+    assert HOST not in dead
+    assert len(dead) == 0
+    dead.check(HOST)
+
+
+def test_threshold_and_attempt(clock):
+    dead = DeadHosts(threshold=2, clock=clock)
+    with pytest.raises(ConnectionResetError):
+        with dead.attempt(HOST):
+            raise ConnectionResetError()
+    assert not dead.is_down(HOST)
+    with pytest.raises(ValueError):
+        with dead.attempt(HOST):
+            raise ValueError("not a network error")
+    assert dead._circuits[HOST].failures == 1
+    with pytest.raises(socket.timeout):
+        with dead.attempt(HOST):
+            raise socket.timeout()
+    assert dead.is_down(HOST)
+    dead.clear()
+    with dead.attempt(HOST):
+        pass
+    assert len(dead) == 0
+
+
+def test_drivers_fail_fast(closed_port):
+    dead = DeadHosts()
+    port = closed_port
+    miner = ClaymoreRPC("127.0.0.1", port, dead_hosts=dead)
+    with pytest.raises(ConnectionRefusedError):
+        miner.getstat1()
+    assert ("127.0.0.1", port) in dead
+
+    for driver in (ClaymoreRPC, SGMiner):
+        with pytest.raises(HostDown):
+            driver("127.0.0.1", port, dead_hosts=dead).unified_data()
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(HostDown):
+            loop.run_until_complete(
+                AsyncSGMiner("127.0.0.1", port, dead_hosts=dead).summary()
+            )
+    finally:
+        loop.close()
+
+
+def test_read_timeout(simulator):
+    dead = DeadHosts()
+    server = simulator.add("claymore", faults=Faults(latency=1))[0]
+    miner = ClaymoreRPC(
+        "127.0.0.1", server.port, timeout=(1, 0.1), dead_hosts=dead
+    )
+    with pytest.raises(socket.timeout):
+        miner.getstat1()
+    assert dead.is_down(miner.host)
+
+    server = simulator.add("sgminer")[0]
+    miner = SGMiner("127.0.0.1", server.port, dead_hosts=dead)
+    miner.summary()
+    assert len(dead) == 1
+
+
+def test_fleet_skips_dead_hosts(simulator, closed_port):
+    dead = DeadHosts()
+    port = closed_port
+    fleet = Fleet(
+        [
+            simulator.add("ethminer")[0].inventory,
+            ("claymore", "127.0.0.1", port),
+            ("sgminer", "127.0.0.1", port),
+        ],
+        dead_hosts=dead,
+    )
+    try:
+        first = fleet.poll("snapshot")
+        second = fleet.poll("snapshot")
+    finally:
+        fleet.close()
+    assert isinstance(first[("127.0.0.1", port)], OSError)
+    assert not isinstance(first[("127.0.0.1", port)], HostDown)
+    for key, result in second.items():
+        if key[1] == port:
+            assert isinstance(result, HostDown)
+        else:
+            assert result.total_hashrate > 0
+
+
+def test_fleet_only_records_tcp_hosts(simulator):
+    dead = DeadHosts()
+    faults = Faults(latency=1)
+    fleet = Fleet(
+        [
+            simulator.add("xmrig", faults=faults)[0].inventory,
+            simulator.add("claymore", faults=faults)[0].inventory,
+        ],
+        timeout=0.2,
+        dead_hosts=dead,
+    )
+    try:
+        results = fleet.poll()
+    finally:
+        fleet.close()
+    assert all(
+        isinstance(result, asyncio.TimeoutError) for result in results.values()
+    )
+    # XMRig never consults the registry
+    assert len(dead) == 1
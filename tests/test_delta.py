@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import copy
+import json
+import pytest
+from apiminer.delta import DeltaEncoder, DeltaDecoder, diff, patch
+from apiminer.snapshot import MinerSnapshot
+
+unified = {
+    "coin": "ethash",
+    "total hashrate": 60000000,
+    "shares": {"accepted": 100, "rejected": 1, "invalid": 0},
+    "uptime": "01:02",
+    "version": "PM 4.2c - ETH",
+    "GPUs": {
+        "GPU 0": {"hashrate": 30000000, "temp": 60, "fan": 50},
+        "GPU 1": {"hashrate": 30000000, "temp": 61, "fan": 50},
+    },
+}
+
+
+def test_diff_and_patch():
+    new = copy.deepcopy(unified)
+    new["shares"]["accepted"] = 101
+    new["GPUs"]["GPU 0"]["temp"] = None
+    del new["GPUs"]["GPU 1"]
+    new["GPUs"]["GPU 2"] = {"hashrate": 1, "temp": None, "fan": None}
+
+    changed, removed = diff(unified, new)
+    assert changed == {
+        "shares": {"accepted": 101},
+        "GPUs": {
+            "GPU 0": {"temp": None},
+            "GPU 2": {"hashrate": 1, "temp": None, "fan": None},
+        },
+    }
+    assert removed == [["GPUs", "GPU 1"]]
+    assert patch(copy.deepcopy(unified), changed, removed) == new
+    assert diff(unified, copy.deepcopy(unified)) == ({}, [])
+
+
+def test_encoder_keyframes():
+    encoder = DeltaEncoder(keyframe_interval=3)
+    decoder = DeltaDecoder()
+    document = copy.deepcopy(unified)
+    types = []
+    for poll in range(10):
+        document = copy.deepcopy(document)
+        if poll % 2:
+            document["uptime"] = "01:{:02d}".format(poll)
+        record = encoder.encode("rig", document)
+        if record is None:
+            types.append(None)
+            continue
+        types.append(record["type"])
+        # Records survive a JSON round trip
+        record = json.loads(json.dumps(record))
+        assert decoder.decode("rig", record) == document
+
+    assert types[0] == "keyframe"
+    assert None in types
+    assert "delta" in types
+    # At most keyframe_interval records between two keyframes
+    keyframes = [
+        index for index, kind in enumerate(types) if kind == "keyframe"
+    ]
+    assert all(b - a <= 3 for a, b in zip(keyframes, keyframes[1:]))
+
+
+def test_encoder_accepts_snapshots():
+    encoder = DeltaEncoder()
+    snapshot = MinerSnapshot.from_dict(unified)
+    assert encoder.encode("rig", snapshot)["data"] == unified
+    assert encoder.encode("rig", snapshot) is None
+
+
+def test_decoder_detects_gaps():
+    encoder = DeltaEncoder(keyframe_interval=100)
+    decoder = DeltaDecoder()
+    decoder.decode("rig", encoder.encode("rig", unified))
+    for uptime in ("01:03", "01:04"):
+        record = encoder.encode("rig", dict(unified, uptime=uptime))
+    with pytest.raises(ValueError):
+        decoder.decode("rig", record)
+    with pytest.raises(ValueError):
+        DeltaDecoder().decode("other", record)
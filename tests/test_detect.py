@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import pytest
+from apiminer import EthminerRPC, XMRig
+from apiminer.detect import (
+    DetectionCache,
+    detect,
+    detect_inventory,
+    probe_order,
+)
+
+
+def test_probe_order():
+    assert probe_order(4028)[0] == "sgminer"
+    assert probe_order(3333) == ("claymore", "sgminer", "xmrig", "xmrstak")
+    assert probe_order(12345)[0] == "claymore"
+
+
+def test_detect_every_protocol(simulator, tmp_path, closed_port):
+    for driver in (
+        "claymore",
+        "ethminer",
+        "sgminer",
+        "teamredminer",
+        "xmrig",
+        "xmrstak",
+    ):
+        simulator.add(driver)
+    simulator.add("xmrig", token="secret")
+    dead = ("127.0.0.1", closed_port)
+    hosts = [(ip, port) for _, ip, port in simulator.inventory()] + [dead]
+
+    cache = DetectionCache(str(tmp_path / "detected.json"))
+    inventory = detect_inventory(hosts, timeout=0.5, cache=cache)
+    assert inventory == simulator.inventory()
+
+    # The next start answers from the file, even for the stopped miners
+    simulator.stop()
+    cache = DetectionCache(str(tmp_path / "detected.json"))
+    assert len(cache) == len(hosts)
+    assert cache.get(*dead) == (True, None)
+    assert detect_inventory(hosts, cache=cache) == inventory
+
+
+def test_detect_returns_driver(simulator, closed_port):
+    server = simulator.add("ethminer", gpus=3)[0]
+    miner = detect("127.0.0.1", server.port, timeout=1)
+    assert isinstance(miner, EthminerRPC)
+    assert len(miner.getstat1()[3].split(";")) == 3
+    assert detect("127.0.0.1", closed_port) is None
+
+
+def test_cache_expiry(tmp_path, clock):
+    clock.now = 1000.0
+    path = str(tmp_path / "detected.json")
+    cache = DetectionCache(path, ttl=100, negative_ttl=10, clock=clock)
+    cache.set("10.0.0.1", 80, "xmrig")
+    cache.set("10.0.0.2", 80, None)
+    cache.save()
+    assert isinstance(detect("10.0.0.1", 80, cache=cache, session=None), XMRig)
+
+    clock.now += 50
+    cache = DetectionCache(path, ttl=100, negative_ttl=10, clock=clock)
+    assert cache.get("10.0.0.1", 80) == (True, "xmrig")
+    assert cache.get("10.0.0.2", 80) == (False, None)
+    cache.invalidate("10.0.0.1", 80)
+    assert len(cache) == 0
+
+    with open(path, "w") as stream:
+        stream.write("{not json")
+    assert len(DetectionCache(path)) == 0
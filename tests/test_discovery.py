@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import pytest
+from apiminer.discovery import _RateLimiter, iter_targets, discover, main
+from apiminer.fleet import load_inventory
+
+
+@pytest.fixture
+def simulator(simulator):
+    for driver in ("ethminer", "sgminer", "xmrig"):
+        simulator.add(driver)
+    return simulator
+
+
+def test_iter_targets():
+    targets = list(iter_targets(["10.0.0.0/30", "10.0.1.7"], [3333, 4028]))
+    assert targets == [
+        ("10.0.0.1", 3333),
+        ("10.0.0.1", 4028),
+        ("10.0.0.2", 3333),
+        ("10.0.0.2", 4028),
+        ("10.0.1.7", 3333),
+        ("10.0.1.7", 4028),
+    ]
+    assert len(list(iter_targets(["10.0.0.0/16"], [80]))) == 65534
+
+
+def test_rate_limiter(clock):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    async def run():
+        limiter = _RateLimiter(4, clock=clock)
+        for _ in range(3):
+            await limiter.wait()
+
+    original = asyncio.sleep
+    asyncio.sleep = sleep
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        asyncio.sleep = original
+        loop.close()
+    assert sleeps == [0.25, 0.5]
+
+
+def test_discover(simulator, closed_port):
+    ports = [port for _, _, port in simulator.inventory()] + [closed_port]
+    found = []
+    inventory = discover(
+        ["127.0.0.1"],
+        ports,
+        rate=1000,
+        detect_timeout=1,
+        progress=lambda ip, port: found.append(port),
+    )
+    assert inventory == sorted(simulator.inventory(), key=lambda m: m[2])
+    assert sorted(found) == sorted(ports[:-1])
+
+
+def test_main_writes_inventory(simulator, tmp_path, capsys):
+    output = tmp_path / "inventory.txt"
+    ports = ",".join(str(port) for _, _, port in simulator.inventory())
+    cache = tmp_path / "detected.json"
+    argv = ["127.0.0.1/32", "-p", ports, "-o", str(output)]
+    argv += ["--cache", str(cache), "--detect-timeout", "0.5"]
+    assert main(argv) == 0
+    with open(str(output)) as stream:
+        inventory = load_inventory(stream)
+    assert sorted(inventory) == sorted(simulator.inventory())
+    assert cache.exists()
+    assert "Found 3 miners" in capsys.readouterr().err
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import multiprocessing
+import threading
+import time
+import requests
+from apiminer.distributed import (
+    Aggregator,
+    Coordinator,
+    CoordinatorServer,
+    HashRing,
+    PollerNode,
+)
+from apiminer.delta import DeltaEncoder
+
+HOSTS = ["10.0.{}.{}:3333".format(i // 256, i % 256) for i in range(2000)]
+
+
+def run_node(name, url):
+    node = PollerNode(name, url, interval=0.2, timeout=2.0)
+    try:
+        node.run()
+    finally:
+        node.close()
+
+
+def wait_for(condition, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def test_ring_balance_and_movement():
+    ring = HashRing(["a", "b", "c", "d"])
+    before = {host: ring.node_for(host) for host in HOSTS}
+    counts = [list(before.values()).count(node) for node in "abcd"]
+    assert min(counts) > len(HOSTS) / 4 * 0.6
+
+    ring.remove("d")
+    assert len(ring) == 3 and "d" not in ring
+    after = {host: ring.node_for(host) for host in HOSTS}
+    moved = [host for host in HOSTS if before[host] != after[host]]
+    assert moved == [host for host in HOSTS if before[host] == "d"]
+    assert HashRing().node_for(HOSTS[0]) is None
+
+
+def test_coordinator_rebalances(clock):
+    inventory = [("claymore", "10.0.0.{}".format(i), 3333) for i in range(50)]
+    coordinator = Coordinator(inventory, heartbeat_timeout=10, clock=clock)
+    epoch = coordinator.heartbeat("a")
+    coordinator.heartbeat("b")
+    assert coordinator.epoch > epoch
+    a, b = coordinator.assignment("a"), coordinator.assignment("b")
+    assert a and b and sorted(a + b) == sorted(inventory)
+
+    epoch = coordinator.heartbeat("a")
+    assert coordinator.heartbeat("b") == epoch
+    clock.now = 8
+    coordinator.heartbeat("a")
+    clock.now = 12
+    assert coordinator.expire() == ["b"]
+    assert coordinator.epoch > epoch
+    assert sorted(coordinator.assignment("a")) == sorted(inventory)
+    assert coordinator.assignment("b") == []
+
+
+def test_server_lists_live_nodes(clock):
+    inventory = [("claymore", "10.0.0.{}".format(i), 3333) for i in range(4)]
+    server = CoordinatorServer(
+        Coordinator(inventory, heartbeat_timeout=10, clock=clock)
+    )
+    server.heartbeat({"node": "a"})
+    assert server.nodes() == {"a": 4}
+    clock.now = 11
+    assert server.nodes() == {}
+
+
+def test_aggregator_resync():
+    encoder = DeltaEncoder()
+    aggregator = Aggregator()
+    host = "10.0.0.1:3333"
+    documents = [{"hashrate": rate, "gpus": [1, 2]} for rate in (1, 2, 3)]
+
+    record = dict(encoder.encode(host, documents[0]), host=host)
+    assert aggregator.merge("a", [record], 1.0) == []
+    record = dict(encoder.encode(host, documents[1]), host=host)
+    assert record["type"] == "delta"
+    assert aggregator.merge("a", [record], 2.0) == []
+    assert aggregator.hosts[host]["data"] == documents[1]
+
+    # A node that restarted without its decoder state must send keyframes
+    aggregator.forget("a")
+    record = dict(encoder.encode(host, documents[2]), host=host)
+    assert aggregator.merge("a", [record], 3.0) == [host]
+    assert aggregator.hosts[host]["time"] == 2.0
+
+    error = {"host": host, "type": "error", "error": "TimeoutError()"}
+    aggregator.merge("b", [error], 4.0)
+    assert aggregator.state() == {
+        host: {"node": "b", "time": 4.0, "error": "TimeoutError()"}
+    }
+    assert aggregator.snapshots() == {}
+
+
+def test_node_logs_unreachable_coordinator(closed_port, caplog):
+    node = PollerNode(
+        "a", "http://127.0.0.1:{}".format(closed_port), interval=0.05
+    )
+    thread = threading.Thread(target=node.run)
+    thread.start()
+    try:
+        assert wait_for(lambda: caplog.records, timeout=5)
+    finally:
+        node.stop()
+        thread.join()
+        node.close()
+    assert caplog.records[0].name == "apiminer.distributed"
+    assert node.epoch is None
+
+
+def test_nodes_cover_farm_on_loopback(simulator):
+    context = multiprocessing.get_context()
+    for driver in ("claymore", "ethminer", "sgminer", "xmrig"):
+        simulator.add(driver, count=3, gpus=2)
+    inventory = simulator.inventory()
+    server = CoordinatorServer(
+        Coordinator(inventory, heartbeat_timeout=1.0),
+        address=("127.0.0.1", 0),
+    )
+    host, port = server.start()
+    url = "http://{}:{}".format(host, port)
+    nodes = [
+        context.Process(target=run_node, args=(name, url), daemon=True)
+        for name in ("a", "b")
+    ]
+    for node in nodes:
+        node.start()
+
+    def covered(names):
+        state = requests.get(url + "/snapshots").json()
+        return len(state) == len(inventory) and all(
+            "data" in entry and entry["node"] in names
+            for entry in state.values()
+        )
+
+    try:
+        assert wait_for(lambda: covered({"a", "b"}))
+        assert wait_for(
+            lambda: sorted(requests.get(url + "/nodes").json()) == ["a", "b"]
+        )
+        # A node joining late takes over its share of the miners
+        assert wait_for(
+            lambda: {
+                entry["node"]
+                for entry in requests.get(url + "/snapshots").json().values()
+            }
+            == {"a", "b"}
+        )
+
+        nodes[1].terminate()
+        nodes[1].join()
+        assert wait_for(
+            lambda: requests.get(url + "/nodes").json()
+            == {"a": len(inventory)}
+        )
+        assert wait_for(lambda: covered({"a"}))
+        assert len(server.aggregator.snapshots()) == len(inventory)
+    finally:
+        for node in nodes:
+            node.terminate()
+            node.join()
+        server.stop()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import time
+import pytest
+import requests
+from apiminer.exporter import Exporter
+from apiminer.fleet import Fleet
+
+
+@pytest.fixture
+def simulator(simulator):
+    simulator.add("ethminer", gpus=2)
+    simulator.add("xmrig", gpus=1)
+    return simulator
+
+
+def sample(body, line_start):
+    for line in body.decode("utf-8").splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise KeyError(line_start)
+
+
+def test_poll_renders_metrics(simulator):
+    ethminer, xmrig = simulator.miners
+    fleet = Fleet(simulator.inventory() + [("claymore", "127.0.0.1", 1)])
+    exporter = Exporter(fleet)
+    try:
+        body = exporter.poll()
+    finally:
+        fleet.close()
+
+    labels = 'driver="ethminer",host="127.0.0.1:{}"'.format(ethminer.port)
+    assert sample(body, "apiminer_up{" + labels + "}") == 1
+    assert sample(body, 'apiminer_up{driver="claymore"') == 0
+    assert sample(body, 'apiminer_poll_failures_total{driver="claymore"') == 1
+    assert sample(
+        body, "apiminer_gpu_temperature_celsius{" + labels + ',gpu="1"}'
+    )
+    xmrig_labels = 'driver="xmrig",host="127.0.0.1:{}"'.format(xmrig.port)
+    assert sample(
+        body,
+        "apiminer_shares_total{" + xmrig_labels + ',status="accepted"}',
+    )
+    # Every metric family is declared once, its samples contiguous
+    names = [
+        line.split("{")[0].split(" ")[0]
+        for line in body.decode("utf-8").splitlines()
+        if not line.startswith("#")
+    ]
+    groups = [
+        name for index, name in enumerate(names) if names[index - 1] != name
+    ]
+    assert len(groups) == len(set(groups))
+    assert len(set(names)) == body.count(b"# TYPE")
+
+
+def test_unchanged_miners_are_not_rendered_again(simulator):
+    ethminer, xmrig = simulator.miners
+    fleet = Fleet(simulator.inventory())
+    exporter = Exporter(fleet)
+    try:
+        exporter.poll()
+        rendered = dict(exporter._rendered)
+        xmrig.seed += 1
+        exporter.poll()
+    finally:
+        fleet.close()
+    ethminer_key = ("127.0.0.1", ethminer.port)
+    xmrig_key = ("127.0.0.1", xmrig.port)
+    assert exporter._rendered[ethminer_key] is rendered[ethminer_key]
+    assert exporter._rendered[xmrig_key] is not rendered[xmrig_key]
+
+
+def test_serves_metrics(simulator):
+    exporter = Exporter(
+        Fleet(simulator.inventory()), interval=0.05, address=("127.0.0.1", 0)
+    )
+    host, port = exporter.start()
+    try:
+        for _ in range(100):
+            if exporter.last_poll is not None:
+                break
+            time.sleep(0.01)
+        url = "http://{}:{}".format(host, port)
+        response = requests.get(url + "/metrics")
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert b"apiminer_hashrate_hashes_per_second{" in response.content
+        assert requests.get(url + "/").status_code == 404
+    finally:
+        exporter.stop()
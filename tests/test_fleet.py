@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import threading
+import time
+import pytest
+from apiminer.fleet import Fleet, MinerBusy, resolve_driver, load_inventory
+from apiminer import EthminerRPC
+from tests.test_ClaymoreRPC import miner_response1
+
+
+class FakeDriver(object):
+    """Blocking driver that records how many polls overlap"""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, ip, port):
+        self.ip = ip
+        self.port = port
+
+    def unified_data(self):
+        with FakeDriver.lock:
+            FakeDriver.active += 1
+            FakeDriver.peak = max(FakeDriver.peak, FakeDriver.active)
+        time.sleep(0.05)
+        with FakeDriver.lock:
+            FakeDriver.active -= 1
+        return {"coin": "fake", "port": self.port}
+
+
+class SlowDriver(FakeDriver):
+    calls = 0
+
+    def unified_data(self):
+        SlowDriver.calls += 1
+        time.sleep(1)
+
+
+class DownDriver(FakeDriver):
+    """Blocking TCP style driver failing before it ever connects"""
+
+    socket = None
+
+    def unified_data(self):
+        raise ConnectionError("host down")
+
+    def _disconnect(self):
+        self.socket.close()
+
+
+@pytest.fixture
+def ethminer_server():
+    loop = asyncio.new_event_loop()
+
+    async def client(reader, writer):
+        await reader.readline()
+        writer.write(miner_response1)
+        await writer.drain()
+        writer.close()
+
+    server = loop.run_until_complete(
+        asyncio.start_server(client, "127.0.0.1", 0)
+    )
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.close()
+
+
+def test_resolve_driver():
+    assert resolve_driver("Ethminer") is EthminerRPC
+    assert resolve_driver(FakeDriver) is FakeDriver
+    with pytest.raises(ValueError):
+        resolve_driver("cpuminer")
+
+
+def test_fleet_mixed_inventory(ethminer_server, closed_port):
+    dead = closed_port
+    fleet = Fleet(
+        [
+            ("ethminer", "127.0.0.1", ethminer_server),
+            ("claymore", "127.0.0.1", dead),
+            (FakeDriver, "127.0.0.1", 1),
+            (SlowDriver, "127.0.0.1", 2),
+        ],
+        timeout=0.5,
+    )
+    results = fleet.poll()
+    fleet.close()
+
+    assert results[("127.0.0.1", ethminer_server)]["version"] == "0.14.0"
+    assert isinstance(results[("127.0.0.1", dead)], OSError)
+    assert results[("127.0.0.1", 1)] == {"coin": "fake", "port": 1}
+    assert isinstance(results[("127.0.0.1", 2)], asyncio.TimeoutError)
+
+
+def test_fleet_leaves_blocking_drivers_alone():
+    fleet = Fleet(
+        [(DownDriver, "127.0.0.1", 1), (SlowDriver, "127.0.0.1", 2)],
+        timeout=0.2,
+    )
+    for _ in range(2):
+        results = fleet.poll()
+        assert isinstance(results[("127.0.0.1", 1)], ConnectionError)
+    fleet.close()
+
+
+def test_fleet_skips_busy_blocking_drivers():
+    SlowDriver.calls = 0
+    fleet = Fleet([(SlowDriver, "127.0.0.1", 2)], timeout=0.2)
+    key = ("127.0.0.1", 2)
+    assert isinstance(fleet.poll()[key], asyncio.TimeoutError)
+    # The first call still runs on the thread pool
+    assert isinstance(fleet.poll()[key], MinerBusy)
+    time.sleep(1)
+    assert isinstance(fleet.poll()[key], asyncio.TimeoutError)
+    fleet.close()
+    assert SlowDriver.calls == 2
+
+
+def test_fleet_concurrency_limit():
+    FakeDriver.peak = 0
+    fleet = Fleet(
+        [(FakeDriver, "127.0.0.1", port) for port in range(20)],
+        concurrency=4,
+    )
+    results = fleet.poll()
+    fleet.close()
+
+    assert len(results) == 20
+    assert FakeDriver.peak <= 4
+
+
+def test_fleet_keep_alive_between_polls():
+    loop = asyncio.new_event_loop()
+    counts = {"connections": 0, "requests": 0}
+
+    async def client(reader, writer):
+        counts["connections"] += 1
+        while await reader.readline():
+            counts["requests"] += 1
+            writer.write(miner_response1)
+            await writer.drain()
+        writer.close()
+
+    server = loop.run_until_complete(
+        asyncio.start_server(client, "127.0.0.1", 0)
+    )
+    port = server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        fleet = Fleet([("claymore", "127.0.0.1", port)], keep_alive=True)
+        for _ in range(3):
+            assert fleet.poll()[("127.0.0.1", port)]["version"] == "0.14.0"
+        fleet.close()
+        assert counts == {"connections": 1, "requests": 3}
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.close()
+
+
+def test_load_inventory():
+    inventory = load_inventory(
+        [
+            "# driver ip port\n",
+            "ethminer 192.168.0.2 3333\n",
+            "\n",
+            "XMRig, 192.168.0.4, 80  # cpu rig\n",
+            "sgminer 192.168.0.5:4028\n",
+        ]
+    )
+    assert inventory == [
+        ("ethminer", "192.168.0.2", 3333),
+        ("xmrig", "192.168.0.4", 80),
+        ("sgminer", "192.168.0.5", 4028),
+    ]
+    with pytest.raises(ValueError, match="line 1"):
+        load_inventory(["cgminer 192.168.0.2 4028"])
+    with pytest.raises(ValueError, match="line 2"):
+        load_inventory(["", "ethminer 192.168.0.2"])
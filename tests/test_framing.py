@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import json
+import pytest
+from apiminer.framing import FrameReader, FrameTooLarge
+from apiminer.SGMinerRPC import TeamRedMiner
+
+devs = {
+    "STATUS": [{"STATUS": "S", "When": 1555555555, "Msg": "OK"}],
+    "DEVS": [
+        {"GPU": gpu, "KHS av": 2.2, "Temperature": 60, "Fan Percent": 70}
+        for gpu in range(64)
+    ],
+}
+
+
+def chunks(data, size):
+    return [data[index : index + size] for index in range(0, len(data), size)]
+
+
+class FakeSocket(object):
+    def __init__(self, segments):
+        self.segments = list(segments)
+
+    def recv(self, size):
+        return self.segments.pop(0) if self.segments else b""
+
+
+def test_split_segments_newline():
+    data = json.dumps(devs).encode("utf-8")
+    reader = FrameReader()
+    segments = chunks(data + b"\n", 1000)
+    assert len(data) > 4096
+    for segment in segments[:-1]:
+        assert reader.feed(segment) is None
+    assert reader.feed(segments[-1]) == devs
+    assert len(reader.buffer) == 0
+
+
+def test_nul_terminator_and_remainder():
+    reader = FrameReader()
+    assert reader.feed(b'{"a": 1}\x00{"b"') == {"a": 1}
+    assert reader.feed(b": 2}\x00") == {"b": 2}
+
+
+def test_pretty_printed_document():
+    data = json.dumps(devs, indent=4).encode("utf-8") + b"\n"
+    assert FrameReader().read_socket(FakeSocket(chunks(data, 7))) == devs
+
+
+def test_unterminated_document():
+    data = json.dumps(devs).encode("utf-8")
+    reader = FrameReader()
+    assert reader.read_socket(FakeSocket(chunks(data, 512))) == devs
+
+
+def test_eof():
+    assert FrameReader().read_socket(FakeSocket([])) is None
+    with pytest.raises(ValueError):
+        FrameReader().read_socket(FakeSocket([b'{"a": [1, 2']))
+
+
+def test_max_size():
+    reader = FrameReader(max_size=1024)
+    with pytest.raises(FrameTooLarge):
+        reader.read_socket(FakeSocket([b"[" + b"1," * 1000]))
+    assert len(reader.buffer) == 0
+
+
+def test_sgminer_large_devs(mocker):
+    data = json.dumps(devs).encode("utf-8") + b"\x00"
+    m = mocker.patch("socket.socket").return_value
+    m.recv.side_effect = chunks(data, 1460)
+    miner = TeamRedMiner("10.255.255.1", 4028)
+    assert len(miner.devs()) == 64
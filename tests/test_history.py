@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import pytest
+from apiminer.snapshot import MinerSnapshot
+
+numpy = pytest.importorskip("numpy")
+from apiminer.history import History  # noqa: E402
+
+
+def snapshot(tick, gpus=2):
+    return MinerSnapshot(
+        "ethash",
+        float(tick * gpus),
+        tick,
+        1,
+        None,
+        60 * tick,
+        "0.14.0",
+        [float(tick)] * gpus,
+        [60 + tick] * gpus,
+        [70] * gpus,
+        normalized=True,
+    )
+
+
+def test_window_is_view_across_wraparound():
+    history = History(miners=2, gpus=4, samples=5)
+    for tick in range(8):
+        history.record({("10.0.0.1", 3333): snapshot(tick)}, 100 + tick)
+
+    window = history.window()
+    assert len(history) == 5
+    assert list(window.times) == [103, 104, 105, 106, 107]
+    assert list(window.hashrate[0, 0]) == [3, 4, 5, 6, 7]
+    assert numpy.shares_memory(window.hashrate, history.hashrate)
+    # GPUs the miner does not have are NaN
+    assert numpy.isnan(window.hashrate[0, 2]).all()
+    assert list(window.shares[0, 0]) == [3, 4, 5, 6, 7]
+    assert numpy.isnan(window.shares[0, 2]).all()
+
+
+def test_window_seconds():
+    history = History(miners=1, gpus=2, samples=10)
+    for tick in range(6):
+        history.record({"rig": snapshot(tick)}, 100 + 10 * tick)
+    window = history.window(seconds=25, now=150)
+    assert list(window.times) == [130, 140, 150]
+    assert history.window(samples=2).temp.shape == (1, 2, 2)
+
+
+def test_missing_snapshots():
+    history = History(miners=2, gpus=2, samples=3)
+    history.record({"a": snapshot(1), "b": snapshot(1)}, 1)
+    history.record({"a": ConnectionRefusedError(), "b": snapshot(2)}, 2)
+
+    window = history.window()
+    assert window.keys == ["a", "b"]
+    assert numpy.isnan(window.hashrate[0, :, 1]).all()
+    assert list(window.total_hashrate[1]) == [2, 4]
+
+
+def test_refuses_raw_data():
+    history = History(miners=2, gpus=2, samples=3)
+    with pytest.raises(TypeError):
+        history.record({"a": snapshot(1).to_dict()}, 1)
+    raw = snapshot(1)
+    raw.normalized = False
+    with pytest.raises(ValueError):
+        history.record({"a": snapshot(1), "b": raw}, 1)
+    assert len(history) == 0 and history.keys == []
+
+
+def test_capacity():
+    history = History(miners=1, gpus=1, samples=2)
+    history.record({"a": snapshot(1)}, 1)
+    with pytest.raises(ValueError):
+        history.record({"a": snapshot(2), "b": snapshot(2)}, 2)
+    # The full poll is refused, nothing of it is written
+    assert len(history) == 1 and history.keys == ["a"]
+    assert list(history.window().total_hashrate[0]) == [2]
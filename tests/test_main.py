@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import json
+import pytest
+from apiminer.__main__ import main
+
+
+@pytest.fixture
+def inventory(tmpdir, simulator):
+    simulator.add("ethminer", gpus=2)
+    simulator.add("xmrig", gpus=3)
+    path = tmpdir.join("inventory.txt")
+    path.write(
+        "".join("{} {} {}\n".format(*entry) for entry in simulator.inventory())
+    )
+    return str(path), simulator
+
+
+def test_table(inventory, capsys):
+    path, simulator = inventory
+    assert main([path]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split()[:3] == ["host", "driver", "coin"]
+    assert len(lines) == 3
+    assert lines[1].split()[1] == "ethminer"
+
+
+def test_jsonl_watch(inventory, capsys):
+    path, simulator = inventory
+    assert main([path, "-f", "jsonl", "-n", "-w", "0.05", "-c", "3"]) == 0
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(lines) == 6
+    assert len(lines[1]["data"]["GPUs"]) == 3
+    assert lines[0]["data"]["shares"]["invalid"] is not None
+    # Kept alive between sweeps
+    assert simulator.miners[0].connections == 1
+    assert simulator.miners[0].requests == 3
+
+
+def test_processes(inventory, capsys):
+    path, simulator = inventory
+    assert main([path, "-f", "jsonl", "--processes", "2"]) == 0
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["driver"] for line in lines] == ["ethminer", "xmrig"]
+    assert len(lines[0]["data"]["GPUs"]) == 2
+
+
+def test_failed_miner(tmpdir, capsys):
+    path = tmpdir.join("inventory.txt")
+    path.write("claymore 127.0.0.1:1\n")
+    assert main([str(path), "-f", "jsonl", "--timeout", "1"]) == 1
+    assert "error" in json.loads(capsys.readouterr().out)
+
+
+def test_bad_inventory(tmpdir, capsys):
+    path = tmpdir.join("inventory.txt")
+    path.write("cgminer 127.0.0.1 4028\n")
+    assert main([str(path)]) == 2
+    assert "line 1" in capsys.readouterr().err
+
+
+def test_jsonl_delta(inventory, capsys):
+    path, simulator = inventory
+    assert main([path, "-f", "jsonl", "-d", "-w", "0.05", "-c", "3"]) == 0
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    # The simulated miners do not change, so only the keyframes are printed
+    assert [line["type"] for line in lines] == ["keyframe", "keyframe"]
+    assert len(lines[1]["data"]["GPUs"]) == 3
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import pytest
+from apiminer.fleet import Fleet
+from apiminer.scheduler import Scheduler
+from apiminer.snapshot import MinerSnapshot
+
+
+def snapshot(hashrate=1000.0, temp=60):
+    return MinerSnapshot("x", hashrate, 1, 0, 0, 60, "v", [hashrate], [temp])
+
+
+@pytest.fixture
+def scheduler(clock):
+    fleet = Fleet([("xmrig", "127.0.0.1", port) for port in range(1, 11)])
+    return Scheduler(fleet, interval=10, jitter=0.1, clock=clock, seed=1)
+
+
+def test_first_polls_are_spread(scheduler):
+    assert scheduler.due(0) == []
+    dues = sorted(host.due for host in scheduler.hosts.values())
+    assert 0 <= dues[0] < dues[-1] <= 10
+    assert len(scheduler.due(10)) == 10
+    assert scheduler.due(10) == []
+
+
+def test_backoff(scheduler):
+    key = ("127.0.0.1", 1)
+    scheduler.due(10)
+    intervals = [scheduler.record(key, OSError()) for _ in range(6)]
+    assert intervals == [20, 40, 80, 160, 160, 160]
+    assert scheduler.record(key, snapshot()) == 10
+
+
+def test_tightens_while_changing(scheduler):
+    key = ("127.0.0.1", 1)
+    scheduler.due(10)
+    assert scheduler.record(key, snapshot()) == 10
+    assert scheduler.record(key, snapshot(hashrate=1200.0)) == 5
+    assert scheduler.record(key, snapshot(hashrate=1200.0, temp=70)) == 2.5
+    assert scheduler.record(key, snapshot(hashrate=900.0)) == 2.5
+    assert scheduler.record(key, snapshot(hashrate=900.0)) == 3.75
+    for _ in range(5):
+        interval = scheduler.record(key, snapshot(hashrate=900.0))
+    assert interval == 10
+
+
+def test_jitter(scheduler):
+    scheduler.due(10)
+    for key in list(scheduler.hosts):
+        scheduler.record(key, snapshot(), now=10)
+    dues = [host.due - 10 for host in scheduler.hosts.values()]
+    assert all(9 <= due <= 11 for due in dues)
+    assert len(set(dues)) == len(dues)
+
+
+def test_fleet_changes(scheduler):
+    scheduler.due(0)
+    scheduler.fleet.remove("127.0.0.1", 1)
+    scheduler.fleet.add("xmrig", "127.0.0.1", 11)
+    keys = scheduler.due(10)
+    assert len(keys) == 9
+    assert ("127.0.0.1", 1) not in keys
+    # New miners get their first poll within one interval
+    assert scheduler.due(20) == [("127.0.0.1", 11)]
+    with pytest.raises(KeyError):
+        scheduler.record(("127.0.0.1", 1), snapshot())
+
+
+def test_apoll(simulator):
+    simulator.add("ethminer", count=2)
+    fleet = Fleet(simulator.inventory() + [("claymore", "127.0.0.1", 1)])
+    scheduler = Scheduler(fleet, interval=0.05)
+    loop = asyncio.new_event_loop()
+    try:
+        polled = {}
+        for _ in range(20):
+            results = loop.run_until_complete(scheduler.apoll())
+            for key, result in results.items():
+                polled.setdefault(key, []).append(result)
+    finally:
+        loop.close()
+        fleet.close()
+    assert len(polled) == 3
+    dead = polled.pop(("127.0.0.1", 1))
+    assert all(isinstance(result, OSError) for result in dead)
+    for results in polled.values():
+        assert len(results) > len(dead)
+        assert all(isinstance(result, MinerSnapshot) for result in results)
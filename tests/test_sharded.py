@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import pickle
+import pytest
+from apiminer.fleet import Fleet
+from apiminer.sharded import ShardedFleet, shard_of
+from apiminer.snapshot import MinerSnapshot
+
+
+@pytest.fixture
+def simulator(simulator):
+    for driver in ("claymore", "ethminer", "sgminer", "xmrig", "xmrstak"):
+        simulator.add(driver, count=4, gpus=3)
+    return simulator
+
+
+def test_snapshot_pickle():
+    snapshot = MinerSnapshot("ethash", 1.0, 1, 0, 0, 60, "v", [1.0, 2.0])
+    assert pickle.loads(pickle.dumps(snapshot)) == snapshot
+
+
+def test_shard_of_is_stable():
+    keys = [
+        ("10.0.{}.{}".format(i // 256, i % 256), 3333) for i in range(1000)
+    ]
+    shards = [shard_of(key, 4) for key in keys]
+    assert shards == [shard_of(key, 4) for key in keys]
+    assert sorted(set(shards)) == [0, 1, 2, 3]
+
+
+def test_sharded_poll_matches_fleet(simulator):
+    inventory = simulator.inventory()
+    fleet = Fleet(inventory)
+    sharded = ShardedFleet(inventory, processes=3, keep_alive=True)
+    try:
+        expected = fleet.poll("snapshot", normalize=True)
+        results = sharded.poll("snapshot", normalize=True)
+        assert results == expected
+        assert set(sharded.latencies) == set(expected)
+
+        keys = list(expected)[:3]
+        assert sorted(sharded.poll("snapshot", keys)) == sorted(keys)
+
+        sharded.remove(*keys[0])
+        assert len(sharded) == len(inventory) - 1
+        assert keys[0] not in sharded.poll("snapshot")
+        sharded.add(*inventory[0])
+        assert len(sharded.poll("snapshot")) == len(inventory)
+    finally:
+        fleet.close()
+        sharded.close()
+
+
+def test_worker_restarts(simulator):
+    sharded = ShardedFleet(simulator.inventory(), processes=2)
+    try:
+        sharded.start()
+        process, _ = sharded._workers[0]
+        process.terminate()
+        process.join()
+        results = sharded.poll("snapshot")
+        assert sharded._workers[0][0].pid != process.pid
+        assert not any(
+            isinstance(result, Exception) for result in results.values()
+        )
+    finally:
+        sharded.close()
+    assert sharded._workers == [None, None]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import time
+import pytest
+from apiminer import ClaymoreRPC, EthminerRPC, SGMiner, TeamRedMiner, XMRig
+from apiminer.ClaymoreRPC import AsyncClaymoreRPC
+from apiminer.fleet import DRIVERS, Fleet
+from apiminer.framing import FrameTooLarge
+from apiminer.simulator import Faults
+
+
+def test_fleet_polls_every_protocol(simulator):
+    for driver in ("claymore", "ethminer", "sgminer", "xmrig", "xmrstak"):
+        simulator.add(driver, count=2, gpus=13)
+    fleet = Fleet(simulator.inventory())
+    try:
+        results = fleet.poll(method="snapshot", normalize=True)
+    finally:
+        fleet.close()
+    assert len(results) == 10
+    for snapshot in results.values():
+        assert len(snapshot) == 13
+        assert snapshot.total_hashrate > 0
+
+
+def test_snapshot_matches_unified_data(simulator):
+    for driver in ("claymore", "ethminer", "sgminer", "xmrig", "xmrstak"):
+        server = simulator.add(driver, gpus=3)[0]
+        miner = DRIVERS[driver]("127.0.0.1", server.port)
+        assert miner.snapshot().to_dict() == miner.unified_data(), driver
+
+
+def test_claymore_keep_alive(simulator):
+    server = simulator.add("ethminer", gpus=2)[0]
+    miner = EthminerRPC("127.0.0.1", server.port, keep_alive=True)
+    assert len(miner.getstat1()[3].split(";")) == 2
+    assert miner.ping()
+    assert len(miner.getstathr()["result"]["ethhashrates"]) == 2
+    miner.close()
+    assert server.connections == 1
+    assert server.requests == 3
+
+
+def test_sgminer_commands(simulator):
+    server = simulator.add("sgminer", gpus=3)[0]
+    miner = SGMiner("127.0.0.1", server.port)
+    assert miner.gpucount() == 3
+    assert miner.gpu(2)[0]["GPU"] == 2
+    assert miner.pgacount() == 0
+    with pytest.raises(ValueError):
+        miner.gpu(3)
+
+
+def test_teamredminer_without_joined_commands(simulator):
+    server = simulator.add("teamredminer", gpus=2)[0]
+    assert not server.joined
+    miner = TeamRedMiner("127.0.0.1", server.port)
+    assert len(miner.unified_data()["GPUs"]) == 2
+    assert not miner.joined_commands
+    # Later polls go straight to one command per request
+    requests = server.requests
+    assert len(miner.unified_data()["GPUs"]) == 2
+    assert server.requests - requests == 3
+
+    server = simulator.add("sgminer", gpus=2, joined=False)[0]
+    miner = SGMiner("127.0.0.1", server.port)
+    assert len(miner.unified_data()["GPUs"]) == 2
+    assert not miner.joined_commands
+
+
+def test_xmrig_token(simulator):
+    server = simulator.add("xmrig", gpus=2, token="secret")[0]
+    assert XMRig("127.0.0.1", server.port, token="secret").summary()
+    with pytest.raises(Exception):
+        XMRig("127.0.0.1", server.port).summary()
+
+
+def test_latency(simulator):
+    server = simulator.add("xmrig", faults=Faults(latency=0.2))[0]
+    start = time.monotonic()
+    XMRig("127.0.0.1", server.port).summary()
+    assert time.monotonic() - start >= 0.2
+
+
+def test_reset(simulator):
+    server = simulator.add("claymore", faults=Faults(reset=1.0))[0]
+    miner = ClaymoreRPC("127.0.0.1", server.port)
+    miner.write("miner_getstat1")
+    assert miner.read() == {"results": "INVALID"}
+
+
+def test_truncate(simulator):
+    server = simulator.add("sgminer", faults=Faults(truncate=1.0))[0]
+    miner = SGMiner("127.0.0.1", server.port)
+    with pytest.raises(ValueError):
+        miner.summary()
+    server.faults = Faults()
+    assert len(miner.unified_data()["GPUs"]) == 8
+
+    server = simulator.add("claymore", faults=Faults(truncate=1.0))[0]
+    miner = ClaymoreRPC("127.0.0.1", server.port, keep_alive=True)
+    with pytest.raises(ValueError):
+        miner.getstat1()
+    server.faults = Faults()
+    assert len(miner.unified_data()["GPUs"]) == 8
+    miner.close()
+
+    async def poll_twice():
+        server.faults = Faults(truncate=1.0)
+        miner = AsyncClaymoreRPC("127.0.0.1", server.port, keep_alive=True)
+        with pytest.raises(ValueError):
+            await miner.getstat1()
+        server.faults = Faults()
+        try:
+            return await miner.unified_data()
+        finally:
+            miner.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert len(loop.run_until_complete(poll_twice())["GPUs"]) == 8
+    finally:
+        loop.close()
+
+
+def test_oversize(simulator):
+    server = simulator.add("sgminer", faults=Faults(oversize=1.0))[0]
+    miner = SGMiner("127.0.0.1", server.port)
+    with pytest.raises(FrameTooLarge):
+        miner.summary()
+    server.faults = Faults()
+    assert len(miner.unified_data()["GPUs"]) == 8
+
+    server = simulator.add("claymore", faults=Faults(oversize=1.0))[0]
+    miner = ClaymoreRPC("127.0.0.1", server.port, keep_alive=True, timeout=1)
+    with pytest.raises(FrameTooLarge):
+        miner.getstat1()
+    server.faults = Faults()
+    assert len(miner.getstat1()) == 9
+    miner.close()
+
+
+def test_unknown_driver(simulator):
+    with pytest.raises(ValueError):
+        simulator.add("cgminer")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+""""""
+
+import asyncio
+import gc
+import threading
+import time
+from apiminer.singleflight import (
+    SingleFlight,
+    AsyncSingleFlight,
+    CoalescedMiner,
+)
+
+
+class Driver(object):
+    def __init__(self, ip, port, delay=0.1):
+        self.ip = ip
+        self.port = port
+        self.delay = delay
+        self.calls = 0
+
+    def unified_data(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {"calls": self.calls}
+
+    def restart(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return True
+
+
+class AsyncDriver(Driver):
+    async def unified_data(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.calls > 1:
+            raise ConnectionResetError("busy")
+        return {"calls": self.calls}
+
+
+def run_threads(function, count=8):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(function()))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_threads_share_one_call():
+    driver = Driver("10.0.0.1", 3333)
+    group = SingleFlight()
+    miners = [CoalescedMiner(driver, group) for _ in range(2)]
+    results = run_threads(lambda: miners[0].unified_data()) + run_threads(
+        lambda: miners[1].unified_data()
+    )
+    assert driver.calls == 2
+    assert results[:8] == [{"calls": 1}] * 8
+    assert results[8:] == [{"calls": 2}] * 8
+
+
+def test_write_methods_not_coalesced():
+    driver = Driver("10.0.0.1", 3333, delay=0.01)
+    miner = CoalescedMiner(driver, SingleFlight())
+    run_threads(miner.restart, count=4)
+    assert driver.calls == 4
+
+
+def test_errors_shared():
+    group = SingleFlight()
+
+    def fail():
+        time.sleep(0.05)
+        raise ValueError("Access denied")
+
+    errors = []
+
+    def call():
+        try:
+            group.do("key", fail)
+        except ValueError as error:
+            errors.append(error)
+
+    run_threads(call, count=4)
+    assert len(errors) == 4
+
+
+def test_async_tasks_share_one_call():
+    driver = AsyncDriver("10.0.0.1", 4028)
+    miner = CoalescedMiner(driver, AsyncSingleFlight())
+
+    async def poll():
+        return await asyncio.gather(*[miner.unified_data() for _ in range(10)])
+
+    loop = asyncio.new_event_loop()
+    results = loop.run_until_complete(poll())
+    loop.close()
+    assert driver.calls == 1
+    assert results == [{"calls": 1}] * 10
+
+
+def test_async_calls_dropped_with_their_loop():
+    driver = AsyncDriver("10.0.0.1", 4028)
+    group = AsyncSingleFlight()
+    miner = CoalescedMiner(driver, group)
+
+    loop = asyncio.new_event_loop()
+    assert loop.run_until_complete(miner.unified_data()) == {"calls": 1}
+    assert list(group._loops) == [loop]
+    loop.close()
+    del loop
+    gc.collect()
+    assert len(group._loops) == 0